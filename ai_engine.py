@@ -2,11 +2,13 @@
 # AlphaZero KI-Engine mit Fallback auf einfaches MCTS
 import math
 import random
+import threading
 import time
 import os
 import torch
 from game_logic import GameState
 from config import ROWS, COLS
+from search_control import SearchControl
 
 # Versuche AlphaZero zu importieren, Fallback auf einfaches MCTS
 try:
@@ -45,12 +47,38 @@ class MCTSNode:
         self.visits += 1
         self.wins += result
 
+# Bedenkzeit pro Zug (ms) je Schwierigkeit für die zeitbegrenzte Suche
+DEFAULT_TIME_LIMITS_MS = {'einfach': 300, 'mittel': 1000, 'stark': 3000}
+
+# Inferenz-Modus je Schwierigkeit: die schwächeren Stufen rechnen auf der CPU mit dem
+# Int8-Modell (schneller, minimal ungenauer), 'stark' mit dem Float-Modell
+DEFAULT_INFERENCE_MODES = {'einfach': 'int8', 'mittel': 'int8', 'stark': 'float'}
+
+# Obergrenze der Fallback-Iterationen bei zeitbegrenzter Suche
+FALLBACK_MAX_ITERATIONS = 100000
+
 class AIEngine:
     """KI-Engine mit AlphaZero-Unterstützung und Fallback."""
     
-    def __init__(self):
-        """Initialisiert die KI-Engine."""
+    def __init__(self, ponder=True, time_limits_ms=None, clock=None, inference_modes=None):
+        """
+        Initialisiert die KI-Engine.
+        
+        Args:
+            ponder: Während der Gegner überlegt im Hintergrund weitersuchen (nur AlphaZero)
+            time_limits_ms: Bedenkzeit pro Zug je Schwierigkeit (z.B.
+                DEFAULT_TIME_LIMITS_MS); ohne Angabe feste Simulationszahlen
+            clock: Optionale GameClock; das Zeitbudget jedes Zugs kommt dann aus der Restzeit
+            inference_modes: 'float' oder 'int8' je Schwierigkeit (Standard:
+                DEFAULT_INFERENCE_MODES); 'int8' braucht das Artefakt aus
+                quantization.py und gilt nur auf der CPU
+        """
         self.alphazero_engine = None
+        self.ponder = ponder
+        self.time_limits_ms = time_limits_ms or {}
+        self.clock = clock
+        self._ponder_thread = None
+        self._ponder_stop = None
         
         # Versuche AlphaZero-Engine zu laden
         if ALPHAZERO_AVAILABLE:
@@ -70,13 +98,53 @@ class AIEngine:
                         break
                 
                 device = 'cuda' if torch.cuda.is_available() else 'cpu'
-                self.alphazero_engine = AlphaZeroEngine(model_path=model_path, device=device)
+                modes = DEFAULT_INFERENCE_MODES if inference_modes is None else inference_modes
+                self.alphazero_engine = AlphaZeroEngine(model_path=model_path, device=device,
+                                                        inference_modes=modes if device == 'cpu' else None)
                 print(f"AlphaZero-Engine geladen (Modell: {model_path or 'keines - verwendet zufällig initialisiertes Modell'})")
             except Exception as e:
                 print(f"Fehler beim Laden von AlphaZero: {e}. Verwende Fallback-MCTS.")
                 self.alphazero_engine = None
     
-    def get_move(self, game_state, difficulty, player_id):
+    def new_game(self):
+        """Setzt die Such-Caches zu Beginn einer neuen Partie zurück."""
+        self.stop_pondering()
+        if self.alphazero_engine is not None:
+            self.alphazero_engine.new_game()
+    
+    def start_pondering(self, game_state, difficulty):
+        """
+        Startet die Hintergrundsuche ab game_state, während der Gegner am Zug ist.
+        
+        Der Suchbaum wird im nächsten get_move() weiterverwendet.
+        """
+        self.stop_pondering()
+        if not self.ponder or self.alphazero_engine is None:
+            return
+        self._ponder_stop = threading.Event()
+        self._ponder_thread = threading.Thread(target=self._run_pondering,
+                                               args=(game_state, difficulty, self._ponder_stop),
+                                               daemon=True)
+        self._ponder_thread.start()
+    
+    def _run_pondering(self, game_state, difficulty, stop_event):
+        start = time.perf_counter()
+        try:
+            done = self.alphazero_engine.ponder(game_state, difficulty, stop_event)
+            print(f"Pondering: {done} Simulationen in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            print(f"Fehler beim Pondering: {e}")
+    
+    def stop_pondering(self):
+        """Beendet die Hintergrundsuche und wartet auf den laufenden Batch."""
+        if self._ponder_thread is None:
+            return
+        self._ponder_stop.set()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        self._ponder_stop = None
+    
+    def get_move(self, game_state, difficulty, player_id, control=None, time_limit_ms=None):
         """
         Berechnet den besten Zug mit AlphaZero oder Fallback-MCTS.
         
@@ -84,20 +152,45 @@ class AIEngine:
             game_state: Aktueller Spielzustand
             difficulty: 'einfach', 'mittel', oder 'stark'
             player_id: Spieler-ID (1 oder 2)
+            control: Optionales SearchControl (Fortschritt, vorzeitiger Abbruch)
+            time_limit_ms: Bedenkzeit in ms (Vorrang vor Uhr und time_limits_ms)
         """
+        # Die Hintergrundsuche teilt sich den Baum mit get_move
+        self.stop_pondering()
+        
+        # Zeitbudget: explizit, aus der Partieuhr oder je Schwierigkeit
+        if time_limit_ms is None:
+            if self.clock is not None:
+                time_limit_ms = self.clock.budget_ms()
+            else:
+                time_limit_ms = self.time_limits_ms.get(difficulty)
+        if time_limit_ms is not None and control is None:
+            control = SearchControl()
+        
+        if self.clock is not None:
+            self.clock.start_move()
+        try:
+            return self._search(game_state, difficulty, player_id, control, time_limit_ms)
+        finally:
+            if self.clock is not None:
+                self.clock.end_move()
+    
+    def _search(self, game_state, difficulty, player_id, control, time_limit_ms):
         # Verwende AlphaZero wenn verfügbar
         if self.alphazero_engine is not None:
             try:
-                move = self.alphazero_engine.get_move(game_state, difficulty, player_id)
+                move = self.alphazero_engine.get_move(game_state, difficulty, player_id, control, time_limit_ms)
                 if move:
                     return move
             except Exception as e:
                 print(f"Fehler bei AlphaZero-Zugberechnung: {e}. Verwende Fallback.")
         
         # Fallback: Einfaches MCTS
-        return self._get_move_fallback(game_state, difficulty, player_id)
+        if time_limit_ms is not None:
+            control.set_time_limit(time_limit_ms)
+        return self._get_move_fallback(game_state, difficulty, player_id, control)
     
-    def _get_move_fallback(self, game_state, difficulty, player_id):
+    def _get_move_fallback(self, game_state, difficulty, player_id, control=None):
         """Fallback-Methode mit einfachem MCTS."""
         # 1. Konfiguriere Parameter basierend auf Schwierigkeit
         iterations = 50   # Einfach
@@ -109,13 +202,23 @@ class AIEngine:
         elif difficulty == "stark":
             iterations = 1000
             depth_max = 25
+        
+        # Zeitbegrenzte Suche: Iterationen laufen bis zum Ablauf des Budgets
+        if control is not None and control.deadline is not None:
+            iterations = FALLBACK_MAX_ITERATIONS
 
         print(f"KI ({difficulty}) startet MCTS mit {iterations} Iterationen...")
 
         # 2. Führe MCTS aus
-        return self.run_mcts(game_state, iterations, depth_max, player_id)
+        start = time.perf_counter()
+        move = self.run_mcts(game_state, iterations, depth_max, player_id, control)
+        if control is not None:
+            elapsed = time.perf_counter() - start
+            print(f"   {control.simulations} Iterationen in {elapsed:.2f}s "
+                  f"({control.simulations / max(elapsed, 1e-9):.0f}/s)")
+        return move
 
-    def run_mcts(self, root_game, iterations, depth_max, pid):
+    def run_mcts(self, root_game, iterations, depth_max, pid, control=None):
         """Einfaches MCTS als Fallback."""
         # On travaille sur une copie de la matrice pour aller vite
         root_matrix = root_game.board
@@ -126,7 +229,11 @@ class AIEngine:
         if not root_node.untried_moves: return None
 
         # Boucle principale MCTS
-        for _ in range(iterations):
+        if control is not None:
+            control.report(0, total=iterations)
+        for i in range(iterations):
+            if control is not None and control.stop_requested:
+                break
             node = root_node
             # Copie nécessaire pour descendre dans l'arbre sans casser la racine
             # (Note: ici on simplifie, idéalement on stocke l'état dans le noeud)
@@ -179,6 +286,9 @@ class AIEngine:
                 node.update(result)
                 node = node.parent
 
+            if control is not None and root_node.children:
+                control.report(i + 1, best_move=max(root_node.children, key=lambda c: c.visits).move)
+
         # Choisir le coup le plus visité
         if not root_node.children:
              # Fallback si pas d'enfants (ex: itérations trop faibles)
@@ -1,99 +1,121 @@
 # alphazero_engine.py - Korrigierte Version
 import math
 import random
+import time
 import torch
 import torch.nn.functional as F
 import numpy as np
 from game_logic import GameState
 from config import ROWS, COLS
-from neural_network import AlphaZeroNet, encode_board_state, get_move_probabilities, create_move_index_map
+from neural_network import (AlphaZeroNet, BatchEncoder, encode_board_state, legal_actions, action_priors,
+                            legal_action_masks, NUM_ACTIONS)
+from transposition import TranspositionTable, TTEntry, EvaluationCache
+from mcts_arrays import ArrayMCTS
+from model_export import frozen_path, is_current, load_frozen
+from quantization import INFERENCE_MODES, load_quantized, quantized_path
+from search_control import SearchControl
 import os
+import sys
 
 class AlphaZeroMCTSNode:
-    """MCTS-Knoten für AlphaZero mit neuronaler Netzwerk-Bewertung."""
+    """
+    MCTS-Knoten für AlphaZero mit neuronaler Netzwerk-Bewertung.
     
-    def __init__(self, game_state, parent=None, move=None, prior=0.0):
-        self.game_state = game_state
+    Kindknoten speichern zunächst nur Zug und Prior. Ihr Spielzustand (und
+    damit der Eintrag in der Transpositionstabelle) wird erst erzeugt, wenn
+    die Selektion das erste Mal in den Knoten hinabsteigt.
+    """
+    
+    __slots__ = ('_game_state', 'parent', 'move', 'children', '_stats', 'prior', 'untried_moves', '_tt')
+    
+    def __init__(self, game_state, parent=None, move=None, prior=0.0, stats=None, tt=None):
+        self._game_state = game_state  # None = noch nicht materialisiert
         self.parent = parent
         self.move = move
         self.children = []
         
-        # MCTS-Statistiken
-        self.visit_count = 0
-        self.value_sum = 0.0
+        # MCTS-Statistiken (bei Transpositionen mit anderen Knoten geteilt)
+        self._stats = stats
+        self._tt = tt
         self.prior = prior  # Prior-Wahrscheinlichkeit vom neuronalen Netzwerk
         
         # Gültige Züge (lazy loading)
         self.untried_moves = None
     
+    def is_materialized(self):
+        return self._game_state is not None
+    
+    def _materialize(self):
+        """Erzeugt Spielzustand und Statistik beim ersten Zugriff."""
+        if self._game_state is None:
+            self._game_state = self.parent.game_state.apply_move(self.move)
+        if self._stats is None:
+            if self._tt is not None:
+                self._stats = self._tt.get_or_create(self._game_state.key)
+            else:
+                self._stats = TTEntry()
+    
+    @property
+    def game_state(self):
+        if self._game_state is None:
+            self._materialize()
+        return self._game_state
+    
+    @property
+    def stats(self):
+        if self._stats is None:
+            self._materialize()
+        return self._stats
+    
+    @property
+    def visit_count(self):
+        # Nicht materialisierte Kinder wurden noch nie besucht
+        return self._stats.visit_count if self._stats is not None else 0
+    
+    @visit_count.setter
+    def visit_count(self, value):
+        self.stats.visit_count = value
+    
+    @property
+    def value_sum(self):
+        return self._stats.value_sum if self._stats is not None else 0.0
+    
+    @value_sum.setter
+    def value_sum(self, value):
+        self.stats.value_sum = value
+    
+    def _add_child(self, move, prior, tt, lazy):
+        """Hängt einen Kindknoten an; mit Transpositionstabelle teilt er die Statistik seiner Stellung."""
+        if lazy:
+            self.children.append(AlphaZeroMCTSNode(None, parent=self, move=move, prior=prior, tt=tt))
+            return
+        try:
+            new_state = self.game_state.apply_move(move)
+            stats = tt.get_or_create(new_state.key) if tt is not None else None
+            self.children.append(AlphaZeroMCTSNode(new_state, parent=self, move=move, prior=prior, stats=stats, tt=tt))
+        except Exception as e:
+            # Debug: Zeige Fehler
+            #print(f"⚠️  Fehler bei expand() für {move}: {e}")
+            import traceback
+            traceback.print_exc()
+    
     def is_expanded(self):
         """Prüft, ob der Knoten bereits erweitert wurde."""
         return self.untried_moves is not None
     
-    def expand(self, valid_moves, move_priors):
-        """Erweitert den Knoten mit allen gültigen Zügen."""
-        self.untried_moves = valid_moves.copy()
-        
-        if not valid_moves:
-            return
+    def expand(self, moves, priors, tt=None, lazy=True):
+        """
+        Erweitert den Knoten mit allen gültigen Zügen.
         
-        for move in valid_moves:
-            # Für Place-Moves: Erstelle Kinder für beide Orientierungen
-            if move['type'] == 'place' and 'orientation' not in move:
-                # Erstelle beide Orientierungen
-                for orientation in ['vertikal', 'horizontal']:
-                    move_with_orientation = move.copy()
-                    move_with_orientation['orientation'] = orientation
-                    
-                    # Erstelle Move-String
-                    move_str = f"place_{move['pos'][0]}_{move['pos'][1]}_{move['stone_type']}_{orientation}"
-                    
-                    # Hole Prior vom neuronalen Netzwerk
-                    prior = move_priors.get(move_str, 0.001)
-                    
-                    # Erstelle neuen Spielzustand
-                    try:
-                        new_state = self.game_state.apply_move(move_with_orientation)
-                        
-                        # Erstelle Kindknoten
-                        child = AlphaZeroMCTSNode(new_state, parent=self, move=move_with_orientation, prior=prior)
-                        self.children.append(child)
-                    except Exception as e:
-                        # Debug: Zeige Fehler
-                        #print(f"⚠️  Fehler bei expand() für {move_str}: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
-            else:
-                # Für Move- und Pfarrer-Moves: Normal verarbeiten
-                if move['type'] == 'place':
-                    orientation = move.get('orientation', 'vertikal')
-                    move_str = f"place_{move['pos'][0]}_{move['pos'][1]}_{move['stone_type']}_{orientation}"
-                elif move['type'] == 'move':
-                    move_str = f"move_{move['from'][0]}_{move['from'][1]}_{move['to'][0]}_{move['to'][1]}"
-                elif move['type'] == 'pfarrer':
-                    move_str = f"pfarrer_{move['from'][0]}_{move['from'][1]}"
-                else:
-                    move_str = None
-                
-                if move_str is None:
-                    prior = 0.001  # Fallback
-                else:
-                    prior = move_priors.get(move_str, 0.001)
-                
-                # Erstelle neuen Spielzustand
-                try:
-                    new_state = self.game_state.apply_move(move)
-                    
-                    # Erstelle Kindknoten
-                    child = AlphaZeroMCTSNode(new_state, parent=self, move=move, prior=prior)
-                    self.children.append(child)
-                except Exception as e:
-                    # Debug: Zeige Fehler
-                   # print(f"⚠️  Fehler bei expand() für {move_str}: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    continue
+        Args:
+            moves: Konkrete Züge (siehe legal_actions), einer pro Kind
+            priors: Prior-Wahrscheinlichkeiten als Array, ausgerichtet an moves
+            lazy: Spielzustände der Kinder erst bei Bedarf erzeugen, sonst
+                sofort (ein apply_move pro Kind)
+        """
+        self.untried_moves = list(moves)
+        for move, prior in zip(moves, np.asarray(priors).tolist()):
+            self._add_child(move, prior, tt, lazy)
     
     def ucb_score(self, c_puct=5.0):
         """
@@ -132,54 +154,241 @@ class AlphaZeroMCTSNode:
         return self.value_sum / self.visit_count
 
 
+def _deep_sizeof(obj, seen=None):
+    """Rekursive Größe eines Objekts in Bytes (für Speicherberichte)."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_deep_sizeof(x, seen) for x in obj)
+    elif hasattr(obj, '__dict__'):
+        size += _deep_sizeof(obj.__dict__, seen)
+    return size
+
+
+def tree_memory_stats(root):
+    """
+    Zählt die Knoten eines Suchbaums und schätzt ihren Speicherbedarf.
+    
+    Returns:
+        Dictionary mit Knotenzahl, materialisierten Zuständen und geschätzten Bytes
+    """
+    state_bytes = _deep_sizeof(root.game_state)
+    nodes = 0
+    materialized = 0
+    node_bytes = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        node_bytes += sys.getsizeof(node) + sys.getsizeof(node.children) + sys.getsizeof(node.move or {})
+        if node.is_materialized():
+            materialized += 1
+        stack.extend(node.children)
+    total = node_bytes + materialized * state_bytes
+    return {
+        'nodes': nodes,
+        'materialized': materialized,
+        'bytes': total,
+        'bytes_per_node': total / nodes if nodes else 0.0,
+    }
+
+
 class AlphaZeroEngine:
     """AlphaZero KI-Engine mit neuronalem Netzwerk."""
     
-    def __init__(self, model_path=None, device='cpu'):
+    def __init__(self, model_path=None, device='cpu', use_transpositions=True,
+                 tt_max_index_entries=200000, tt_max_index_mb=256, tt_replacement='lru',
+                 lazy_children=True, batch_sizes=None, virtual_loss=1.0, eval_cache_size=100000,
+                 tree_storage='nodes', reuse_tree=True, ponder_factor=4, max_simulations=20000,
+                 inference_client=None, use_frozen=True, inference_modes=None, model=None):
         """
         Initialisiert die AlphaZero-Engine.
         
         Args:
             model_path: Pfad zum trainierten Modell (optional)
             device: 'cpu' oder 'cuda'
+            use_transpositions: Statistiken und Netzwerk-Ausgaben gleicher Stellungen teilen
+            tt_max_index_entries: Maximale Einträge im Index der Transpositionstabelle
+            tt_max_index_mb: Limit (geschätzt) für die Einträge im Index; Knoten im
+                Baum halten verdrängte Einträge weiter (siehe TranspositionTable)
+            tt_replacement: Ersetzungsstrategie ('lru' oder 'visits')
+            lazy_children: Spielzustände der Kinder erst beim ersten Besuch erzeugen
+            batch_sizes: Blätter pro Netzwerk-Auswertung je Schwierigkeit (1 = ohne Batching)
+            virtual_loss: Virtueller Verlust, der gesammelte Pfade im Baum auseinanderzieht
+            eval_cache_size: Größe des LRU-Caches für Netzwerk-Auswertungen (0 = aus)
+            tree_storage: 'nodes' (AlphaZeroMCTSNode-Objekte) oder 'arrays' (ArrayTree)
+            reuse_tree: Teilbaum der letzten Suche weiterverwenden (nur 'nodes')
+            ponder_factor: Pondering endet spätestens bei ponder_factor x Simulationsbudget
+            max_simulations: Obergrenze der Simulationen bei zeitbegrenzter Suche
+            inference_client: Optionaler InferenceClient; Forward-Passes laufen
+                dann im zentralen InferenceServer, und die Engine baut kein
+                eigenes Modell (self.model ist None)
+            use_frozen: Eingefrorenes Inferenz-Artefakt zu model_path verwenden,
+                wenn es existiert und aktuell ist (siehe model_export.py)
+            inference_modes: Inferenz-Modus je Schwierigkeit ('float' oder
+                'int8'); 'int8' nutzt das Int8-Artefakt zu model_path (nur CPU,
+                siehe quantization.py) und sonst das Float-Modell
+            model: Vorhandenes AlphaZeroNet, das die Engine verwendet statt
+                ein eigenes zu bauen oder zu laden (z.B. geteilt im Lock-Step-Selbstspiel)
         """
         self.device = torch.device(device if torch.cuda.is_available() else 'cpu')
         
-        # Lade oder erstelle Modell
-        self.model = AlphaZeroNet().to(self.device)
-        
+        # Modell: mit InferenceServer liegt das einzige Modell im Server. Mit aktuellem
+        # Inferenz-Artefakt (BatchNorm gefaltet, Köpfe fusioniert) wird nur dieses geladen;
+        # das eager AlphaZeroNet entsteht dann erst beim ersten Zugriff auf self.model
+        # (save_model, Training).
+        self._model = model
+        self._lazy_model_path = None
+        self.use_frozen = use_frozen
+        self.inference_model = None
+        if model is None and inference_client is None:
+            if use_frozen and model_path and self._load_frozen(model_path):
+                self._lazy_model_path = model_path
+            else:
+                self._model = self._build_model(model_path)
+        
+        # Int8-Modell für Schwierigkeiten mit inference_modes[...] == 'int8'
+        self.inference_modes = dict(inference_modes or {})
+        for mode in self.inference_modes.values():
+            if mode not in INFERENCE_MODES:
+                raise ValueError(f"Unbekannter Inferenz-Modus: {mode}")
+        self.inference_mode = 'float'
+        self.quantized_model = None
+        if 'int8' in self.inference_modes.values() and model_path and inference_client is None:
+            self._load_quantized(model_path)
+        
+        # Transpositionstabelle (macht aus dem Suchbaum einen DAG)
+        self.tt = None
+        if use_transpositions:
+            self.tt = TranspositionTable(max_index_entries=tt_max_index_entries, max_index_mb=tt_max_index_mb,
+                                         replacement=tt_replacement)
+        self.network_calls = 0
+        self.lazy_children = lazy_children
+        self.inference_client = inference_client
+        
+        # Batch-Auswertung der Blätter
+        self.batch_sizes = {'einfach': 4, 'mittel': 8, 'stark': 16}
+        if batch_sizes:
+            self.batch_sizes.update(batch_sizes)
+        self.virtual_loss = virtual_loss
+        self.batch_encoder = BatchEncoder(max(self.batch_sizes.values()), pin_memory=self.device.type == 'cuda')
+        
+        # Netzwerk-Auswertungen bleiben über alle Züge einer Partie erhalten
+        self.eval_cache = EvaluationCache(eval_cache_size) if eval_cache_size else None
+        
+        if tree_storage not in ('nodes', 'arrays'):
+            raise ValueError(f"Unbekannte Baumdarstellung: {tree_storage}")
+        self.tree_storage = tree_storage
+        
+        # Wurzel der letzten Suche (für Baum-Wiederverwendung)
+        self.reuse_tree = reuse_tree
+        self._last_root = None
+        self.ponder_factor = ponder_factor
+        self.max_simulations = max_simulations
+    
+    @property
+    def model(self):
+        """Eager AlphaZeroNet; neben einem Inferenz-Artefakt erst bei Bedarf gebaut und geladen."""
+        if self._model is None and self._lazy_model_path is not None:
+            self._model = self._build_model(self._lazy_model_path)
+            self._lazy_model_path = None
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._lazy_model_path = None
+    
+    def _build_model(self, model_path):
+        """Baut AlphaZeroNet und lädt die Gewichte von model_path (sonst zufällig initialisiert)."""
+        model = AlphaZeroNet().to(self.device)
         if model_path and os.path.exists(model_path):
             try:
                 print(f"Versuche Modell zu laden: {model_path}")
-                self.model.load_state_dict(torch.load(model_path, map_location=self.device))
-                self.model.eval()
+                model.load_state_dict(torch.load(model_path, map_location=self.device))
+                model.eval()
                 print(f"✅ Modell geladen von {model_path}")
             except Exception as e:
                 print(f"⚠️  Konnte Modell nicht laden: {e}")
                 print("Verwende zufällig initialisiertes Modell.")
-                self.model.train()  # Im Trainingsmodus für Training
+                model.train()  # Im Trainingsmodus für Training
         else:
             if model_path:
                 print(f"⚠️  Modell-Pfad existiert nicht: {model_path}")
             print("Verwende zufällig initialisiertes Modell.")
-            self.model.train()  # Im Trainingsmodus für Training
-        
-        # Move-Index-Mapping
-        self.move_index_map = create_move_index_map()
+            model.train()  # Im Trainingsmodus für Training
+        return model
+    
+    def new_game(self):
+        """Beginnt eine neue Partie: leert Auswertungs-Cache, Transpositionstabelle und alten Baum."""
+        if self.eval_cache is not None:
+            self.eval_cache.clear()
+        self._last_root = None
+        self.new_search()
     
-    def get_move(self, game_state, difficulty, player_id):
+    def new_search(self, keep_tt=False):
+        """Setzt Transpositionstabelle und Zähler vor einer neuen Suche zurück."""
+        if self.tt is not None and not keep_tt:
+            self.tt.clear()
+        self.network_calls = 0
+    
+    def find_reusable_root(self, game_state, max_depth=2):
         """
-        Berechnet den besten Zug für die gegebene Schwierigkeit.
+        Sucht im Baum der letzten Suche den Knoten zur Stellung game_state.
         
-        Args:
-            game_state: Aktueller Spielzustand
-            difficulty: 'einfach', 'mittel', oder 'stark'
-            player_id: Spieler-ID (1 oder 2)
+        Tiefe 1 ist der eigene Zug, Tiefe 2 die Antwort des Gegners. Nur bereits
+        materialisierte Knoten kommen in Frage, alle anderen wurden nie besucht.
         
         Returns:
-            move: Besten Zug als Dictionary
+            Passender Knoten oder None
         """
-        # Konfiguriere Parameter basierend auf Schwierigkeit
+        if self._last_root is None:
+            return None
+        frontier = [self._last_root]
+        for _ in range(max_depth + 1):
+            next_frontier = []
+            for node in frontier:
+                if not node.is_materialized():
+                    continue
+                if node.game_state.key == game_state.key:
+                    return node
+                next_frontier.extend(node.children)
+            frontier = next_frontier
+        return None
+    
+    def prepare_root(self, game_state, player_id):
+        """
+        Liefert die erweiterte Wurzel für eine Suche ab game_state.
+        
+        Passt ein Knoten aus der letzten Suche, wird er mit seinen Besuchszahlen
+        zur neuen Wurzel; der Rest des alten Baums wird verworfen. Die
+        Transpositionstabelle bleibt dann erhalten, weil der Teilbaum ihre
+        Einträge weiter benutzt.
+        """
+        root = self.find_reusable_root(game_state) if self.reuse_tree else None
+        if root is not None:
+            root.parent = None
+            self.new_search(keep_tt=True)
+        else:
+            self.new_search()
+            root = self.create_root(game_state)
+        self._last_root = root
+        self._expand_node(root, player_id)
+        return root
+    
+    def create_root(self, game_state):
+        """Erstellt den Wurzelknoten einer Suche."""
+        stats = self.tt.get_or_create(game_state.key) if self.tt is not None else None
+        return AlphaZeroMCTSNode(game_state, stats=stats, tt=self.tt)
+    
+    def _search_settings(self, difficulty):
+        """Liefert (Simulationen, c_puct, Temperatur) für eine Schwierigkeit."""
         if difficulty == "einfach":
             num_simulations = 25
             c_puct = 1.0
@@ -196,44 +405,144 @@ class AlphaZeroEngine:
             num_simulations = 100
             c_puct = 2.0
             temperature = 0.5
+        return num_simulations, c_puct, temperature
+    
+    def get_move(self, game_state, difficulty, player_id, control=None, time_limit_ms=None):
+        """
+        Berechnet den besten Zug für die gegebene Schwierigkeit.
         
-        print(f"AlphaZero ({difficulty}): {num_simulations} Simulationen, c_puct={c_puct}, temp={temperature}")
+        Args:
+            game_state: Aktueller Spielzustand
+            difficulty: 'einfach', 'mittel', oder 'stark'
+            player_id: Spieler-ID (1 oder 2)
+            control: Optionales SearchControl für Fortschritt und Abbruch
+            time_limit_ms: Bedenkzeit in ms; statt der festen Simulationszahl
+                wird bis zum Ablauf gesucht (höchstens max_simulations)
         
-        # Führe AlphaZero-MCTS aus
-        root = AlphaZeroMCTSNode(game_state)
-        root.untried_moves = game_state.get_valid_moves(player_id)
+        Returns:
+            move: Besten Zug als Dictionary
+        """
+        # Konfiguriere Parameter basierend auf Schwierigkeit
+        num_simulations, c_puct, temperature = self._search_settings(difficulty)
+        self._select_inference(difficulty)
+        
+        if time_limit_ms is not None:
+            if control is None:
+                control = SearchControl()
+            control.set_time_limit(time_limit_ms)
+            num_simulations = self.max_simulations
+        
+        # Der Array-Baum wertet Blätter einzeln aus
+        batch_size = self.batch_sizes.get(difficulty, 1) if self.tree_storage == 'nodes' else 1
+        
+        budget = f"{time_limit_ms:.0f} ms" if time_limit_ms is not None else f"{num_simulations} Simulationen"
+        print(f"AlphaZero ({difficulty}): {budget}, c_puct={c_puct}, temp={temperature}, batch={batch_size}, "
+              f"{self.inference_mode}")
+        start = time.perf_counter()
+        
+        valid_moves = game_state.get_valid_moves(player_id)
         
-        if not root.untried_moves:
+        if not valid_moves:
             return None
         
-        # Erweitere Root-Knoten mit neuronaler Netzwerk-Bewertung
-        self._expand_node(root, player_id)
+        if self.tree_storage == 'arrays':
+            self.new_search()
+            # Array-Baum: Wurzelkinder als (Züge, Besuchszahlen)
+            search = ArrayMCTS(self)
+            moves, visit_counts = search.search(game_state, player_id, num_simulations, c_puct, control)
+            print(f"   Array-Baum: {search.tree.size} Knoten, ~{search.tree.memory_bytes() / 1024:.0f} KB")
+            if search.tree.size:
+                self._report_rate(int(search.tree.visit_count[0]), time.perf_counter() - start)
+            return self._choose_move(moves, visit_counts, valid_moves, difficulty, temperature)
+        
+        # Wurzel (ggf. aus dem letzten Baum) mit neuronaler Netzwerk-Bewertung erweitern
+        root = self.prepare_root(game_state, player_id)
+        reused = root.visit_count
+        if reused:
+            print(f"   Baum wiederverwendet: {reused} Besuche, {sum(c.visit_count for c in root.children)} in Kindern")
+        
+        # MCTS-Simulationen: bereits vorhandene Besuche zählen zum Budget
+        remaining = max(0, num_simulations - reused)
+        if control is not None:
+            control.report(0, total=remaining)
+        done = self.run_simulations(root, player_id, remaining, c_puct, batch_size, control)
+        self._report_rate(done, time.perf_counter() - start)
+        
+        if self.tt is not None:
+            tt_stats = self.tt.stats()
+            print(f"   Netzwerk-Aufrufe: {self.network_calls} | TT: {tt_stats['entries']} Einträge, "
+                  f"Trefferquote {tt_stats['hit_rate']:.1%}")
+            if tt_stats['evictions']:
+                print(f"   TT-Index: {tt_stats['evictions']} verdrängt, {tt_stats['splits']} Stellungen "
+                      f"mit aufgeteilter Statistik")
+        if self.eval_cache is not None:
+            cache_stats = self.eval_cache.stats()
+            print(f"   Auswertungs-Cache: {cache_stats['entries']} Einträge, "
+                  f"Trefferquote {cache_stats['hit_rate']:.1%}")
+        mem = tree_memory_stats(root)
+        print(f"   Baum: {mem['nodes']} Knoten, {mem['materialized']} Zustände, "
+              f"~{mem['bytes'] / 1024:.0f} KB ({mem['bytes_per_node']:.0f} B/Knoten)")
+        
+        moves = [c.move for c in root.children]
+        visit_counts = [c.visit_count for c in root.children]
+        return self._choose_move(moves, visit_counts, valid_moves, difficulty, temperature)
+    
+    @staticmethod
+    def _report_rate(simulations, elapsed):
+        """Gibt Simulationen pro Sekunde einer Suche aus."""
+        rate = simulations / elapsed if elapsed > 0 else 0.0
+        print(f"   {simulations} Simulationen in {elapsed:.2f}s ({rate:.0f}/s)")
+    
+    def ponder(self, game_state, difficulty, stop_event):
+        """
+        Sucht weiter, während der Gegner in game_state am Zug ist (Pondering).
         
-        # MCTS-Simulationen
-        for _ in range(num_simulations):
-            self._simulate(root, player_id, c_puct)
+        Läuft, bis stop_event gesetzt ist oder die Wurzel ponder_factor x das
+        Simulationsbudget an Besuchen hat. Der Baum bleibt als letzte Suche
+        stehen; get_move() übernimmt nach dem Gegenzug den passenden Teilbaum
+        und führt nur noch das restliche Budget aus.
         
+        Returns:
+            Anzahl der ausgeführten Simulationen
+        """
+        if self.tree_storage != 'nodes' or not self.reuse_tree or game_state.game_over:
+            return 0
+        player = game_state.turn
+        if not game_state.get_valid_moves(player):
+            return 0
+        
+        num_simulations, c_puct, _ = self._search_settings(difficulty)
+        self._select_inference(difficulty)
+        batch_size = self.batch_sizes.get(difficulty, 1)
+        limit = num_simulations * self.ponder_factor
+        
+        root = self.prepare_root(game_state, player)
+        done = 0
+        while not stop_event.is_set() and root.visit_count < limit:
+            done += self.run_simulations(root, player, batch_size, c_puct, batch_size)
+        return done
+    
+    def _choose_move(self, moves, visit_counts, valid_moves, difficulty, temperature):
+        """Wählt den Zug aus den Besuchszahlen der Wurzelkinder."""
         # Wähle besten Zug basierend auf Besuchszahlen
-        if not root.children:
+        if not moves:
             # Fallback: Zufälliger Zug
-            move = random.choice(root.untried_moves)
+            move = random.choice(valid_moves)
             if move['type'] == 'place' and 'orientation' not in move:
                 move['orientation'] = random.choice(['vertikal', 'horizontal'])
             return move
         
         # Wähle Zug basierend auf Besuchszahlen und Temperatur
-        visit_counts = [c.visit_count for c in root.children]
-        
         if temperature == 0.0 or difficulty == "stark":
             # Deterministisch: Wähle meistbesuchten Zug
             best_idx = np.argmax(visit_counts)
-            best_move = root.children[best_idx].move
+            best_move = moves[best_idx]
         else:
             # Stochastisch: Sample basierend auf Besuchszahlen
             visit_probs = np.array(visit_counts) ** (1.0 / temperature)
             visit_probs = visit_probs / visit_probs.sum()
-            best_idx = np.random.choice(len(root.children), p=visit_probs)
-            best_move = root.children[best_idx].move
+            best_idx = np.random.choice(len(moves), p=visit_probs)
+            best_move = moves[best_idx]
         
         # Stelle sicher, dass Orientierung vorhanden ist
         if best_move['type'] == 'place' and 'orientation' not in best_move:
@@ -241,46 +550,117 @@ class AlphaZeroEngine:
         
         return best_move
     
-    def _expand_node(self, node, player_id):
-        """Erweitert einen Knoten mit neuronaler Netzwerk-Bewertung."""
+    def _expand_node(self, node, player_id, policy_logits=None, value=None, legal=None):
+        """
+        Erweitert einen Knoten mit neuronaler Netzwerk-Bewertung.
+        
+        Args:
+            policy_logits, value: Bereits berechnete Netzwerk-Ausgaben (z.B. aus
+                einer Batch-Auswertung); sonst wird _evaluate() verwendet
+            legal: Bereits berechnete (Züge, Aktions-IDs) des Knotens
+        """
         if node.is_expanded():
             return
         
         try:
-            # Kodiere Spielzustand
-            state_tensor = encode_board_state(node.game_state, player_id).to(self.device)
-            
-            # Forward pass durch neuronales Netzwerk
-            with torch.no_grad():
-                policy_logits, value = self.model(state_tensor.unsqueeze(0))  # Batch-Dimension hinzufügen
-            
-            # Konvertiere Policy zu Wahrscheinlichkeiten für gültige Züge
-            valid_moves = node.game_state.get_valid_moves(player_id)
-            move_priors = get_move_probabilities(policy_logits, valid_moves, self.move_index_map)
-            
-            # Debug: Zeige was expand() erhält
-            #print(f"🔍 DEBUG _expand_node: valid_moves={len(valid_moves)}, move_priors={len(move_priors)}")
-            if len(valid_moves) > 0 and len(move_priors) == 0:
-                print(f"⚠️  WARNUNG: move_priors ist leer! valid_moves={len(valid_moves)}")
-                # Zeige ersten valid_move
-                if valid_moves:
-                    print(f"🔍 Erster valid_move: {valid_moves[0]}")
+            if legal is None:
+                legal = legal_actions(node.game_state.get_valid_moves(player_id))
+            moves, action_ids = legal
+            priors, _ = self._evaluate(node, player_id, action_ids, policy_logits, value)
             
             # Erweitere Knoten
-            node.expand(valid_moves, move_priors)
+            node.expand(moves, priors, self.tt, lazy=self.lazy_children)
             
-            # Debug: Prüfe ob Kinder erstellt wurden
-            #print(f"🔍 DEBUG _expand_node: Nach expand() - node.children={len(node.children)}")
-            if len(node.children) == 0 and len(valid_moves) > 0:
-                print(f"⚠️  WARNUNG: Keine Kinder nach expand()! valid_moves={len(valid_moves)}, move_priors={len(move_priors)}")
-                if move_priors:
-                    print(f"🔍 Erste 3 move_priors keys: {list(move_priors.keys())[:3]}")
+            if len(node.children) == 0 and len(moves) > 0:
+                print(f"⚠️  WARNUNG: Keine Kinder nach expand()! Züge={len(moves)}, Priors={len(priors)}")
         except Exception as e:
             print(f"⚠️  Fehler in _expand_node: {e}")
             import traceback
             traceback.print_exc()
             raise
     
+    def _evaluate(self, node, player, action_ids=None, policy_logits=None, value=None):
+        """
+        Liefert (priors, value) eines Knotens mit höchstens einem Forward-Pass.
+        
+        Reihenfolge: Statistik des Knotens (Transposition), Auswertungs-Cache,
+        übergebene Netzwerk-Ausgaben, sonst ein eigener Netzwerk-Aufruf. Das
+        Ergebnis wird im Knoten und im Cache abgelegt. Ohne action_ids werden
+        die Züge des bereits erweiterten Knotens verwendet.
+        """
+        stats = node.stats
+        if stats.move_priors is not None and stats.value is not None and stats.value_player == player:
+            return stats.move_priors, stats.value
+        
+        if action_ids is None:
+            _, action_ids = legal_actions(node.untried_moves)
+        priors, value = self.evaluate_state(node.game_state, player, action_ids, policy_logits, value)
+        
+        old_bytes = stats.memory_bytes()
+        stats.move_priors = priors
+        stats.value = value
+        stats.value_player = player
+        if self.tt is not None:
+            self.tt.account(stats, old_bytes)
+        return priors, value
+    
+    def evaluate_state(self, game_state, player, action_ids, policy_logits=None, value=None, encoder=None):
+        """
+        (priors, value) einer Stellung über Auswertungs-Cache oder einen Forward-Pass.
+        
+        Args:
+            action_ids: Aktions-IDs der gültigen Züge (siehe legal_actions);
+                die Priors sind daran ausgerichtet
+            encoder: Optionaler IncrementalEncoder, der bereits auf game_state steht
+        """
+        cache_key = (game_state.key, player)
+        cached = self.eval_cache.get(cache_key) if self.eval_cache is not None else None
+        if cached is not None:
+            return cached
+        
+        if policy_logits is None:
+            # Kodiere Spielzustand
+            if encoder is not None:
+                state_tensor = encoder.encode(player).to(self.device)
+            else:
+                state_tensor = encode_board_state(game_state, player).to(self.device)
+            
+            # Maske der gültigen Aktionen (ein Scatter)
+            legal_mask = torch.zeros(1, NUM_ACTIONS, dtype=torch.bool)
+            legal_mask[0, torch.from_numpy(np.asarray(action_ids, dtype=np.int64))] = True
+            
+            # Forward pass durch neuronales Netzwerk (maskierte Log-Softmax)
+            policy_logits, value = self._forward(state_tensor.unsqueeze(0), legal_mask)
+            self.network_calls += 1
+            value = value.item()
+        
+        # Priors der gültigen Züge mit einem Gather (auch für maskierte Log-Wahrscheinlichkeiten)
+        priors = action_priors(policy_logits, action_ids)
+        if self.eval_cache is not None:
+            self.eval_cache.put(cache_key, (priors, value))
+        return priors, value
+    
+    def run_simulations(self, root, player_id, num_simulations, c_puct, batch_size=1, control=None):
+        """
+        Führt num_simulations Simulationen aus, bei batch_size > 1 mit Batch-Auswertung.
+        
+        Mit control (SearchControl) wird nach jedem Batch der Fortschritt
+        gemeldet und ein vorzeitiger Abbruch berücksichtigt.
+        """
+        done = 0
+        while done < num_simulations:
+            if control is not None and control.stop_requested:
+                break
+            if batch_size > 1:
+                done += self._simulate_batch(root, player_id, c_puct, min(batch_size, num_simulations - done))
+            else:
+                self._simulate(root, player_id, c_puct)
+                done += 1
+            if control is not None and root.children:
+                best = max(root.children, key=lambda c: c.visit_count)
+                control.report(done, best_move=best.move)
+        return done
+    
     def _simulate(self, root, player_id, c_puct):
         """
         Führt eine MCTS-Simulation durch.
@@ -290,30 +670,208 @@ class AlphaZeroEngine:
             player_id: Spieler-ID (Perspektive des Wurzelknotens)
             c_puct: Exploration-Konstante
         """
+        node, current_player = self._select_leaf(root, player_id, c_puct)
+        self._finish_simulation(node, current_player)
+    
+    def _simulate_batch(self, root, player_id, c_puct, batch_size):
+        """
+        Führt batch_size Simulationen mit einer gemeinsamen Netzwerk-Auswertung durch.
+        
+        Die Blätter werden nacheinander ausgewählt; ein virtueller Verlust auf
+        jedem gewählten Pfad sorgt dafür, dass die folgenden Pfade andere
+        Blätter erreichen. Alle neuen Blätter werden in einem Batch bewertet,
+        danach wird der virtuelle Verlust entfernt und normal propagiert.
+        
+        Returns:
+            Anzahl durchgeführter Simulationen
+        """
+        pending = self._collect_leaves(root, player_id, c_puct, batch_size)
+        if pending:
+            batch_leaves = [(leaf, player) for leaf, player, idx in pending if idx is not None]
+            self._finish_leaves(pending, *self._evaluate_batch(batch_leaves))
+        return batch_size
+    
+    def _collect_leaves(self, root, player_id, c_puct, batch_size, offset=0):
+        """
+        Wählt batch_size Blätter mit virtuellem Verlust aus (erste Phase von _simulate_batch).
+        
+        Blätter ohne Netzwerk-Bedarf werden sofort abgeschlossen.
+        
+        Args:
+            offset: Erster Batch-Index (wenn mehrere Bäume einen Batch teilen)
+        
+        Returns:
+            Liste von (Blatt, Spieler, Batch-Index oder None für Duplikate)
+        """
+        pending = []
+        pending_ids = set()
+        
+        for _ in range(batch_size):
+            leaf, current_player = self._select_leaf(root, player_id, c_puct, self.virtual_loss)
+            if id(leaf) in pending_ids or not self._needs_network(leaf, current_player):
+                # Endstellung, Transposition oder schon im Batch: sofort abschließen
+                # (doppelte Blätter verwenden nach der Auswertung die gespeicherten Ausgaben)
+                if id(leaf) in pending_ids:
+                    pending.append((leaf, current_player, None))
+                    continue
+                self._revert_virtual_loss(leaf, self.virtual_loss)
+                self._finish_simulation(leaf, current_player)
+                continue
+            pending_ids.add(id(leaf))
+            pending.append((leaf, current_player, offset + len(pending_ids) - 1))
+        return pending
+    
+    def _finish_leaves(self, pending, policy_logits, values, legal):
+        """Entfernt den virtuellen Verlust und propagiert die Batch-Ausgaben (zweite Phase)."""
+        for leaf, _, _ in pending:
+            self._revert_virtual_loss(leaf, self.virtual_loss)
+        for leaf, current_player, idx in pending:
+            if idx is None:
+                self._finish_simulation(leaf, current_player)
+            else:
+                self._finish_simulation(leaf, current_player, policy_logits[idx:idx + 1], values[idx], legal[idx])
+    
+    def _needs_network(self, node, player):
+        """Prüft, ob ein Blatt eine Netzwerk-Auswertung braucht (keine Endstellung, nicht in TT/Cache)."""
+        if node.game_state.game_over:
+            return False
+        stats = node.stats
+        if stats.move_priors is not None and stats.value is not None and stats.value_player == player:
+            return False
+        if self.eval_cache is not None and (node.game_state.key, player) in self.eval_cache.entries:
+            return False
+        return True
+    
+    def _evaluate_batch(self, leaves):
+        """
+        Bewertet mehrere (Knoten, Spieler)-Paare mit einem Forward-Pass.
+        
+        Returns:
+            (maskierte Log-Policy, Values, (Züge, Aktions-IDs) pro Blatt)
+        """
+        batch = self.batch_encoder.encode([node.game_state for node, _ in leaves], [player for _, player in leaves])
+        batch = batch.to(self.device, non_blocking=self.batch_encoder.pin_memory)
+        legal = [legal_actions(node.game_state.get_valid_moves(player)) for node, player in leaves]
+        legal_mask = torch.from_numpy(legal_action_masks([node.game_state for node, _ in leaves],
+                                                         [player for _, player in leaves],
+                                                         action_ids=[ids for _, ids in legal]))
+        policy_logits, values = self._forward(batch, legal_mask)
+        self.network_calls += 1
+        return policy_logits, values.view(-1).tolist(), legal
+    
+    def _forward(self, batch, legal_mask):
+        """Forward-Pass über das lokale Modell oder den InferenceServer (maskierte Log-Policy, Values)."""
+        if self.inference_client is not None:
+            return self.inference_client.evaluate(batch.cpu(), legal_mask)
+        if self.inference_mode == 'int8':
+            model = self.quantized_model
+        elif self.inference_model is not None:
+            model = self.inference_model
+        else:
+            model = self.model
+        with torch.no_grad():
+            return model(batch, legal_mask.to(self.device))
+    
+    def _load_frozen(self, model_path):
+        """
+        Lädt das Inferenz-Artefakt zu model_path, wenn es existiert und nicht älter als das Modell ist.
+        
+        Returns:
+            True, wenn das Artefakt geladen wurde
+        """
+        self.inference_model = None
+        artifact_path = frozen_path(model_path)
+        if not os.path.exists(model_path) or not is_current(model_path, artifact_path):
+            if os.path.exists(artifact_path):
+                print(f"⚠️  Inferenz-Artefakt passt nicht zu {model_path}, verwende das Modell direkt.")
+            return False
+        try:
+            self.inference_model = load_frozen(artifact_path, self.device)
+            print(f"✅ Inferenz-Artefakt geladen: {artifact_path}")
+            return True
+        except Exception as e:
+            print(f"⚠️  Konnte Inferenz-Artefakt nicht laden: {e}")
+            return False
+    
+    def _load_quantized(self, model_path):
+        """Lädt das Int8-Artefakt zu model_path (nur CPU), wenn es existiert und nicht älter als das Modell ist."""
+        self.quantized_model = None
+        self.inference_mode = 'float'
+        artifact_path = quantized_path(model_path)
+        if self.device.type != 'cpu':
+            print("⚠️  Int8-Inferenz gibt es nur auf der CPU, verwende das Float-Modell.")
+            return
+        if not is_current(model_path, artifact_path):
+            print(f"⚠️  Kein aktuelles Int8-Artefakt zu {model_path} (erzeugen mit: python quantization.py "
+                  f"{model_path}), verwende das Float-Modell.")
+            return
+        try:
+            self.quantized_model = load_quantized(artifact_path)
+            print(f"✅ Int8-Artefakt geladen: {artifact_path}")
+        except Exception as e:
+            print(f"⚠️  Konnte Int8-Artefakt nicht laden: {e}")
+    
+    def _select_inference(self, difficulty):
+        """
+        Stellt das Modell für difficulty ein (siehe inference_modes).
+        
+        Beim Wechsel zwischen Float- und Int8-Modell passen Auswertungs-Cache
+        und alter Baum nicht mehr zum Modell und werden verworfen.
+        """
+        mode = self.inference_modes.get(difficulty, 'float')
+        if mode == 'int8' and self.quantized_model is None:
+            mode = 'float'
+        if mode != self.inference_mode:
+            self.inference_mode = mode
+            self.new_game()
+    
+    def _select_leaf(self, root, player_id, c_puct, virtual_loss=0.0):
+        """
+        1. SELECTION: Wählt den Pfad bis zu einem Blattknoten (Endstellungen werden nicht erweitert).
+        
+        Returns:
+            (Blattknoten, Spieler am Blatt)
+        """
         node = root
         depth = 0
+        if virtual_loss:
+            self._apply_virtual_loss(node, virtual_loss)
         
-        # 1. SELECTION: Wähle Pfad bis zu Blattknoten
-        while node.children and not node.untried_moves:
+        while node.children and not node.game_state.game_over:
             node = node.select_child(c_puct)
             depth += 1
+            if virtual_loss:
+                self._apply_virtual_loss(node, virtual_loss)
         
         # Bestimme aktuellen Spieler basierend auf Tiefe
         # In jedem Zug wechselt der Spieler
         current_player = player_id if depth % 2 == 0 else (1 if player_id == 2 else 2)
-        
+        return node, current_player
+    
+    @staticmethod
+    def _apply_virtual_loss(node, virtual_loss):
+        node.visit_count += 1
+        node.value_sum -= virtual_loss
+    
+    @staticmethod
+    def _revert_virtual_loss(leaf, virtual_loss):
+        node = leaf
+        while node is not None:
+            node.visit_count -= 1
+            node.value_sum += virtual_loss
+            node = node.parent
+    
+    def _finish_simulation(self, node, current_player, policy_logits=None, net_value=None, legal=None):
+        """Expansion, Bewertung und Backpropagation eines ausgewählten Blatts."""
         # 2. EXPANSION: Erweitere Blattknoten falls nötig
-        if node.untried_moves:
-            self._expand_node(node, current_player)
+        # (eine Netzwerk-Auswertung liefert Policy und Value zugleich)
+        if not node.is_expanded() and not node.game_state.game_over:
+            self._expand_node(node, current_player, policy_logits, net_value, legal)
         
         # 3. EVALUATION: Bewerte Position mit neuronalem Netzwerk
         # Verwende immer die Perspektive des aktuellen Spielers
         if node.children:
-            # Verwende Value vom neuronalen Netzwerk
-            state_tensor = encode_board_state(node.game_state, current_player).to(self.device)
-            with torch.no_grad():
-                _, value = self.model(state_tensor.unsqueeze(0))
-            value = value.item()
+            _, value = self._evaluate(node, current_player, None, policy_logits, net_value)
         else:
             # Fallback: Heuristische Bewertung
             value = node.game_state.evaluate_score(node.game_state.board, current_player)
@@ -326,23 +884,23 @@ class AlphaZeroEngine:
         elif node.game_state.check_win(1 if current_player == 2 else 2):
             value = -1.0  # Verlust für aktuellen Spieler
         
-        # 4. BACKPROPAGATION: Aktualisiere Statistiken
-        # Value ist aus Sicht des aktuellen Spielers (current_player am Blatt)
-        # Bei Backpropagation: Value wird für jeden Spielerwechsel negiert
+        self._backpropagate(node, value, current_player)
+    
+    @staticmethod
+    def _backpropagate(node, value, current_player):
+        """
+        4. BACKPROPAGATION: Aktualisiert die Statistiken vom Blatt bis zur Wurzel.
+        
+        value ist aus Sicht von current_player (Spieler am Zug im Blatt). Jeder
+        Knoten speichert den Wert aus Sicht des Spielers, der den Zug in diesen
+        Knoten gemacht hat, damit select_child() beim Eltern-Knoten maximiert.
+        """
         while node is not None:
-            # Bestimme Perspektive für diesen Knoten (anhand der game_state.turn)
             # Die game_state.turn zeigt an, wer am Zug ist
-            node_player = node.game_state.turn if hasattr(node.game_state, 'turn') else player_id
-            
-            # Transformiere Value: Wenn Knoten-Spieler != Blatt-Spieler, negiere
-            if node_player == current_player:
-                node_value = value
+            if node.game_state.turn == current_player:
+                node.update(-value)
             else:
-                node_value = -value
-            
-            node.update(node_value)
-            # Für nächsten Knoten (Eltern): Perspektive wechselt
-            value = -value
+                node.update(value)
             node = node.parent
     
     def save_model(self, path):
@@ -355,8 +913,15 @@ class AlphaZeroEngine:
     def load_model(self, path):
         """Lädt ein trainiertes Modell."""
         if os.path.exists(path):
-            self.model.load_state_dict(torch.load(path, map_location=self.device))
-            self.model.eval()
+            if self.inference_client is None and self.use_frozen and self._load_frozen(path):
+                # Eager Modell erst bei Bedarf (wie in __init__)
+                self._model = None
+                self._lazy_model_path = path
+            else:
+                self.model.load_state_dict(torch.load(path, map_location=self.device))
+                self.model.eval()
             print(f"✅ Modell geladen: {path}")
+            if self.inference_client is None and 'int8' in self.inference_modes.values():
+                self._load_quantized(path)
         else:
             print(f"⚠️  Modell nicht gefunden: {path}")
\ No newline at end of file
@@ -0,0 +1,539 @@
+# batch_env.py
+# Vektorisierte Spielregeln für viele Bretter gleichzeitig (NumPy, gleiche Regeln wie GameState)
+import random
+import numpy as np
+from config import ROWS, COLS
+from game_logic import GameState, Spielstein
+from neural_network import (STONE_TYPES, STONE_CODES, CompactState, ORIENTATIONS,
+                            NUM_SQUARES, NUM_PLACE_ACTIONS, NUM_MOVE_ACTIONS, NUM_ACTIONS,
+                            legal_action_mask, decode_action)
+
+PFARRER_BASE = NUM_PLACE_ACTIONS + NUM_MOVE_ACTIONS
+_PAD = NUM_SQUARES  # Zusatzspalte für "außerhalb des Bretts" (immer leer/False)
+_STATE_FIELDS = ('board', 'pfarrer', 'unplaced', 'turn', 'game_over', 'winner')
+
+# Steincode -> Besitzer, Kirche (Turm/Schiff), Ausrichtung, Code nach dem Drehen
+_CODE_TO_STONE = {code: key for key, code in STONE_CODES.items()}
+_NUM_CODES = len(STONE_CODES) + 1
+_OWNER = np.zeros(_NUM_CODES, dtype=np.int8)
+_IS_CHURCH = np.zeros(_NUM_CODES, dtype=bool)
+_ORIENT = np.zeros(_NUM_CODES, dtype=np.int64)
+_FLIP = np.zeros(_NUM_CODES, dtype=np.int8)
+for _code, (_spieler, _typ, _ausrichtung) in _CODE_TO_STONE.items():
+    _OWNER[_code] = _spieler
+    _IS_CHURCH[_code] = _typ in ('Turm', 'Schiff')
+    _ORIENT[_code] = ORIENTATIONS.index(_ausrichtung)
+    _FLIP[_code] = STONE_CODES[(_spieler, _typ, ORIENTATIONS[1 - _ORIENT[_code]])]
+
+
+def _square(r, c):
+    """Feldindex 0..48 zu (r, c) (1-basiert)."""
+    return (r - 1) * COLS + (c - 1)
+
+
+_SQ_ROW = np.arange(NUM_SQUARES) // COLS
+_SQ_COL = np.arange(NUM_SQUARES) % COLS
+_EDGE = (_SQ_ROW == 0) | (_SQ_ROW == ROWS - 1) | (_SQ_COL == 0) | (_SQ_COL == COLS - 1)
+
+# Kirchen-Ecken und ihre diagonalen Partner (wie in GameState.get_valid_moves)
+_CORNERS = np.array([_square(1, 1), _square(1, 7), _square(7, 1), _square(7, 7)])
+_PARTNERS = np.array([_square(7, 7), _square(7, 1), _square(1, 7), _square(1, 1)])
+
+
+def _build_tables():
+    # Orthogonale Nachbarn pro Feld (aufgefüllt mit _PAD)
+    neighbours = np.full((NUM_SQUARES, 4), _PAD, dtype=np.int64)
+    # Strahlen pro Ausrichtung und Feld: vertikal entlang der Spalte, horizontal entlang der Zeile
+    rays = np.full((len(ORIENTATIONS), NUM_SQUARES, 2, max(ROWS, COLS) - 1), _PAD, dtype=np.int64)
+    directions = (((-1, 0), (1, 0)), ((0, 1), (0, -1)))
+    for sq in range(NUM_SQUARES):
+        r, c = _SQ_ROW[sq], _SQ_COL[sq]
+        for k, (dr, dc) in enumerate(((-1, 0), (1, 0), (0, -1), (0, 1))):
+            if 0 <= r + dr < ROWS and 0 <= c + dc < COLS:
+                neighbours[sq, k] = (r + dr) * COLS + c + dc
+        for o, dirs in enumerate(directions):
+            for d, (dr, dc) in enumerate(dirs):
+                dist = 1
+                while 0 <= r + dr * dist < ROWS and 0 <= c + dc * dist < COLS:
+                    rays[o, sq, d, dist - 1] = (r + dr * dist) * COLS + c + dc * dist
+                    dist += 1
+    # Felder, die evaluate_score als Nachbarn des Pfarrers zählt: die 1-basierte
+    # Pfarrer-Position wird dort als 0-basierter Index verwendet
+    pfarrer_neighbours = np.full((NUM_SQUARES, 4), _PAD, dtype=np.int64)
+    for sq in range(NUM_SQUARES):
+        pr, pc = _SQ_ROW[sq] + 1, _SQ_COL[sq] + 1
+        for k, (dr, dc) in enumerate(((-1, 0), (1, 0), (0, -1), (0, 1))):
+            if 0 <= pr + dr < ROWS and 0 <= pc + dc < COLS:
+                pfarrer_neighbours[sq, k] = (pr + dr) * COLS + pc + dc
+    # Aktions-ID eines Bewegungszugs src -> dst
+    move_ids = np.full((NUM_SQUARES, NUM_SQUARES + 1), -1, dtype=np.int64)
+    for src in range(NUM_SQUARES):
+        for dst in range(NUM_SQUARES):
+            if dst != src:
+                move_ids[src, dst] = NUM_PLACE_ACTIONS + src * (NUM_SQUARES - 1) + (dst if dst < src else dst - 1)
+    # Aktions-ID -> Art (0 Setzen, 1 Ziehen, 2 Pfarrer), Feld, Ziel, Ausrichtung
+    kind = np.zeros(NUM_ACTIONS, dtype=np.int8)
+    src = np.zeros(NUM_ACTIONS, dtype=np.int64)
+    dst = np.full(NUM_ACTIONS, -1, dtype=np.int64)
+    orient = np.zeros(NUM_ACTIONS, dtype=np.int64)
+    place = np.arange(NUM_PLACE_ACTIONS)
+    src[place] = place // (len(STONE_TYPES) * len(ORIENTATIONS))
+    orient[place] = place % len(ORIENTATIONS)
+    for s in range(NUM_SQUARES):
+        for t in range(NUM_SQUARES):
+            if t != s:
+                kind[move_ids[s, t]] = 1
+                src[move_ids[s, t]] = s
+                dst[move_ids[s, t]] = t
+    kind[PFARRER_BASE:] = 2
+    src[PFARRER_BASE:] = np.arange(NUM_SQUARES)
+    return neighbours, pfarrer_neighbours, rays, move_ids, kind, src, dst, orient
+
+
+_NEIGHBOURS, _PFARRER_NEIGHBOURS, _RAYS, _MOVE_IDS, _ACTION_KIND, _ACTION_SRC, _ACTION_DST, _ACTION_ORIENT = _build_tables()
+
+
+def _next_stone_type(unplaced):
+    """Typindex (STONE_TYPES) des nächsten Steins: Turm, Schiff, dann Häuser."""
+    return np.where(unplaced == 9, 1, np.where(unplaced == 8, 2, 0))
+
+
+def _neighbour_count(grid):
+    """Anzahl orthogonaler Nachbarn in grid [B, ROWS, COLS] für jedes Feld."""
+    grid = grid.astype(np.int16)
+    count = np.zeros_like(grid)
+    count[:, 1:, :] += grid[:, :-1, :]
+    count[:, :-1, :] += grid[:, 1:, :]
+    count[:, :, 1:] += grid[:, :, :-1]
+    count[:, :, :-1] += grid[:, :, 1:]
+    return count
+
+
+class BatchEnv:
+    """
+    B Partien als NumPy-Arrays mit vektorisierten Regeln.
+
+    Jedes Brett ist ein int8-Vektor mit einem Steincode pro Feld (wie
+    compact_board, Felder zeilenweise 0..48). Legale Züge werden als
+    Bool-Maske im Aktionsraum des Netzes geliefert, step() wendet pro Brett
+    eine Aktions-ID an. Die Regeln entsprechen GameState: Turm/Schiff nur
+    auf Ecken ohne gegnerischen Partner, Häuser nicht neben eigene Steine
+    und nicht auf den Pfarrer, Drehung nach jedem Zug und Pfarrer-Tausch
+    für blockierte Steine (siehe cross_check).
+
+    Args:
+        batch_size: Anzahl Bretter
+    """
+
+    def __init__(self, batch_size):
+        self.size = batch_size
+        self.board = np.zeros((batch_size, NUM_SQUARES), dtype=np.int8)
+        self.pfarrer = np.zeros(batch_size, dtype=np.int64)
+        self.unplaced = np.zeros((batch_size, 2), dtype=np.int8)
+        self.turn = np.zeros(batch_size, dtype=np.int8)
+        self.game_over = np.zeros(batch_size, dtype=bool)
+        self.winner = np.zeros(batch_size, dtype=np.int8)  # 0 = kein Sieger
+        self.reset()
+
+    def reset(self, indices=None):
+        """Setzt alle (oder die angegebenen) Bretter auf die Startstellung."""
+        idx = slice(None) if indices is None else indices
+        self.board[idx] = 0
+        self.pfarrer[idx] = _square(4, 4)
+        self.unplaced[idx] = 9
+        self.turn[idx] = 1
+        self.game_over[idx] = False
+        self.winner[idx] = 0
+
+    # ------------------------------------------------------------------
+    # Umwandlung
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_game_states(cls, states):
+        env = cls(len(states))
+        for i, state in enumerate(states):
+            env.set_state(i, state)
+        return env
+
+    def set_state(self, i, state):
+        """Übernimmt einen GameState in Brett i."""
+        for r in range(ROWS):
+            for c in range(COLS):
+                s = state.board[r][c]
+                self.board[i, r * COLS + c] = 0 if s is None else STONE_CODES[(s.spieler, s.typ, s.ausrichtung)]
+        self.pfarrer[i] = _square(*state.pfarrer_pos)
+        self.unplaced[i] = (len(state.unplaced_pieces[1]), len(state.unplaced_pieces[2]))
+        self.turn[i] = state.turn
+        self.game_over[i] = state.game_over
+        self.winner[i] = state.winner or 0
+
+    def copy(self):
+        env = BatchEnv.__new__(BatchEnv)
+        env.size = self.size
+        for name in _STATE_FIELDS:
+            setattr(env, name, getattr(self, name).copy())
+        return env
+
+    def to_game_state(self, i):
+        """Brett i als GameState (ungelegte Steine in fester Reihenfolge)."""
+        state = GameState()
+        for sq in np.flatnonzero(self.board[i]):
+            spieler, typ, ausrichtung = _CODE_TO_STONE[int(self.board[i, sq])]
+            state.board[sq // COLS][sq % COLS] = Spielstein(spieler, typ, ausrichtung)
+        for pid in (1, 2):
+            pieces = state.unplaced_pieces[pid]
+            state.unplaced_pieces[pid] = pieces[len(pieces) - int(self.unplaced[i, pid - 1]):]
+        state.pfarrer_pos = (int(self.pfarrer[i]) // COLS + 1, int(self.pfarrer[i]) % COLS + 1)
+        state.turn = int(self.turn[i])
+        state.game_over = bool(self.game_over[i])
+        state.winner = int(self.winner[i]) or None
+        state.key = state.compute_key()
+        return state
+
+    def compact_states(self):
+        """CompactStates aller Bretter (für BatchEncoder.encode)."""
+        codes = self.board.reshape(-1, ROWS, COLS)
+        return [CompactState(codes[i], (int(p) // COLS + 1, int(p) % COLS + 1), int(u[0]), int(u[1]), int(t))
+                for i, (p, u, t) in enumerate(zip(self.pfarrer, self.unplaced, self.turn))]
+
+    def _players(self, players):
+        if players is None:
+            return self.turn
+        return np.broadcast_to(np.asarray(players, dtype=np.int8), (self.size,))
+
+    # ------------------------------------------------------------------
+    # Regeln
+    # ------------------------------------------------------------------
+    def legal_masks(self, players=None, out=None):
+        """
+        Bool-Masken [B, NUM_ACTIONS] der gültigen Aktionen (wie legal_action_mask).
+
+        Args:
+            players: Spieler pro Brett oder für alle (Standard: Spieler am Zug)
+            out: Optionales Bool-Array [B, NUM_ACTIONS], das überschrieben wird
+        """
+        players = self._players(players)
+        if out is None:
+            out = np.zeros((self.size, NUM_ACTIONS), dtype=bool)
+        else:
+            out[:] = False
+        rows = np.arange(self.size)
+        occupied = self.board != 0
+        own = _OWNER[self.board] == players[:, None]
+        opp = occupied & ~own
+        unplaced = self.unplaced[rows, players - 1]
+        free = ~occupied
+        free[rows, self.pfarrer] = False
+
+        # --- PHASE 1: Turm/Schiff auf eine freie Ecke ohne gegnerischen Partner ---
+        church = unplaced >= 8
+        b, k = np.nonzero(church[:, None] & ~occupied[:, _CORNERS] & ~opp[:, _PARTNERS])
+        base = _CORNERS[k] * 6 + _next_stone_type(unplaced[b]) * 2
+        out[b, base] = True
+        out[b, base + 1] = True
+
+        # --- PHASE 1: Häuser auf freie Felder ohne eigenen Nachbarn ---
+        house = (unplaced > 0) & ~church
+        own_ext = np.concatenate([own, np.zeros((self.size, 1), dtype=bool)], axis=1)
+        own_neighbour = own_ext[:, _NEIGHBOURS].any(axis=2)
+        b, sq = np.nonzero(house[:, None] & free & ~own_neighbour)
+        out[b, sq * 6] = True
+        out[b, sq * 6 + 1] = True
+
+        # --- PHASE 2: Gleiten entlang der Ausrichtung, sonst Pfarrer-Tausch ---
+        movers = own & (unplaced == 0)[:, None]
+        if movers.any():
+            free_ext = np.concatenate([free, np.zeros((self.size, 1), dtype=bool)], axis=1)
+            targets = _RAYS[_ORIENT[self.board], np.arange(NUM_SQUARES)]  # [B, 49, 2, 6]
+            reach = np.logical_and.accumulate(free_ext[rows[:, None, None, None], targets], axis=-1)
+            reach &= movers[:, :, None, None]
+            b, s, d, k = np.nonzero(reach)
+            out[b, _MOVE_IDS[s, targets[b, s, d, k]]] = True
+            b, s = np.nonzero(movers & ~reach.any(axis=(2, 3)))
+            out[b, PFARRER_BASE + s] = True
+        return out
+
+    def step(self, actions):
+        """
+        Wendet pro Brett eine Aktions-ID an (negative IDs: Brett bleibt unverändert).
+
+        Wie GameState.apply_move: danach Siegprüfung für den ziehenden
+        Spieler und Spielerwechsel.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        rows = np.flatnonzero(actions >= 0)
+        actions = actions[rows]
+        kind = _ACTION_KIND[actions]
+        players = self.turn[rows]
+
+        # Setzen: Typ bestimmt der nächste ungelegte Stein, Ausrichtung die Aktion
+        sel = kind == 0
+        r, pl, a = rows[sel], players[sel], actions[sel]
+        left = self.unplaced[r, pl - 1]
+        has = left > 0
+        r, pl, a, left = r[has], pl[has], a[has], left[has]
+        self.board[r, _ACTION_SRC[a]] = 1 + (pl - 1) * 6 + _next_stone_type(left) * 2 + _ACTION_ORIENT[a]
+        self.unplaced[r, pl - 1] = left - 1
+
+        # Ziehen: Stein wandert und wird gedreht
+        sel = kind == 1
+        r, a = rows[sel], actions[sel]
+        piece = self.board[r, _ACTION_SRC[a]]
+        self.board[r, _ACTION_SRC[a]] = 0
+        self.board[r, _ACTION_DST[a]] = _FLIP[piece]
+
+        # Pfarrer-Tausch: Stein auf das Pfarrer-Feld (gedreht), Pfarrer auf das Startfeld
+        sel = kind == 2
+        r, a = rows[sel], actions[sel]
+        src = _ACTION_SRC[a]
+        piece = self.board[r, src]
+        self.board[r, self.pfarrer[r]] = _FLIP[piece]
+        self.board[r, src] = 0
+        self.pfarrer[r] = src
+
+        won = self.check_win(players, rows)
+        self.game_over[rows[won]] = True
+        self.winner[rows[won]] = players[won]
+        self.turn[rows] = 3 - players
+
+    def check_win(self, players=None, rows=None):
+        """
+        Siegbedingung pro Brett (wie GameState.check_win): mindestens 9 Steine,
+        Kirche nicht am Rand, alle Steine orthogonal zusammenhängend.
+
+        Args:
+            players: Spieler pro Brett (Standard: Spieler am Zug)
+            rows: Optional nur diese Bretter prüfen (players dann pro Eintrag)
+        """
+        if rows is None:
+            players = self._players(players)
+            board = self.board
+        else:
+            board = self.board[rows]
+        own = _OWNER[board] == np.asarray(players)[:, None]
+        result = (own.sum(axis=1) >= 9) & ~(own & _IS_CHURCH[board] & _EDGE).any(axis=1)
+        candidates = np.flatnonzero(result)
+        if len(candidates) == 0:
+            return result
+
+        # Zusammenhang per Flood-Fill vom ersten Stein aus (alle Kandidaten gleichzeitig)
+        stones = own[candidates]
+        region = np.zeros_like(stones)
+        first = stones.argmax(axis=1)
+        region[np.arange(len(candidates)), first] = True
+        stones = stones.reshape(-1, ROWS, COLS)
+        region = region.reshape(-1, ROWS, COLS)
+        while True:
+            grown = region.copy()
+            grown[:, 1:, :] |= region[:, :-1, :]
+            grown[:, :-1, :] |= region[:, 1:, :]
+            grown[:, :, 1:] |= region[:, :, :-1]
+            grown[:, :, :-1] |= region[:, :, 1:]
+            grown &= stones
+            if np.array_equal(grown, region):
+                break
+            region = grown
+        result[candidates] = (region == stones).all(axis=(1, 2))
+        return result
+
+    def scores(self, players=None):
+        """Heuristische Bewertung pro Brett (wie GameState.evaluate_score)."""
+        players = self._players(players)
+        board = self.board
+        occupied = board != 0
+        own = _OWNER[board] == players[:, None]
+        opp = occupied & ~own
+        church = _IS_CHURCH[board]
+        inner = ~_EDGE
+
+        # 1. Kirche im Inneren / am Rand
+        score = (60 * (own & church & inner).sum(axis=1)
+                 - 150 * (own & church & _EDGE).sum(axis=1)
+                 - 200 * (opp & church & inner).sum(axis=1)).astype(np.int64)
+
+        # 2. Freiheiten (leere Nachbarfelder) und 3. Verbindungen
+        grid = (-1, ROWS, COLS)
+        empty_neighbours = _neighbour_count((~occupied).reshape(grid)).reshape(self.size, -1)
+        own_neighbours = _neighbour_count(own.reshape(grid)).reshape(self.size, -1)
+        opp_neighbours = _neighbour_count(opp.reshape(grid)).reshape(self.size, -1)
+        score += 2 * (empty_neighbours * own).sum(axis=1) - 5 * (empty_neighbours * opp).sum(axis=1)
+        score += 10 * (own_neighbours * own).sum(axis=1) - 25 * (opp_neighbours * opp).sum(axis=1)
+
+        # 4. Gegnerische Steine neben dem Pfarrer (Felder wie in evaluate_score)
+        opp_ext = np.concatenate([opp, np.zeros((self.size, 1), dtype=bool)], axis=1)
+        score += 15 * opp_ext[np.arange(self.size)[:, None], _PFARRER_NEIGHBOURS[self.pfarrer]].sum(axis=1)
+        return score
+
+    def random_actions(self, rng=None, masks=None):
+        """Eine zufällige gültige Aktion pro Brett (-1 ohne gültige Züge oder bei Spielende)."""
+        rng = rng or np.random.default_rng()
+        if masks is None:
+            masks = self.legal_masks()
+        keys = rng.random(masks.shape) * masks
+        actions = keys.argmax(axis=1)
+        actions[~masks.any(axis=1) | self.game_over] = -1
+        return actions
+
+
+def _endgame_state(rng, variant):
+    """
+    Eine konstruierte Stellung der Zugphase (siehe endgame_states).
+
+    Returns:
+        GameState oder None, wenn das zufällige Gebiet nicht zur Variante passt
+    """
+    pid = rng.choice((1, 2))
+    # Zusammenhängendes Gebiet aus 9 Feldern (0-basiert), zufällig gewachsen
+    cells = {(rng.randrange(ROWS), rng.randrange(COLS))}
+    while len(cells) < 9:
+        r, c = rng.choice(sorted(cells))
+        dr, dc = rng.choice(((-1, 0), (1, 0), (0, -1), (0, 1)))
+        if 0 <= r + dr < ROWS and 0 <= c + dc < COLS:
+            cells.add((r + dr, c + dc))
+    cells = sorted(cells)
+    inner = [cell for cell in cells if 0 < cell[0] < ROWS - 1 and 0 < cell[1] < COLS - 1]
+    edge = [cell for cell in cells if cell not in inner]
+    if variant == 'edge':
+        if not edge:
+            return None
+        tower = rng.choice(edge)
+        church = [tower, rng.choice([cell for cell in cells if cell != tower])]
+    elif len(inner) < 2:
+        return None
+    else:
+        church = rng.sample(inner, 2)
+
+    state = GameState()
+    state.unplaced_pieces = {1: [], 2: []}
+    for cell in cells:
+        typ = 'Turm' if cell == church[0] else 'Schiff' if cell == church[1] else 'Haus'
+        state.board[cell[0]][cell[1]] = Spielstein(pid, typ, rng.choice(ORIENTATIONS))
+    reserved = set(cells)
+
+    if variant == 'near':
+        # Einen Stein um einen Zug zurückversetzen: er liegt auf src und
+        # zieht in Richtung seiner Ausrichtung (before) nach dst
+        dst = rng.choice(cells)
+        before = rng.choice(ORIENTATIONS)
+        steps = ((-1, 0), (1, 0)) if before == 'vertikal' else ((0, -1), (0, 1))
+        dr, dc = rng.choice(steps)
+        path = []
+        r, c = dst[0] + dr, dst[1] + dc
+        while 0 <= r < ROWS and 0 <= c < COLS and (r, c) not in reserved:
+            path.append((r, c))
+            r, c = r + dr, c + dc
+        if not path:
+            return None
+        src = rng.choice(path)
+        piece = state.board[dst[0]][dst[1]]
+        piece.ausrichtung = before
+        state.board[dst[0]][dst[1]] = None
+        state.board[src[0]][src[1]] = piece
+        reserved.update(path)
+        state.turn = pid
+    else:
+        state.turn = rng.choice((1, 2))
+
+    # Gegensteine und Pfarrer auf zufällige freie Felder (nicht in den Zugweg)
+    free = [(r, c) for r in range(ROWS) for c in range(COLS) if (r, c) not in reserved]
+    rng.shuffle(free)
+    for typ, cell in zip(['Turm', 'Schiff'] + ['Haus'] * 7, free):
+        state.board[cell[0]][cell[1]] = Spielstein(3 - pid, typ, rng.choice(ORIENTATIONS))
+    state.pfarrer_pos = (free[9][0] + 1, free[9][1] + 1)
+    state.key = state.compute_key()
+    return state
+
+
+def endgame_states(num_positions, seed=0):
+    """
+    Konstruierte Stellungen der Zugphase rund um die Siegbedingung.
+
+    Zufällige Partien erreichen praktisch nie einen Sieg; hier hat ein
+    Spieler 9 orthogonal zusammenhängende Steine, und zwar je nach Variante
+    mit der Kirche innen (gewonnen), mit einem Kirchenstein am Rand (kein
+    Sieg) oder mit einem um einen Zug zurückversetzten Stein (der Spieler
+    ist am Zug und gewinnt mit diesem Zug). Gegensteine und Pfarrer liegen
+    zufällig auf den übrigen Feldern.
+    """
+    rng = random.Random(seed)
+    states = []
+    while len(states) < num_positions:
+        state = _endgame_state(rng, rng.choice(('won', 'edge', 'near')))
+        if state is not None:
+            states.append(state)
+    return states
+
+
+def cross_check(num_games=50, batch_size=16, max_plies=80, num_endgames=200, seed=0):
+    """
+    Vergleicht BatchEnv Zug für Zug mit GameState.
+
+    Geprüft werden für beide Spieler die Zugmaske, die Siegprüfung und die
+    heuristische Bewertung sowie nach jedem Zug der komplette Zustand
+    (Brett, Pfarrer, ungelegte Steine, Zugrecht, Spielende, Sieger): auf
+    zufälligen Partien und auf num_endgames Stellungen aus endgame_states,
+    dort nach jedem gültigen Zug des Spielers am Zug.
+
+    Returns:
+        Dict mit der Anzahl Abweichungen pro Prüfung (alle 0 = identisch),
+        der Anzahl geprüfter Stellungen und der Anzahl Siege darunter
+
+    Raises:
+        AssertionError: bei einer Abweichung oder wenn kein Sieg geprüft wurde
+    """
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    mismatches = {'masks': 0, 'check_win': 0, 'scores': 0, 'state': 0}
+    positions = 0
+    wins = 0
+
+    def compare_positions(env, games):
+        for pid in (1, 2):
+            masks = env.legal_masks(pid)
+            wins = env.check_win(pid)
+            scores = env.scores(pid)
+            for i, game in enumerate(games):
+                mismatches['masks'] += not np.array_equal(masks[i], legal_action_mask(game, pid))
+                mismatches['check_win'] += bool(wins[i]) != game.check_win(pid)
+                mismatches['scores'] += int(scores[i]) != game.evaluate_score(game.board, pid)
+
+    def compare_state(env, i, game):
+        expected = BatchEnv.from_game_states([game])
+        mismatches['state'] += not all(np.array_equal(getattr(env, name)[i], getattr(expected, name)[0])
+                                       for name in _STATE_FIELDS)
+
+    for first in range(0, num_games, batch_size):
+        count = min(batch_size, num_games - first)
+        games = [GameState() for _ in range(count)]
+        env = BatchEnv(count)
+        for _ in range(rng.randint(max_plies // 2, max_plies)):
+            positions += count
+            compare_positions(env, games)
+            actions = env.random_actions(np_rng)
+            if (actions < 0).all():
+                break
+            env.step(actions)
+            for i, action in enumerate(actions):
+                if action >= 0:
+                    games[i] = games[i].apply_move(decode_action(int(action), games[i].pfarrer_pos))
+                compare_state(env, i, games[i])
+
+    endgames = endgame_states(num_endgames, seed)
+    positions += len(endgames)
+    compare_positions(BatchEnv.from_game_states(endgames), endgames)
+    for game in endgames:
+        wins += game.check_win(1) or game.check_win(2)
+        # Alle gültigen Züge auf einmal: ein Brett pro Zug
+        actions = np.flatnonzero(legal_action_mask(game, game.turn))
+        env = BatchEnv.from_game_states([game] * len(actions))
+        env.step(actions)
+        for i, action in enumerate(actions):
+            after = game.apply_move(decode_action(int(action), game.pfarrer_pos))
+            wins += after.game_over
+            compare_state(env, i, after)
+
+    if any(mismatches.values()) or wins == 0:
+        raise AssertionError(f"BatchEnv weicht von GameState ab: {mismatches}, {wins} Siege geprüft")
+    mismatches['positions'] = positions
+    mismatches['wins'] = wins
+    return mismatches
@@ -0,0 +1,544 @@
+# benchmark.py
+# Mikro-Benchmarks für Spiellogik, Suche und Netzwerk
+#
+# Aufruf:  python benchmark.py            (alle Benchmarks)
+#          python benchmark.py bitboard   (nur einen Abschnitt)
+import random
+import sys
+import time
+import tracemalloc
+from game_logic import GameState
+
+
+def _random_positions(num_positions=200, seed=0, max_plies=60):
+    """Erzeugt Stellungen aus zufälligen Partien (Setz- und Zugphase gemischt)."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        game = GameState()
+        plies = rng.randint(0, max_plies)
+        for _ in range(plies):
+            moves = game.get_valid_moves(game.turn)
+            if not moves or game.game_over:
+                break
+            move = dict(rng.choice(moves))
+            if move['type'] == 'place':
+                move['orientation'] = rng.choice(['vertikal', 'horizontal'])
+            game = game.apply_move(move)
+        positions.append(game)
+    return positions
+
+
+def _rate(func, items, repeat=3):
+    """Führt func für alle items aus und gibt Aufrufe pro Sekunde zurück (bester Lauf)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best if best > 0 else float('inf')
+
+
+def bench_bitboard():
+    """GameState vs. BitboardState: Zuggenerierung und Siegprüfung."""
+    from bitboard import BitboardState
+
+    positions = _random_positions()
+    bitboards = [BitboardState.from_game_state(s) for s in positions]
+
+    print("\n=== Bitboard vs. GameState ===")
+    for name, func_list, func_bb in [
+        ("get_valid_moves", lambda s: s.get_valid_moves(s.turn), lambda b: b.get_valid_moves(b.turn)),
+        ("check_win", lambda s: s.check_win(s.turn), lambda b: b.check_win(b.turn)),
+    ]:
+        rate_list = _rate(func_list, positions)
+        rate_bb = _rate(func_bb, bitboards)
+        print(f"{name:16s} GameState: {rate_list:10.0f}/s | Bitboard: {rate_bb:10.0f}/s | x{rate_bb / rate_list:.1f}")
+
+    moves = [s.get_valid_moves(s.turn) for s in positions]
+    pairs = [(s, m[0]) for s, m in zip(positions, moves) if m]
+    pairs_bb = [(b, m[0]) for b, m in zip(bitboards, moves) if m]
+    rate_list = _rate(lambda p: p[0].apply_move(p[1]), pairs)
+    rate_bb = _rate(lambda p: p[0].apply_move(p[1]), pairs_bb)
+    print(f"{'apply_move':16s} GameState: {rate_list:10.0f}/s | Bitboard: {rate_bb:10.0f}/s | x{rate_bb / rate_list:.1f}")
+
+    rate_conv = _rate(BitboardState.from_game_state, positions)
+    print(f"{'from_game_state':16s} {rate_conv:10.0f}/s")
+
+
+def _count_allocations(func, items):
+    """Anzahl der Speicherblöcke, die func über alle items alloziert (tracemalloc)."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for item in items:
+        func(item)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    return sum(max(stat.count_diff, 0) for stat in stats)
+
+
+def bench_push_pop():
+    """apply_move (deepcopy) vs. push/pop (in-place mit Undo-Eintrag)."""
+    positions = _random_positions()
+    pairs = [(s, m[0]) for s in positions for m in [s.get_valid_moves(s.turn)] if m]
+
+    def copy_path(pair):
+        state, move = pair
+        return state.apply_move(move)
+
+    def push_pop_path(pair):
+        state, move = pair
+        state.push(move)
+        state.pop()
+
+    print("\n=== apply_move vs. push/pop ===")
+    # Allokationen werden über die behaltenen Ergebnisse gemessen
+    kept = []
+    allocs_copy = _count_allocations(lambda p: kept.append(copy_path(p)), pairs)
+    kept.clear()
+    allocs_push = _count_allocations(push_pop_path, pairs)
+    rate_copy = _rate(copy_path, pairs)
+    rate_push = _rate(push_pop_path, pairs)
+    print(f"apply_move: {rate_copy:10.0f} Züge/s | {allocs_copy / len(pairs):8.1f} Allokationen/Zug")
+    print(f"push/pop:   {rate_push:10.0f} Züge/s | {allocs_push / len(pairs):8.1f} Allokationen/Zug")
+    print(f"Speedup: x{rate_push / rate_copy:.1f}")
+
+
+def bench_transpositions(num_positions=5, num_simulations=400):
+    """Netzwerk-Aufrufe pro Zug mit und ohne Transpositionstabelle ('stark' = 400 Simulationen)."""
+    from alphazero_engine import AlphaZeroEngine
+
+    # Stellungen aus der Zugphase, dort treten Transpositionen auf
+    positions = [s for s in _random_positions(200, seed=1, max_plies=80)
+                 if not s.unplaced_pieces[s.turn] and not s.game_over][:num_positions]
+
+    print("\n=== Transpositionstabelle ===")
+    for use_tt in (False, True):
+        engine = AlphaZeroEngine(use_transpositions=use_tt)
+        engine.model.eval()
+        calls = 0
+        start = time.perf_counter()
+        for state in positions:
+            engine.new_search()
+            root = engine.create_root(state)
+            engine._expand_node(root, state.turn)
+            for _ in range(num_simulations):
+                engine._simulate(root, state.turn, 5.0)
+            calls += engine.network_calls
+        elapsed = time.perf_counter() - start
+        label = "mit TT " if use_tt else "ohne TT"
+        line = f"{label}: {calls / len(positions):7.1f} Netzwerk-Aufrufe/Zug | {elapsed / len(positions):.2f}s/Zug"
+        if use_tt:
+            line += f" | Trefferquote {engine.tt.hit_rate:.1%}"
+        print(line)
+
+
+def bench_lazy_children(num_positions=3, num_simulations=400):
+    """Sofortige vs. verzögerte Erzeugung der Kindzustände bei 'stark' (400 Simulationen)."""
+    from alphazero_engine import AlphaZeroEngine, AlphaZeroMCTSNode, tree_memory_stats
+
+    positions = [s for s in _random_positions(100, seed=2, max_plies=16)
+                 if s.unplaced_pieces[s.turn] and not s.game_over][:num_positions]
+
+    engine = AlphaZeroEngine()
+    engine.model.eval()
+    print("\n=== Lazy Children ===")
+    for lazy in (False, True):
+        engine.lazy_children = lazy
+        expand_time = 0.0
+        peak = 0
+        nodes = 0
+        node_bytes = 0
+        original_expand = AlphaZeroMCTSNode.expand
+
+        def timed_expand(node, *args, **kwargs):
+            nonlocal expand_time
+            start = time.perf_counter()
+            original_expand(node, *args, **kwargs)
+            expand_time += time.perf_counter() - start
+
+        AlphaZeroMCTSNode.expand = timed_expand
+        try:
+            for state in positions:
+                tracemalloc.start()
+                engine.new_search()
+                root = engine.create_root(state)
+                engine._expand_node(root, state.turn)
+                for _ in range(num_simulations):
+                    engine._simulate(root, state.turn, 5.0)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+                mem = tree_memory_stats(root)
+                nodes += mem['nodes']
+                node_bytes += mem['bytes']
+        finally:
+            AlphaZeroMCTSNode.expand = original_expand
+        label = "lazy " if lazy else "eager"
+        print(f"{label}: expand {expand_time / len(positions) * 1000:8.1f} ms/Suche | "
+              f"Peak {peak / 1024 / 1024:6.1f} MB | Baum ~{node_bytes / nodes:5.0f} B/Knoten")
+
+
+def bench_batched_search(num_positions=3, num_simulations=400, batch_sizes=(1, 4, 8, 16, 32)):
+    """Simulationen pro Sekunde in Abhängigkeit von der Batch-Größe der Blattauswertung."""
+    from alphazero_engine import AlphaZeroEngine
+
+    positions = [s for s in _random_positions(100, seed=3, max_plies=60) if not s.game_over][:num_positions]
+    engine = AlphaZeroEngine()
+    engine.model.eval()
+
+    print("\n=== Batch-Auswertung der Blätter ===")
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        calls = 0
+        for state in positions:
+            engine.new_game()
+            root = engine.create_root(state)
+            engine._expand_node(root, state.turn)
+            engine.run_simulations(root, state.turn, num_simulations, 5.0, batch_size)
+            calls += engine.network_calls
+        elapsed = time.perf_counter() - start
+        sims_per_sec = num_simulations * len(positions) / elapsed
+        print(f"batch={batch_size:3d}: {sims_per_sec:8.1f} Simulationen/s | "
+              f"{calls / len(positions):6.1f} Netzwerk-Aufrufe/Zug")
+
+
+def bench_array_tree(num_positions=3, num_simulations=400):
+    """Objekt-Knoten vs. Array-Baum: Speicher pro Knoten und Kosten der PUCT-Auswahl."""
+    from alphazero_engine import AlphaZeroEngine, tree_memory_stats
+    from mcts_arrays import ArrayMCTS
+
+    positions = [s for s in _random_positions(100, seed=4, max_plies=60) if not s.game_over][:num_positions]
+    engine = AlphaZeroEngine()
+    engine.model.eval()
+
+    print("\n=== Objekt-Knoten vs. Array-Baum ===")
+    for state in positions:
+        engine.new_game()
+        root = engine.create_root(state)
+        engine._expand_node(root, state.turn)
+        start = time.perf_counter()
+        engine.run_simulations(root, state.turn, num_simulations, 5.0)
+        time_nodes = time.perf_counter() - start
+        mem = tree_memory_stats(root)
+        # Selektionskosten am Wurzelknoten
+        rate_nodes = _rate(lambda _: root.select_child(5.0), range(2000))
+
+        engine.new_game()
+        search = ArrayMCTS(engine)
+        start = time.perf_counter()
+        search.search(state, state.turn, num_simulations, 5.0)
+        time_arrays = time.perf_counter() - start
+        tree = search.tree
+        rate_arrays = _rate(lambda _: tree.select_child(0, 5.0), range(2000))
+
+        print(f"{len(root.children):3d} Kinder | Knoten: {time_nodes:5.2f}s, {mem['bytes_per_node']:5.0f} B/Knoten, "
+              f"{rate_nodes:8.0f} Auswahlen/s | Arrays: {time_arrays:5.2f}s, "
+              f"{tree.memory_bytes() / tree.size:5.0f} B/Knoten, {rate_arrays:8.0f} Auswahlen/s")
+
+
+def bench_encoder():
+    """Elementweise vs. vektorisierte vs. inkrementelle Kodierung der Eingabeebenen."""
+    import torch
+    from neural_network import encode_board_state, _encode_board_state_reference, IncrementalEncoder
+
+    positions = [s for s in _random_positions() if not s.game_over]
+    groups = []
+    for state in positions:
+        moves = [dict(m) for m in state.get_valid_moves(state.turn)]
+        for move in moves:
+            if move['type'] == 'place':
+                move.setdefault('orientation', 'horizontal')
+        groups.append((state, moves))
+    num_moves = sum(len(moves) for _, moves in groups)
+    encoder = IncrementalEncoder()
+
+    def check(state, tensor):
+        return torch.equal(tensor, _encode_board_state_reference(state, state.turn))
+
+    # Bitgleichheit: direkt (beide Perspektiven) und entlang push()/pop()
+    mismatches = sum(not torch.equal(encode_board_state(s, p), _encode_board_state_reference(s, p))
+                     for s in positions for p in (1, 2))
+    for state, moves in groups:
+        encoder.reset(state)
+        for move in moves:
+            state.push(move)
+            encoder.update(state, move)
+            mismatches += not check(state, encoder.encode(state.turn))
+            state.pop()
+            encoder.update(state, move)
+            mismatches += not check(state, encoder.encode(state.turn))
+
+    def run(incremental):
+        start = time.perf_counter()
+        for state, moves in groups:
+            encoder.reset(state)
+            for move in moves:
+                state.push(move)
+                if incremental:
+                    encoder.update(state, move)
+                    encoder.encode(state.turn)
+                else:
+                    encode_board_state(state, state.turn)
+                state.pop()
+                if incremental:
+                    encoder.update(state, move)
+        return num_moves / (time.perf_counter() - start)
+
+    print("\n=== Kodierung der Eingabeebenen ===")
+    print(f"Abweichungen zur Referenz: {mismatches}")
+    rate_ref = _rate(lambda s: _encode_board_state_reference(s, s.turn), positions)
+    rate_vec = _rate(lambda s: encode_board_state(s, s.turn), positions)
+    print(f"Referenz (elementweise): {rate_ref:10.0f} Kodierungen/s")
+    print(f"Vektorisiert:            {rate_vec:10.0f} Kodierungen/s | x{rate_vec / rate_ref:.1f}")
+    rate_full = max(run(False) for _ in range(3))
+    rate_inc = max(run(True) for _ in range(3))
+    print(f"push + voll + pop:       {rate_full:10.0f}/s")
+    print(f"push + inkrementell + pop: {rate_inc:8.0f}/s | x{rate_inc / rate_full:.1f}")
+
+
+def bench_batch_encoder(batch_sizes=(1, 16, 64, 256)):
+    """Einzeln kodieren + torch.stack vs. BatchEncoder mit wiederverwendetem Puffer."""
+    import torch
+    from neural_network import BatchEncoder, encode_board_state, compact_state
+
+    positions = [s for s in _random_positions(256, seed=5) if not s.game_over]
+    encoder = BatchEncoder(max(batch_sizes))
+    compact = [compact_state(s) for s in positions]
+
+    batch = encoder.encode(positions, [s.turn for s in positions])
+    reference = torch.stack([encode_board_state(s, s.turn) for s in positions])
+    mismatches = int((batch != reference).flatten(1).any(1).sum())
+    mismatches += int((encoder.encode(compact, 2) != torch.stack([encode_board_state(s, 2) for s in positions]))
+                      .flatten(1).any(1).sum())
+
+    print("\n=== Batch-Kodierung ===")
+    print(f"Abweichungen zu encode_board_state: {mismatches}")
+    for size in batch_sizes:
+        chunks = [positions[i:i + size] for i in range(0, len(positions) - size + 1, size)]
+        compact_chunks = [compact[i:i + size] for i in range(0, len(compact) - size + 1, size)]
+        rate_stack = _rate(lambda b: torch.stack([encode_board_state(s, s.turn) for s in b]), chunks) * size
+        rate_batch = _rate(lambda b: encoder.encode(b, [s.turn for s in b]), chunks) * size
+        rate_compact = _rate(lambda b: encoder.encode(b, 1), compact_chunks) * size
+        print(f"B={size:3d}: stack {rate_stack:9.0f} Stellungen/s | BatchEncoder {rate_batch:9.0f}/s "
+              f"(x{rate_batch / rate_stack:.1f}) | aus CompactState {rate_compact:9.0f}/s")
+
+
+def bench_parallel_self_play(games=8, simulations=25, max_game_length=40):
+    """Selbstspiele pro Minute in Abhängigkeit von der Anzahl Worker-Prozesse."""
+    import os
+    from alphazero_engine import AlphaZeroEngine
+    from train_alphazero import parallel_self_play, self_play_game
+
+    engine = AlphaZeroEngine()
+    engine.model.eval()
+    cores = os.cpu_count() or 1
+
+    print(f"\n=== Paralleles Selbstspiel ({cores} Kerne) ===")
+    start = time.perf_counter()
+    for _ in range(games):
+        self_play_game(engine, num_simulations=simulations, max_game_length=max_game_length)
+    base = games / (time.perf_counter() - start) * 60
+    print(f"ohne Pool: {base:7.1f} Spiele/min")
+    for workers in sorted({2, cores // 2, cores} - {0, 1}):
+        start = time.perf_counter()
+        for _ in parallel_self_play(engine.model, games, workers, simulations=simulations,
+                                    max_game_length=max_game_length, seed=0):
+            pass
+        rate = games / (time.perf_counter() - start) * 60
+        print(f"{workers:3d} Worker: {rate:7.1f} Spiele/min | x{rate / base:.1f}")
+
+
+def bench_inference_server(games=8, simulations=25, max_game_length=40, workers=2):
+    """Parallele Selbstspiele mit eigenem Modell pro Worker vs. zentralem Inferenz-Server."""
+    from alphazero_engine import AlphaZeroEngine
+    from train_alphazero import parallel_self_play
+
+    engine = AlphaZeroEngine()
+    engine.model.eval()
+
+    print(f"\n=== Inferenz-Server ({workers} Worker) ===")
+    for use_server in (False, True):
+        start = time.perf_counter()
+        for _ in parallel_self_play(engine.model, games, workers, simulations=simulations,
+                                    max_game_length=max_game_length, seed=0, inference_server=use_server):
+            pass
+        rate = games / (time.perf_counter() - start) * 60
+        print(f"{'Server' if use_server else 'lokal':>6}: {rate:7.1f} Spiele/min")
+
+
+def bench_lockstep_self_play(games=16, simulations=25, max_game_length=40):
+    """Selbstspiele pro Minute: nacheinander vs. Lock-Step mit einem Forward-Pass pro Runde."""
+    from alphazero_engine import AlphaZeroEngine
+    from train_alphazero import lockstep_self_play, self_play_game
+
+    engine = AlphaZeroEngine()
+    engine.model.eval()
+
+    print("\n=== Lock-Step-Selbstspiel ===")
+    start = time.perf_counter()
+    for _ in range(games):
+        self_play_game(engine, num_simulations=simulations, max_game_length=max_game_length)
+    base = games / (time.perf_counter() - start) * 60
+    print(f"nacheinander: {base:7.1f} Spiele/min")
+    for concurrent in (4, 16):
+        start = time.perf_counter()
+        for _ in lockstep_self_play(engine.model, games, concurrent, simulations=simulations,
+                                    max_game_length=max_game_length):
+            pass
+        rate = games / (time.perf_counter() - start) * 60
+        print(f"{concurrent:3d} Partien:  {rate:7.1f} Spiele/min | x{rate / base:.1f}")
+
+
+def bench_batch_env(batch_size=256):
+    """BatchEnv vs. GameState: Abgleich der Regeln und Stellungen pro Sekunde."""
+    import numpy as np
+    from batch_env import BatchEnv, cross_check
+    from neural_network import legal_action_mask, decode_action
+
+    print(f"\n=== Batch-Umgebung (B={batch_size}) ===")
+    result = cross_check()
+    positions, wins = result.pop('positions'), result.pop('wins')
+    print(f"Abgleich mit GameState über {positions} Stellungen ({wins} Siege): "
+          + ", ".join(f"{name} {count}" for name, count in result.items()) + " Abweichungen")
+
+    states = _random_positions(batch_size)
+    env = BatchEnv.from_game_states(states)
+    rng = np.random.default_rng(0)
+    actions = env.random_actions(rng)
+    for name, func_list, func_env in [
+        ("Zugmaske", lambda s: legal_action_mask(s, s.turn), lambda e: e.legal_masks()),
+        ("check_win", lambda s: s.check_win(s.turn), lambda e: e.check_win()),
+        ("Bewertung", lambda s: s.evaluate_score(s.board, s.turn), lambda e: e.scores()),
+    ]:
+        rate_list = _rate(func_list, states)
+        rate_env = _rate(func_env, [env]) * batch_size
+        print(f"{name:10s} GameState: {rate_list:10.0f}/s | BatchEnv: {rate_env:10.0f}/s | x{rate_env / rate_list:.1f}")
+
+    rate_env = _rate(lambda e: e.copy().step(actions), [env]) * batch_size
+    pairs = [(s, decode_action(int(a), s.pfarrer_pos)) for s, a in zip(states, actions) if a >= 0]
+    rate_list = _rate(lambda p: p[0].apply_move(p[1]), pairs)
+    print(f"{'step':10s} GameState: {rate_list:10.0f}/s | BatchEnv: {rate_env:10.0f}/s | x{rate_env / rate_list:.1f}")
+
+
+def bench_symmetry(batch_size=256):
+    """Brett-Symmetrien: Korrektheit gegen GameState und Kosten der Batch-Augmentierung."""
+    import torch
+    from neural_network import BatchEncoder, legal_action_masks
+    from symmetry import augment_batch, check_symmetries
+
+    print("\n=== Symmetrie-Augmentierung ===")
+    result = check_symmetries()
+    wins = result.pop('wins')
+    print(f"Abgleich mit GameState ({wins} Siege): " + ", ".join(f"{name} {count}" for name, count in result.items())
+          + " Abweichungen")
+
+    states = _random_positions(batch_size)
+    planes = BatchEncoder(batch_size).encode(states, [s.turn for s in states]).clone()
+    masks = torch.from_numpy(legal_action_masks(states, [s.turn for s in states]))
+    policies = masks.float() / masks.sum(dim=1, keepdim=True)
+    rate = _rate(lambda _: augment_batch(planes, policies, masks), [None]) * batch_size
+    print(f"augment_batch (B={batch_size}): {rate:10.0f} Samples/s")
+
+
+def bench_frozen_model(batch_sizes=(1, 16, 64), repeat=200):
+    """Eingefrorenes Inferenz-Artefakt: Abweichung, Forward-Latenz und Ladezeit gegen das state_dict."""
+    import contextlib
+    import io
+    import os
+    import tempfile
+    import torch
+    from neural_network import AlphaZeroNet, NUM_ACTIONS
+    from model_export import export_frozen, frozen_path, load_frozen
+    from alphazero_engine import AlphaZeroEngine
+    from config import ROWS, COLS
+
+    print("\n=== Eingefrorenes Inferenz-Modell ===")
+    model = AlphaZeroNet()
+    with torch.no_grad():  # BatchNorm-Statistiken ungleich der Initialisierung
+        for _ in range(5):
+            model(torch.rand(32, 17, ROWS, COLS))
+    model.eval()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        model_path = os.path.join(tmpdir, 'model.pth')
+        torch.save(model.state_dict(), model_path)
+        export_frozen(model, frozen_path(model_path))
+        frozen = load_frozen(frozen_path(model_path))
+
+        for batch_size in batch_sizes:
+            x = torch.rand(batch_size, 17, ROWS, COLS)
+            mask = torch.rand(batch_size, NUM_ACTIONS) < 0.05
+            with torch.no_grad():
+                p1, v1 = model(x, mask)
+                p2, v2 = frozen(x, mask)
+                times = []
+                for net in (model, frozen):
+                    for _ in range(10):
+                        net(x, mask)
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        net(x, mask)
+                    times.append((time.perf_counter() - start) / repeat * 1000.0)
+            print(f"B={batch_size:3d}: eager {times[0]:6.2f} ms | eingefroren {times[1]:6.2f} ms "
+                  f"(x{times[0] / times[1]:.2f}) | max. Abweichung Policy {(p1 - p2).abs().max().item():.1e}, "
+                  f"Value {(v1 - v2).abs().max().item():.1e}")
+
+        for use_frozen in (False, True):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                engine = AlphaZeroEngine(model_path=model_path, use_frozen=use_frozen)
+                engine._forward(torch.rand(1, 17, ROWS, COLS), torch.ones(1, NUM_ACTIONS, dtype=torch.bool))
+            label = 'mit Artefakt' if use_frozen else 'state_dict '
+            print(f"Engine laden + erste Bewertung ({label}): {(time.perf_counter() - start) * 1000.0:6.1f} ms")
+
+
+def bench_quantization(num_positions=400):
+    """Int8-Modell gegen Float: Policy-Übereinstimmung, Value-Fehler und Forward-Zeiten."""
+    import torch
+    from neural_network import AlphaZeroNet
+    from config import ROWS, COLS
+    from quantization import print_report, quantize_model, sample_positions, validate
+
+    print("\n=== Int8-Quantisierung ===")
+    model = AlphaZeroNet()
+    with torch.no_grad():  # BatchNorm-Statistiken ungleich der Initialisierung
+        for _ in range(5):
+            model(torch.rand(32, 17, ROWS, COLS))
+    model.eval()
+    states, masks, source = sample_positions(2 * num_positions)
+    print(f"Kalibrierung/Prüfung: je {num_positions} Stellungen aus {source}")
+    quantized = quantize_model(model, states[:num_positions])
+    print_report(validate(model, quantized, states[num_positions:], masks[num_positions:]))
+
+
+BENCHMARKS = {
+    'bitboard': bench_bitboard,
+    'push_pop': bench_push_pop,
+    'transpositions': bench_transpositions,
+    'lazy_children': bench_lazy_children,
+    'batched_search': bench_batched_search,
+    'array_tree': bench_array_tree,
+    'encoder': bench_encoder,
+    'batch_encoder': bench_batch_encoder,
+    'parallel_self_play': bench_parallel_self_play,
+    'inference_server': bench_inference_server,
+    'lockstep_self_play': bench_lockstep_self_play,
+    'batch_env': bench_batch_env,
+    'symmetry': bench_symmetry,
+    'frozen_model': bench_frozen_model,
+    'quantization': bench_quantization,
+}
+
+
+def main():
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        if name not in BENCHMARKS:
+            print(f"⚠️  Unbekannter Benchmark: {name} (verfügbar: {', '.join(BENCHMARKS)})")
+            continue
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
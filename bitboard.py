@@ -0,0 +1,302 @@
+# bitboard.py
+# Bitboard-Darstellung des Spielzustands (7x7 = 49 Bits pro Brett)
+from config import ROWS, COLS
+from game_logic import GameState, Spielstein
+
+# Feld (r, c) mit r, c in 1..7  ->  Bit-Index (r-1)*COLS + (c-1)
+NUM_SQUARES = ROWS * COLS
+FULL = (1 << NUM_SQUARES) - 1
+
+COL_FIRST = 0
+COL_LAST = 0
+for _r in range(ROWS):
+    COL_FIRST |= 1 << (_r * COLS)
+    COL_LAST |= 1 << (_r * COLS + COLS - 1)
+
+ROW_FIRST = (1 << COLS) - 1
+ROW_LAST = ROW_FIRST << ((ROWS - 1) * COLS)
+EDGE = COL_FIRST | COL_LAST | ROW_FIRST | ROW_LAST
+
+STONE_TYPES = ('Haus', 'Turm', 'Schiff')
+
+# Ecken der Kirche und ihre diagonalen Partner (wie in GameState.get_valid_moves)
+CORNERS = [(1, 1), (1, 7), (7, 1), (7, 7)]
+PARTNER_MAP = {(1, 1): (7, 7), (7, 7): (1, 1), (1, 7): (7, 1), (7, 1): (1, 7)}
+
+
+def square(r, c):
+    """Bit-Index für das Feld (r, c) (1-basiert)."""
+    return (r - 1) * COLS + (c - 1)
+
+
+def bit(r, c):
+    """Einzelbit-Maske für das Feld (r, c) (1-basiert)."""
+    return 1 << ((r - 1) * COLS + (c - 1))
+
+
+def pos_of(sq):
+    """Umkehrung von square(): Bit-Index -> (r, c) (1-basiert)."""
+    return (sq // COLS + 1, sq % COLS + 1)
+
+
+POS = [pos_of(sq) for sq in range(NUM_SQUARES)]
+
+
+def popcount(b):
+    return bin(b).count('1')
+
+
+def iter_bits(b):
+    """Liefert die gesetzten Bit-Indizes aufsteigend (= zeilenweise Reihenfolge)."""
+    while b:
+        low = b & -b
+        yield low.bit_length() - 1
+        b ^= low
+
+
+def neighbors(b):
+    """Alle orthogonalen Nachbarfelder der Felder in b."""
+    return (((b >> COLS) | (b << COLS)
+             | ((b & ~COL_LAST) << 1)
+             | ((b & ~COL_FIRST) >> 1)) & FULL)
+
+
+def _build_rays():
+    # Strahlen pro Feld als Feldlisten in Zugreihenfolge von _get_moves_for_stone:
+    # vertikal: erst nach oben (r-1), dann nach unten (r+1)
+    # horizontal: erst nach rechts (c+1), dann nach links (c-1)
+    vertical, horizontal = [], []
+    for sq in range(NUM_SQUARES):
+        r, c = pos_of(sq)
+        up = [square(nr, c) for nr in range(r - 1, 0, -1)]
+        down = [square(nr, c) for nr in range(r + 1, ROWS + 1)]
+        right = [square(r, nc) for nc in range(c + 1, COLS + 1)]
+        left = [square(r, nc) for nc in range(c - 1, 0, -1)]
+        vertical.append((up, down))
+        horizontal.append((right, left))
+    return vertical, horizontal
+
+
+RAYS_VERTIKAL, RAYS_HORIZONTAL = _build_rays()
+
+
+class BitboardState:
+    """
+    Kompakte Darstellung eines GameState als Ganzzahl-Bitboards.
+
+    Ein Bitboard pro Spieler, pro Steintyp und pro Ausrichtung sowie das
+    Pfarrer-Feld. Zuggenerierung, Nachbartest und Siegprüfung laufen über
+    Shift-/Masken-Operationen. Die Züge haben dasselbe Format und dieselbe
+    Reihenfolge wie in GameState, die Umwandlung ist in beide Richtungen
+    verlustfrei.
+    """
+
+    __slots__ = ('players', 'types', 'vertikal', 'horizontal', 'pfarrer',
+                 'unplaced', 'turn', 'game_over', 'winner')
+
+    def __init__(self):
+        self.players = {1: 0, 2: 0}
+        self.types = {'Haus': 0, 'Turm': 0, 'Schiff': 0}
+        self.vertikal = 0
+        self.horizontal = 0
+        self.pfarrer = square(4, 4)
+        self.unplaced = {1: 9, 2: 9}
+        self.turn = 1
+        self.game_over = False
+        self.winner = None
+
+    # ------------------------------------------------------------------
+    # Umwandlung
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_game_state(cls, game_state):
+        bb = cls()
+        for r in range(ROWS):
+            for c in range(COLS):
+                s = game_state.board[r][c]
+                if s is None:
+                    continue
+                b = 1 << (r * COLS + c)
+                bb.players[s.spieler] |= b
+                bb.types[s.typ] |= b
+                if s.ausrichtung == 'vertikal':
+                    bb.vertikal |= b
+                else:
+                    bb.horizontal |= b
+        bb.pfarrer = square(*game_state.pfarrer_pos)
+        bb.unplaced = {pid: len(game_state.unplaced_pieces[pid]) for pid in (1, 2)}
+        bb.turn = game_state.turn
+        bb.game_over = game_state.game_over
+        bb.winner = game_state.winner
+        return bb
+
+    def to_game_state(self):
+        state = GameState()
+        for pid in (1, 2):
+            for sq in iter_bits(self.players[pid]):
+                b = 1 << sq
+                typ = next(t for t in STONE_TYPES if self.types[t] & b)
+                ausrichtung = 'vertikal' if self.vertikal & b else 'horizontal'
+                r, c = POS[sq]
+                state.board[r - 1][c - 1] = Spielstein(pid, typ, ausrichtung)
+            # Ungelegte Steine werden in fester Reihenfolge (Turm, Schiff, Häuser) abgelegt
+            pieces = state.unplaced_pieces[pid]
+            state.unplaced_pieces[pid] = pieces[len(pieces) - self.unplaced[pid]:]
+        state.pfarrer_pos = POS[self.pfarrer]
+        state.turn = self.turn
+        state.game_over = self.game_over
+        state.winner = self.winner
+        state.key = state.compute_key()
+        return state
+
+    def copy(self):
+        bb = BitboardState.__new__(BitboardState)
+        bb.players = dict(self.players)
+        bb.types = dict(self.types)
+        bb.vertikal = self.vertikal
+        bb.horizontal = self.horizontal
+        bb.pfarrer = self.pfarrer
+        bb.unplaced = dict(self.unplaced)
+        bb.turn = self.turn
+        bb.game_over = self.game_over
+        bb.winner = self.winner
+        return bb
+
+    # ------------------------------------------------------------------
+    # Regeln
+    # ------------------------------------------------------------------
+    @property
+    def occupied(self):
+        return self.players[1] | self.players[2]
+
+    def next_stone_type(self, player_id):
+        """Typ des nächsten zu legenden Steins (Turm, Schiff, dann Häuser)."""
+        left = self.unplaced[player_id]
+        if left == 0:
+            return None
+        if left == 9:
+            return 'Turm'
+        if left == 8:
+            return 'Schiff'
+        return 'Haus'
+
+    def has_own_neighbor(self, r, c, pid):
+        return bool(neighbors(bit(r, c)) & self.players[pid])
+
+    def placement_mask(self, player_id):
+        """Bitmaske aller erlaubten Haus-Felder (leer, kein Pfarrer, kein eigener Nachbar)."""
+        free = FULL & ~self.occupied & ~(1 << self.pfarrer)
+        return free & ~neighbors(self.players[player_id])
+
+    def stone_targets(self, sq):
+        """Zielfelder eines Steins auf sq als Liste in der Reihenfolge von GameState."""
+        blockers = self.occupied | (1 << self.pfarrer)
+        rays = RAYS_VERTIKAL[sq] if self.vertikal >> sq & 1 else RAYS_HORIZONTAL[sq]
+        targets = []
+        for ray in rays:
+            for t in ray:
+                if blockers >> t & 1:
+                    break
+                targets.append(t)
+        return targets
+
+    def get_valid_moves(self, player_id):
+        moves = []
+        stone_type = self.next_stone_type(player_id)
+
+        # --- PHASE 1: PLACEMENT ---
+        if stone_type in ('Turm', 'Schiff'):
+            occupied = self.occupied
+            opp = self.players[2 if player_id == 1 else 1]
+            for r, c in CORNERS:
+                if occupied & bit(r, c):
+                    continue
+                if opp & bit(*PARTNER_MAP[(r, c)]):
+                    continue
+                moves.append({'type': 'place', 'pos': (r, c), 'stone_type': stone_type})
+        elif stone_type == 'Haus':
+            for sq in iter_bits(self.placement_mask(player_id)):
+                moves.append({'type': 'place', 'pos': POS[sq], 'stone_type': 'Haus'})
+
+        # --- PHASE 2: MOUVEMENT ---
+        else:
+            pfarrer_pos = POS[self.pfarrer]
+            for sq in iter_bits(self.players[player_id]):
+                frm = POS[sq]
+                targets = self.stone_targets(sq)
+                if targets:
+                    for t in targets:
+                        moves.append({'type': 'move', 'from': frm, 'to': POS[t]})
+                else:
+                    moves.append({'type': 'pfarrer', 'from': frm, 'to': pfarrer_pos})
+        return moves
+
+    def _put(self, pid, typ, vertikal, b):
+        self.players[pid] |= b
+        self.types[typ] |= b
+        if vertikal:
+            self.vertikal |= b
+        else:
+            self.horizontal |= b
+
+    def _take(self, b):
+        """Entfernt den Stein auf b und gibt (Spieler, Typ, vertikal) zurück."""
+        pid = 1 if self.players[1] & b else 2
+        typ = next(t for t in STONE_TYPES if self.types[t] & b)
+        vertikal = bool(self.vertikal & b)
+        self.players[pid] &= ~b
+        self.types[typ] &= ~b
+        self.vertikal &= ~b
+        self.horizontal &= ~b
+        return pid, typ, vertikal
+
+    def apply_move(self, move):
+        """Wendet einen Zug an und gibt einen neuen BitboardState zurück (wie GameState.apply_move)."""
+        new_state = self.copy()
+        pid = new_state.turn
+
+        if move['type'] == 'place':
+            stone_type = new_state.next_stone_type(pid)
+            if stone_type is not None:
+                new_state.unplaced[pid] -= 1
+                vertikal = move.get('orientation', 'vertikal') == 'vertikal'
+                new_state._put(pid, stone_type, vertikal, bit(*move['pos']))
+
+        elif move['type'] == 'move':
+            src = bit(*move['from'])
+            if new_state.occupied & src:
+                owner, typ, vertikal = new_state._take(src)
+                # Nach jedem Zug wird der Stein gedreht
+                new_state._put(owner, typ, not vertikal, bit(*move['to']))
+
+        elif move['type'] == 'pfarrer':
+            src = bit(*move['from'])
+            dst = bit(*move['to'])
+            if new_state.occupied & src:
+                owner, typ, vertikal = new_state._take(src)
+                new_state._put(owner, typ, not vertikal, dst)
+            new_state.pfarrer = square(*move['from'])
+
+        if new_state.check_win(pid):
+            new_state.game_over = True
+            new_state.winner = pid
+
+        new_state.turn = 1 if pid == 2 else 2
+        return new_state
+
+    def check_win(self, pid):
+        stones = self.players[pid]
+        if popcount(stones) < 9:
+            return False
+        # Kirche (Turm + Schiff) darf nicht am Rand stehen
+        if stones & (self.types['Turm'] | self.types['Schiff']) & EDGE:
+            return False
+
+        # Zusammenhang per Flood-Fill über Shifts
+        region = stones & -stones
+        while True:
+            grown = (region | neighbors(region)) & stones
+            if grown == region:
+                break
+            region = grown
+        return region == stones
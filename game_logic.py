@@ -1,7 +1,25 @@
 # game_logic.py
 import copy
+import random
 from config import *
 
+# --- ZOBRIST-SCHLÜSSEL (feste Saat, damit Schlüssel über Läufe hinweg stabil sind) ---
+_zobrist_rng = random.Random(0x4C44494B)
+ZOBRIST_PIECE = {
+    (pid, typ, ausrichtung): [[_zobrist_rng.getrandbits(64) for _ in range(COLS)] for _ in range(ROWS)]
+    for pid in (1, 2)
+    for typ in ('Haus', 'Turm', 'Schiff')
+    for ausrichtung in ('vertikal', 'horizontal')
+}
+ZOBRIST_PFARRER = [[_zobrist_rng.getrandbits(64) for _ in range(COLS)] for _ in range(ROWS)]
+ZOBRIST_UNPLACED = {pid: [_zobrist_rng.getrandbits(64) for _ in range(10)] for pid in (1, 2)}
+ZOBRIST_TURN = _zobrist_rng.getrandbits(64)  # gesetzt, wenn Spieler 2 am Zug ist
+
+
+def _stone_key(s, r, c):
+    """Zobrist-Anteil eines Steins auf (r, c) (0-basiert)."""
+    return ZOBRIST_PIECE[(s.spieler, s.typ, s.ausrichtung)][r][c]
+
 class Spielstein:
     def __init__(self, spieler_id, typ, ausrichtung='vertikal'):
         self.spieler = spieler_id
@@ -25,6 +43,8 @@ class GameState:
             1: self._init_pieces(1),
             2: self._init_pieces(2)
         }
+        self._history = []  # Undo-Einträge für push()/pop()
+        self.key = self.compute_key()
 
     def _init_pieces(self, pid):
         pieces = [Spielstein(pid, 'Turm'), Spielstein(pid, 'Schiff')]
@@ -94,39 +114,130 @@ class GameState:
                 if s and s.spieler == pid: return True
         return False
 
+    def compute_key(self):
+        """
+        Berechnet den 64-bit Zobrist-Schlüssel der Stellung komplett neu.
+
+        Enthalten sind Spieler/Typ/Ausrichtung je Feld, das Pfarrer-Feld, der
+        Spieler am Zug und die Anzahl ungelegter Steine. Im Spiel wird
+        self.key inkrementell in apply_move()/push() gepflegt.
+        """
+        key = 0
+        for r in range(ROWS):
+            for c in range(COLS):
+                s = self.board[r][c]
+                if s:
+                    key ^= _stone_key(s, r, c)
+        pr, pc = self.pfarrer_pos
+        key ^= ZOBRIST_PFARRER[pr-1][pc-1]
+        for pid in (1, 2):
+            key ^= ZOBRIST_UNPLACED[pid][len(self.unplaced_pieces[pid])]
+        if self.turn == 2:
+            key ^= ZOBRIST_TURN
+        return key
+
+    def __getstate__(self):
+        # Die Undo-Historie gehört nicht zur Stellung (wird bei deepcopy/pickle nicht kopiert)
+        state = self.__dict__.copy()
+        state['_history'] = []
+        return state
+
     def apply_move(self, move):
         new_state = copy.deepcopy(self)
-        
+        new_state._do_move(move)
+        return new_state
+
+    def push(self, move):
+        """
+        Führt einen Zug direkt auf diesem Zustand aus (ohne Kopie).
+
+        Für jeden Zug wird ein kleiner Undo-Eintrag gespeichert, mit pop()
+        wird der Zug wieder zurückgenommen. So kann die Suche einen einzigen
+        Zustand durch den Baum hinab- und wieder hinaufführen.
+        """
+        self._history.append(self._do_move(move))
+
+    def pop(self):
+        """Nimmt den letzten mit push() ausgeführten Zug zurück und gibt ihn zurück."""
+        move, piece, prev_orientation, prev_target, prev_pfarrer, prev_turn, prev_game_over, prev_winner, prev_key = self._history.pop()
+
+        if move['type'] == 'place':
+            if piece is not None:
+                r, c = move['pos']
+                self.board[r-1][c-1] = prev_target
+                piece.ausrichtung = prev_orientation
+                self.unplaced_pieces[prev_turn].insert(0, piece)
+
+        elif move['type'] in ('move', 'pfarrer'):
+            fr, fc = move['from']
+            tr, tc = move['to']
+            self.board[tr-1][tc-1] = prev_target
+            self.board[fr-1][fc-1] = piece
+            if piece: piece.ausrichtung = prev_orientation
+
+        self.pfarrer_pos = prev_pfarrer
+        self.turn = prev_turn
+        self.game_over = prev_game_over
+        self.winner = prev_winner
+        self.key = prev_key
+        return move
+
+    def _do_move(self, move):
+        """Wendet move auf self an und gibt den Undo-Eintrag zurück."""
+        piece = None
+        prev_orientation = None
+        prev_target = None
+        undo_base = (self.pfarrer_pos, self.turn, self.game_over, self.winner, self.key)
+        key = self.key
+
         if move['type'] == 'place':
             r, c = move['pos']
-            if len(new_state.unplaced_pieces[new_state.turn]) > 0:
-                p = new_state.unplaced_pieces[new_state.turn].pop(0)
+            unplaced = self.unplaced_pieces[self.turn]
+            if len(unplaced) > 0:
+                p = unplaced.pop(0)
+                piece, prev_orientation, prev_target = p, p.ausrichtung, self.board[r-1][c-1]
                 if 'orientation' in move: p.ausrichtung = move['orientation']
-                new_state.board[r-1][c-1] = p
-            
+                self.board[r-1][c-1] = p
+                key ^= ZOBRIST_UNPLACED[self.turn][len(unplaced) + 1] ^ ZOBRIST_UNPLACED[self.turn][len(unplaced)]
+                if prev_target: key ^= _stone_key(prev_target, r-1, c-1)
+                key ^= _stone_key(p, r-1, c-1)
+
         elif move['type'] == 'move':
             fr, fc = move['from']
             tr, tc = move['to']
-            p = new_state.board[fr-1][fc-1]
-            new_state.board[fr-1][fc-1] = None
-            new_state.board[tr-1][tc-1] = p
-            if p: p.drehen()
-            
+            p = self.board[fr-1][fc-1]
+            piece, prev_orientation, prev_target = p, p.ausrichtung if p else None, self.board[tr-1][tc-1]
+            if p: key ^= _stone_key(p, fr-1, fc-1)
+            if prev_target: key ^= _stone_key(prev_target, tr-1, tc-1)
+            self.board[fr-1][fc-1] = None
+            self.board[tr-1][tc-1] = p
+            if p:
+                p.drehen()
+                key ^= _stone_key(p, tr-1, tc-1)
+
         elif move['type'] == 'pfarrer':
             sr, sc = move['from']
             pr, pc = move['to']
-            p = new_state.board[sr-1][sc-1]
-            new_state.board[pr-1][pc-1] = p
-            new_state.board[sr-1][sc-1] = None
-            new_state.pfarrer_pos = (sr, sc)
-            if p: p.drehen()
+            p = self.board[sr-1][sc-1]
+            piece, prev_orientation, prev_target = p, p.ausrichtung if p else None, self.board[pr-1][pc-1]
+            if p: key ^= _stone_key(p, sr-1, sc-1)
+            if prev_target: key ^= _stone_key(prev_target, pr-1, pc-1)
+            self.board[pr-1][pc-1] = p
+            self.board[sr-1][sc-1] = None
+            opr, opc = self.pfarrer_pos
+            key ^= ZOBRIST_PFARRER[opr-1][opc-1] ^ ZOBRIST_PFARRER[sr-1][sc-1]
+            self.pfarrer_pos = (sr, sc)
+            if p:
+                p.drehen()
+                key ^= _stone_key(p, pr-1, pc-1)
 
-        if new_state.check_win(new_state.turn):
-            new_state.game_over = True
-            new_state.winner = new_state.turn
+        if self.check_win(self.turn):
+            self.game_over = True
+            self.winner = self.turn
 
-        new_state.turn = 1 if new_state.turn == 2 else 2
-        return new_state
+        self.turn = 1 if self.turn == 2 else 2
+        self.key = key ^ ZOBRIST_TURN
+        return (move, piece, prev_orientation, prev_target) + undo_base
 
     def apply_move_fast(self, matrix, move, pid):
         new_matrix = copy.deepcopy(matrix)
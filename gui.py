@@ -1,10 +1,15 @@
 # gui.py - Korrigierte Version (aktualisierte Farbnamen)
 import tkinter as tk
 from tkinter import messagebox
+import threading
 import traceback
 from config import *
 from game_logic import GameState
-from ai_engine import AIEngine
+from ai_engine import AIEngine, DEFAULT_TIME_LIMITS_MS
+from search_control import SearchControl
+
+# Abfrageintervall für den Fortschritt der KI-Suche (ms)
+AI_POLL_MS = 50
 
 # --- POPUP ORIENTATION ---
 class RichtungsWaehler(tk.Toplevel):
@@ -75,11 +80,18 @@ class GameGUI(tk.Frame):
         self.canvas.pack(side=tk.TOP)
         
         self.game = GameState()
-        self.ai = AIEngine()
+        # Feste Bedenkzeit je Schwierigkeit: gleich lange Antwortzeiten auf jedem Rechner
+        self.ai = AIEngine(time_limits_ms=DEFAULT_TIME_LIMITS_MS)
         self.ki_active = False
         self.ki_difficulty = "mittel"
         self.selected_pos = None
         
+        # Laufende KI-Suche im Worker-Thread
+        self.ai_thread = None
+        self.ai_control = None
+        self.ai_result = None
+        self.ai_error = None
+        
         self.create_menu()
         self.draw_grid()
         
@@ -102,11 +114,29 @@ class GameGUI(tk.Frame):
         game_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Spiel", menu=game_menu)
         game_menu.add_command(label="Neues Spiel...", command=self.zeige_start_menue)
+        self.ponder_var = tk.BooleanVar(value=self.ai.ponder)
+        game_menu.add_checkbutton(label="KI denkt im Hintergrund", variable=self.ponder_var,
+                                  command=self.toggle_ponder)
+        self.time_limit_var = tk.BooleanVar(value=bool(self.ai.time_limits_ms))
+        game_menu.add_checkbutton(label="Feste Bedenkzeit pro Zug", variable=self.time_limit_var,
+                                  command=self.toggle_time_limit)
+        game_menu.add_command(label="KI-Zug jetzt ausführen", command=self.force_ai_move)
         game_menu.add_command(label="Beenden", command=self.master.quit)
 
+    def toggle_ponder(self):
+        self.ai.ponder = self.ponder_var.get()
+        if not self.ai.ponder:
+            self.ai.stop_pondering()
+
+    def toggle_time_limit(self):
+        # Aus: feste Simulationszahl je Schwierigkeit (Antwortzeit hängt vom Rechner ab)
+        self.ai.time_limits_ms = dict(DEFAULT_TIME_LIMITS_MS) if self.time_limit_var.get() else {}
+
     def new_game(self, ai, diff="mittel"):
         try:
+            self.cancel_ai()
             self.game = GameState()
+            self.ai.new_game()
             self.ki_active = ai
             self.ki_difficulty = diff
             self.selected_pos = None
@@ -363,12 +393,69 @@ class GameGUI(tk.Frame):
             self.log("")
 
     def run_ai(self):
+        """Startet die KI-Suche in einem Worker-Thread; _poll_ai() holt das Ergebnis ab."""
         try:
             self.master.config(cursor="watch")
-            self.master.update()
-            move = self.ai.get_move(self.game, self.ki_difficulty, 2)
+            self.ai_control = SearchControl()
+            self.ai_result = None
+            self.ai_error = None
+            self.ai_thread = threading.Thread(target=self._ai_worker,
+                                              args=(self.game, self.ki_difficulty, self.ai_control),
+                                              daemon=True)
+            self.ai_thread.start()
+            self.master.after(AI_POLL_MS, self._poll_ai)
+        except Exception as e:
+            traceback.print_exc()
+            self.master.lift()
+            messagebox.showerror("Erreur IA", str(e), parent=self.master)
+
+    def _ai_worker(self, game, difficulty, control):
+        # Läuft im Worker-Thread: keine Tk-Aufrufe hier
+        try:
+            self.ai_result = self.ai.get_move(game, difficulty, 2, control)
+        except Exception as e:
+            traceback.print_exc()
+            self.ai_error = e
+
+    def _poll_ai(self):
+        control = self.ai_control
+        if control is None:
+            return
+        if self.ai_thread.is_alive():
+            best = control.best_move
+            best_txt = f" | bester Zug: {best['type']} {best.get('pos') or best.get('from')}" if best else ""
+            self.log(f"KI denkt... {control.simulations}/{control.total} Simulationen | "
+                     f"{control.elapsed:.1f}s{best_txt}")
+            self.master.after(AI_POLL_MS, self._poll_ai)
+            return
+
+        self.ai_control = None
+        self.ai_thread = None
+        self.master.config(cursor="")
+        if control.cancelled:
+            return
+        if self.ai_error is not None:
+            self.master.lift()
+            messagebox.showerror("Erreur IA", str(self.ai_error), parent=self.master)
+            return
+        self.apply_ai_move(self.ai_result)
+
+    def force_ai_move(self):
+        """Beendet die laufende KI-Suche und spielt den besten bisherigen Zug."""
+        if self.ai_control is not None:
+            self.ai_control.stop()
+
+    def cancel_ai(self):
+        """Bricht die laufende KI-Suche ab und wartet auf den Worker-Thread."""
+        if self.ai_control is not None:
+            self.ai_control.cancel()
+            self.ai_thread.join()
+            self.ai_control = None
+            self.ai_thread = None
             self.master.config(cursor="")
-            
+
+    def apply_ai_move(self, move):
+        try:
             if move:
                 self.game = self.game.apply_move(move)
                 self.draw_board()
@@ -381,10 +468,12 @@ class GameGUI(tk.Frame):
                     messagebox.showinfo("Ende", f"KI ({self.ki_difficulty}) gewinnt!", parent=self.master)
                     self.master.attributes('-topmost', False)
                 else:
+                    # Während der Mensch überlegt, sucht die KI weiter
+                    self.ai.start_pondering(self.game, self.ki_difficulty)
                     self.log("")
             else:
                 self.log("")
         except Exception as e:
             traceback.print_exc()
             self.master.lift()
-            messagebox.showerror("Erreur IA", str(e), parent=self.master)
\ No newline at end of file
+            messagebox.showerror("Erreur IA", str(e), parent=self.master)
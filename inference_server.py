@@ -0,0 +1,226 @@
+# inference_server.py
+# Zentraler Inferenz-Server: sammelt Blätter mehrerer Selbstspiel-Prozesse zu dynamischen Batches
+import queue
+import time
+import torch
+import torch.multiprocessing as tmp
+from neural_network import AlphaZeroNet, NUM_ACTIONS
+from config import ROWS, COLS
+
+# Indizes im gemeinsamen Statistik-Tensor (_STAT_ALIVE: 1, solange der Server Anfragen beantwortet)
+_STAT_BATCHES, _STAT_LEAVES, _STAT_BUSY, _STAT_WAIT, _STAT_START, _STAT_END, _STAT_ALIVE = range(7)
+
+# Antwort an alle Slots, wenn der Server-Prozess mit einem Fehler endet
+_SERVER_FAILED = -1
+
+# Intervall (s), in dem wartende Clients prüfen, ob der Server noch läuft
+_POLL_INTERVAL = 1.0
+
+
+class InferenceClient:
+    """
+    Client-Seite eines Slots im InferenceServer.
+
+    Die Eingaben werden direkt in den gemeinsamen Speicher des Slots
+    geschrieben; über die Queues laufen nur (Slot, Anzahl)-Nachrichten.
+    Wird von AlphaZeroEngine(inference_client=...) statt des lokalen
+    Modells verwendet.
+
+    Endet der Server, wirft evaluate() einen RuntimeError, statt ewig auf
+    die Antwort zu warten.
+    """
+
+    def __init__(self, slot, inputs, masks, policies, values, stats, requests, response):
+        self.slot = slot
+        self.inputs = inputs
+        self.masks = masks
+        self.policies = policies
+        self.values = values
+        self.stats = stats
+        self.requests = requests
+        self.response = response
+        self.capacity = inputs.shape[1]
+
+    def _wait(self):
+        """Wartet auf die Antwort des Servers für diesen Slot."""
+        while True:
+            try:
+                reply = self.response.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if self.stats[_STAT_ALIVE] == 0:
+                    raise RuntimeError("Inferenz-Server ist beendet, Anfrage bleibt unbeantwortet")
+                continue
+            if reply == _SERVER_FAILED:
+                raise RuntimeError("Inferenz-Server ist mit einem Fehler abgebrochen")
+            return reply
+
+    def evaluate(self, batch, legal_mask):
+        """
+        Bewertet batch [n, 17, ROWS, COLS] mit Masken [n, NUM_ACTIONS].
+
+        Returns:
+            (maskierte Log-Policy [n, NUM_ACTIONS], Values [n])
+        """
+        n = batch.shape[0]
+        policies = torch.empty((n, NUM_ACTIONS), dtype=torch.float32)
+        values = torch.empty(n, dtype=torch.float32)
+        for start in range(0, n, self.capacity):
+            k = min(self.capacity, n - start)
+            self.inputs[self.slot, :k] = batch[start:start + k]
+            self.masks[self.slot, :k] = legal_mask.reshape(n, -1)[start:start + k]
+            self.requests.put((self.slot, k))
+            self._wait()
+            policies[start:start + k] = self.policies[self.slot, :k]
+            values[start:start + k] = self.values[self.slot, :k]
+        return policies, values
+
+
+class InferenceServer:
+    """
+    Server-Prozess mit dem einzigen Modell für alle Selbstspiel-Worker.
+
+    Anfragen werden gesammelt, bis max_batch_size Blätter zusammen sind oder
+    max_wait_ms seit der ersten Anfrage vergangen sind; dann läuft ein
+    Forward-Pass und die Ergebnisse gehen an die Slots zurück.
+
+    Args:
+        model: AlphaZeroNet mit den aktuellen Gewichten (wird kopiert)
+        num_slots: Anzahl Clients (ein Slot pro Worker)
+        max_batch_size: Maximale Blätter pro Forward-Pass
+        max_wait_ms: Maximale Wartezeit auf weitere Anfragen
+        slot_capacity: Maximale Blätter pro Anfrage eines Clients
+        num_threads: Torch-Threads des Server-Prozesses
+    """
+
+    def __init__(self, model, num_slots, max_batch_size=64, max_wait_ms=2.0, slot_capacity=16, num_threads=1):
+        self.ctx = tmp.get_context('spawn')
+        self.num_slots = num_slots
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.num_threads = num_threads
+        self.state_dict = {k: v.detach().cpu() for k, v in model.state_dict().items()}
+
+        self.inputs = torch.zeros((num_slots, slot_capacity, 17, ROWS, COLS)).share_memory_()
+        self.masks = torch.zeros((num_slots, slot_capacity, NUM_ACTIONS), dtype=torch.bool).share_memory_()
+        self.policies = torch.zeros((num_slots, slot_capacity, NUM_ACTIONS)).share_memory_()
+        self.values = torch.zeros((num_slots, slot_capacity)).share_memory_()
+        self.stats_tensor = torch.zeros(7, dtype=torch.float64).share_memory_()
+
+        self.requests = self.ctx.Queue()
+        self.responses = [self.ctx.Queue() for _ in range(num_slots)]
+        self.process = None
+
+    def start(self):
+        self.stats_tensor[_STAT_ALIVE] = 1
+        self.process = self.ctx.Process(
+            target=_serve,
+            args=(self.state_dict, self.inputs, self.masks, self.policies, self.values, self.stats_tensor,
+                  self.requests, self.responses, self.max_batch_size, self.max_wait_ms, self.num_threads),
+            daemon=True)
+        self.process.start()
+        return self
+
+    def stop(self):
+        if self.process is not None:
+            self.requests.put(None)
+            self.process.join()
+            self.process = None
+        self.stats_tensor[_STAT_ALIVE] = 0
+
+    def check_alive(self):
+        """
+        Wirft einen RuntimeError, wenn der Server-Prozess nicht mehr läuft.
+
+        Deckt auch ein hartes Ende ab (z.B. vom OOM-Killer), bei dem _serve
+        keine Fehlerantwort mehr senden konnte: wartende Clients sehen dann
+        _STAT_ALIVE == 0 und brechen ebenfalls ab.
+        """
+        if self.process is not None and not self.process.is_alive():
+            self.stats_tensor[_STAT_ALIVE] = 0
+            raise RuntimeError(f"Inferenz-Server unerwartet beendet (Exit-Code {self.process.exitcode})")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def client(self, slot):
+        """Client für einen Slot (in einem Worker-Prozess verwendbar, picklebar)."""
+        return InferenceClient(slot, self.inputs, self.masks, self.policies, self.values, self.stats_tensor,
+                               self.requests, self.responses[slot])
+
+    def stats(self):
+        """Durchsatz- und Füllstatistik des Servers."""
+        s = self.stats_tensor.tolist()
+        batches, leaves = s[_STAT_BATCHES], s[_STAT_LEAVES]
+        end = s[_STAT_END] or time.perf_counter()
+        elapsed = end - s[_STAT_START] if s[_STAT_START] else 0.0
+        return {
+            'batches': int(batches),
+            'leaves': int(leaves),
+            'avg_batch': leaves / batches if batches else 0.0,
+            'batch_fill': leaves / (batches * self.max_batch_size) if batches else 0.0,
+            'leaves_per_sec': leaves / elapsed if elapsed > 0 else 0.0,
+            'busy': s[_STAT_BUSY] / elapsed if elapsed > 0 else 0.0,
+            'avg_wait_ms': s[_STAT_WAIT] / batches * 1000.0 if batches else 0.0,
+        }
+
+
+def _serve(state_dict, inputs, masks, policies, values, stats, requests, responses,
+           max_batch_size, max_wait_ms, num_threads):
+    """Hauptschleife des Server-Prozesses."""
+    try:
+        torch.set_num_threads(num_threads)
+        model = AlphaZeroNet()
+        model.load_state_dict(state_dict)
+        model.eval()
+        stats[_STAT_START] = time.perf_counter()
+
+        running = True
+        while running:
+            msg = requests.get()
+            if msg is None:
+                break
+            pending = [msg]
+            count = msg[1]
+            first = time.perf_counter()
+            deadline = first + max_wait_ms / 1000.0
+            # Weitere Anfragen sammeln, bis der Batch voll oder die Wartezeit um ist
+            while count < max_batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    msg = requests.get(timeout=timeout) if timeout > 0 else requests.get_nowait()
+                except queue.Empty:
+                    break
+                if msg is None:
+                    running = False
+                    break
+                pending.append(msg)
+                count += msg[1]
+
+            start = time.perf_counter()
+            batch = torch.cat([inputs[slot, :k] for slot, k in pending])
+            batch_masks = torch.cat([masks[slot, :k] for slot, k in pending])
+            with torch.no_grad():
+                policy, value = model(batch, batch_masks)
+            value = value.view(-1)
+            offset = 0
+            for slot, k in pending:
+                policies[slot, :k] = policy[offset:offset + k]
+                values[slot, :k] = value[offset:offset + k]
+                offset += k
+                responses[slot].put(k)
+
+            stats[_STAT_BATCHES] += 1
+            stats[_STAT_LEAVES] += count
+            stats[_STAT_BUSY] += time.perf_counter() - start
+            stats[_STAT_WAIT] += start - first
+    except BaseException:
+        # Wartende Clients nicht hängen lassen: jeder Slot bekommt eine Fehlerantwort
+        for response in responses:
+            response.put(_SERVER_FAILED)
+        raise
+    finally:
+        stats[_STAT_END] = time.perf_counter()
+        stats[_STAT_ALIVE] = 0
@@ -0,0 +1,201 @@
+# mcts_arrays.py
+# Array-basierter MCTS-Baum (Struct-of-Arrays) als Alternative zu AlphaZeroMCTSNode
+import copy
+import math
+import numpy as np
+from neural_network import IncrementalEncoder, decode_action, legal_actions
+
+
+class ArrayTree:
+    """
+    MCTS-Baum in vorab allozierten NumPy-Arrays.
+
+    Jeder Knoten ist ein Index; Besuche, Wertsummen, Priors, Eltern, erster
+    Kindindex, Anzahl Kinder und Move-ID liegen in je einem Array. Die Kinder
+    eines Knotens belegen einen zusammenhängenden Bereich, so dass die
+    PUCT-Auswahl ein einziger vektorisierter argmax ist. Die Arrays wachsen
+    bei Bedarf (Verdopplung).
+    """
+
+    def __init__(self, capacity=4096):
+        self.size = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.visit_count = np.zeros(capacity, dtype=np.int32)
+        self.value_sum = np.zeros(capacity, dtype=np.float64)
+        self.prior = np.zeros(capacity, dtype=np.float32)
+        self.parent = np.full(capacity, -1, dtype=np.int32)
+        self.first_child = np.full(capacity, -1, dtype=np.int32)
+        self.num_children = np.zeros(capacity, dtype=np.int32)
+        self.move_id = np.full(capacity, -1, dtype=np.int32)
+
+    @property
+    def capacity(self):
+        return len(self.visit_count)
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        old = (self.visit_count, self.value_sum, self.prior, self.parent,
+               self.first_child, self.num_children, self.move_id)
+        self._allocate(capacity)
+        new = (self.visit_count, self.value_sum, self.prior, self.parent,
+               self.first_child, self.num_children, self.move_id)
+        for src, dst in zip(old, new):
+            dst[:self.size] = src[:self.size]
+
+    def add_root(self):
+        if self.size + 1 > self.capacity:
+            self._grow(self.size + 1)
+        self.size += 1
+        return self.size - 1
+
+    def is_expanded(self, node):
+        return self.first_child[node] >= 0
+
+    def add_children(self, node, move_ids, priors):
+        """Legt die Kinder eines Knotens als zusammenhängenden Block an."""
+        k = len(move_ids)
+        start = self.size
+        if start + k > self.capacity:
+            self._grow(start + k)
+        end = start + k
+        self.parent[start:end] = node
+        self.move_id[start:end] = move_ids
+        self.prior[start:end] = priors
+        self.first_child[node] = start
+        self.num_children[node] = k
+        self.size = end
+
+    def children(self, node):
+        start = self.first_child[node]
+        return range(start, start + self.num_children[node]) if start >= 0 else range(0)
+
+    def select_child(self, node, c_puct):
+        """PUCT-Auswahl über alle Kinder mit einem argmax (unbesuchte Kinder zuerst)."""
+        start = self.first_child[node]
+        end = start + self.num_children[node]
+        visits = self.visit_count[start:end]
+        unvisited = np.flatnonzero(visits == 0)
+        if len(unvisited):
+            return start + int(unvisited[0])
+        exploitation = self.value_sum[start:end] / visits
+        exploration = c_puct * self.prior[start:end] * math.sqrt(self.visit_count[node]) / (1 + visits)
+        return start + int(np.argmax(exploitation + exploration))
+
+    def backpropagate(self, path, value):
+        """
+        Aktualisiert alle Knoten eines Pfads (Wurzel zuerst).
+
+        value ist aus Sicht des Spielers am Zug im Blatt; jeder Knoten speichert
+        den Wert aus Sicht des Spielers, der in ihn gezogen hat (wie
+        AlphaZeroEngine._backpropagate).
+        """
+        path = np.asarray(path, dtype=np.int64)
+        # Blatt: -value, dessen Eltern: +value, usw.
+        distance = len(path) - 1 - np.arange(len(path))
+        signs = np.where(distance % 2 == 0, -1.0, 1.0)
+        self.visit_count[path] += 1
+        self.value_sum[path] += signs * value
+
+    def memory_bytes(self):
+        return sum(a.nbytes for a in (self.visit_count, self.value_sum, self.prior, self.parent,
+                                      self.first_child, self.num_children, self.move_id))
+
+
+class ArrayMCTS:
+    """
+    AlphaZero-Suche auf einem ArrayTree.
+
+    Statt Spielzustände pro Knoten zu speichern, wird ein einziger GameState
+    mit push()/pop() entlang des gewählten Pfads bewegt; ein IncrementalEncoder
+    folgt ihm Feld für Feld. Netzwerk-Auswertungen laufen über
+    AlphaZeroEngine.evaluate_state (inklusive Auswertungs-Cache).
+    """
+
+    def __init__(self, engine, capacity=4096):
+        self.engine = engine
+        self.tree = ArrayTree(capacity)
+        self.encoder = IncrementalEncoder()
+
+    def _expand(self, node, state, player):
+        """Erweitert einen Knoten; gibt den Netzwerk-Value zurück (None ohne gültige Züge)."""
+        valid_moves = state.get_valid_moves(player)
+        if not valid_moves:
+            self.tree.first_child[node] = self.tree.size
+            return None
+        _, action_ids = legal_actions(valid_moves)
+        priors, value = self.engine.evaluate_state(state, player, action_ids, encoder=self.encoder)
+        self.tree.add_children(node, action_ids, priors)
+        return value
+
+    def search(self, game_state, player_id, num_simulations, c_puct, control=None):
+        """
+        Führt num_simulations Simulationen ab game_state aus.
+
+        control (SearchControl, optional) erhält den Fortschritt und kann die
+        Suche vorzeitig beenden.
+
+        Returns:
+            (Züge der Wurzelkinder, Besuchszahlen der Wurzelkinder)
+        """
+        tree = self.tree
+        state = copy.deepcopy(game_state)
+        self.encoder.reset(state)
+        root = tree.add_root()
+        if self._expand(root, state, player_id) is None:
+            return [], []
+
+        if control is not None:
+            control.report(0, total=num_simulations)
+        for done in range(num_simulations):
+            if control is not None and control.stop_requested:
+                break
+            node = root
+            path = [root]
+            moves = []
+            # 1. SELECTION: Zustand per push() mitführen (keine Kopien)
+            while tree.num_children[node] > 0 and not state.game_over:
+                node = tree.select_child(node, c_puct)
+                move = decode_action(int(tree.move_id[node]), state.pfarrer_pos)
+                state.push(move)
+                self.encoder.update(state, move)
+                moves.append(move)
+                path.append(node)
+
+            depth = len(path) - 1
+            current_player = player_id if depth % 2 == 0 else (1 if player_id == 2 else 2)
+
+            # 2./3. EXPANSION + EVALUATION
+            value = None
+            if not state.game_over and not tree.is_expanded(node):
+                value = self._expand(node, state, current_player)
+            elif tree.num_children[node] > 0:
+                _, action_ids = legal_actions(state.get_valid_moves(current_player))
+                _, value = self.engine.evaluate_state(state, current_player, action_ids, encoder=self.encoder)
+            if value is None:
+                # Fallback: Heuristische Bewertung
+                value = np.tanh(state.evaluate_score(state.board, current_player) / 100.0)
+
+            # Prüfe Siegbedingung
+            if state.check_win(current_player):
+                value = 1.0
+            elif state.check_win(1 if current_player == 2 else 2):
+                value = -1.0
+
+            # 4. BACKPROPAGATION
+            tree.backpropagate(path, value)
+            for move in reversed(moves):
+                state.pop()
+                self.encoder.update(state, move)
+            if control is not None:
+                start = tree.first_child[root]
+                best = start + int(np.argmax(tree.visit_count[start:start + tree.num_children[root]]))
+                control.report(done + 1, best_move=decode_action(int(tree.move_id[best]), game_state.pfarrer_pos))
+
+        children = tree.children(root)
+        moves = [decode_action(int(tree.move_id[c]), game_state.pfarrer_pos) for c in children]
+        visit_counts = [int(tree.visit_count[c]) for c in children]
+        return moves, visit_counts
@@ -0,0 +1,169 @@
+# model_export.py
+# Export von AlphaZeroNet als eingefrorenes TorchScript-Artefakt (BatchNorm gefaltet, Köpfe fusioniert)
+#
+# Aufruf:  python model_export.py [models/alphazero_model.pth]
+import os
+import sys
+import time
+import warnings
+from typing import Optional
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from config import ROWS, COLS
+from neural_network import AlphaZeroNet, MASK_FILL_VALUE
+
+
+def frozen_path(model_path):
+    """Pfad des Inferenz-Artefakts zu einem state_dict-Pfad (models/x.pth -> models/x_frozen.pt)."""
+    return os.path.splitext(model_path)[0] + '_frozen.pt'
+
+
+def cpu_copy(model):
+    """Eval-Kopie von model auf der CPU (das Original bleibt auf seinem Gerät und in seinem Modus)."""
+    copy = AlphaZeroNet()
+    copy.load_state_dict({k: v.detach().cpu() for k, v in model.state_dict().items()})
+    return copy.eval()
+
+
+def fold_batchnorm(conv, bn):
+    """Faltet eine BatchNorm (eval) in die vorangehende Convolution und gibt die neue Conv zurück."""
+    scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+    fused = nn.Conv2d(conv.in_channels, conv.out_channels, conv.kernel_size, padding=conv.padding)
+    bias = conv.bias if conv.bias is not None else torch.zeros_like(bn.running_mean)
+    with torch.no_grad():
+        fused.weight.copy_(conv.weight * scale.reshape(-1, 1, 1, 1))
+        fused.bias.copy_((bias - bn.running_mean) * scale + bn.bias)
+    return fused
+
+
+def apply_legal_mask(policy, legal_mask, fill_value: float):
+    """Wie masked_log_softmax, aber mit dem Füllwert als Argument (TorchScript kennt keine globalen Floats)."""
+    mask = legal_mask.to(torch.bool).reshape(policy.shape)
+    mask = mask | ~mask.any(dim=-1, keepdim=True)
+    return F.log_softmax(policy.masked_fill(~mask, fill_value), dim=-1)
+
+
+class InferenceNet(nn.Module):
+    """
+    Reine Inferenz-Variante von AlphaZeroNet.
+
+    Übernimmt die Linear-Schichten von model und setzt es in den eval-Modus;
+    für ein Modell, das weiter benutzt wird, mit cpu_copy(model) aufrufen.
+
+    Alle BatchNorms sind in die Convolutions gefaltet, die beiden
+    1x1-Convolutions von Policy- und Value-Kopf laufen als eine Convolution,
+    und forward() erwartet bereits [B, 17, ROWS, COLS] (ohne die
+    Form-Korrekturen von AlphaZeroNet.forward). Ausgaben wie AlphaZeroNet.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        model = model.eval()
+        self.conv1 = fold_batchnorm(model.conv1, model.bn1)
+        self.conv2 = fold_batchnorm(model.conv2, model.bn2)
+        self.conv3 = fold_batchnorm(model.conv3, model.bn3)
+        self.conv4 = fold_batchnorm(model.conv4, model.bn4)
+        policy_conv = fold_batchnorm(model.policy_conv, model.policy_bn)
+        value_conv = fold_batchnorm(model.value_conv, model.value_bn)
+        self.head_channels = policy_conv.out_channels
+        self.head_conv = nn.Conv2d(policy_conv.in_channels, 2 * self.head_channels, kernel_size=1)
+        with torch.no_grad():
+            self.head_conv.weight.copy_(torch.cat([policy_conv.weight, value_conv.weight]))
+            self.head_conv.bias.copy_(torch.cat([policy_conv.bias, value_conv.bias]))
+        self.policy_fc = model.policy_fc
+        self.value_fc1 = model.value_fc1
+        self.value_fc2 = model.value_fc2
+        self.mask_fill_value = float(MASK_FILL_VALUE)
+
+    def forward(self, x, legal_mask: Optional[torch.Tensor] = None):
+        x = F.relu(self.conv1(x))
+        x = F.relu(self.conv2(x))
+        x = F.relu(self.conv3(x))
+        x = F.relu(self.conv4(x))
+        heads = F.relu(self.head_conv(x))
+        p = heads[:, :self.head_channels].flatten(1)
+        v = heads[:, self.head_channels:].flatten(1)
+
+        policy = self.policy_fc(p)
+        if legal_mask is not None:
+            policy = apply_legal_mask(policy, legal_mask, self.mask_fill_value)
+
+        value = torch.tanh(self.value_fc2(F.relu(self.value_fc1(v))))
+        return policy, value.squeeze()
+
+
+def export_frozen(model, path):
+    """Schreibt InferenceNet(model) als eingefrorenes TorchScript-Modul nach path (model bleibt unverändert)."""
+    fused = InferenceNet(cpu_copy(model)).eval()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)  # torch.jit ist als veraltet markiert, aber weiter verfügbar
+        scripted = torch.jit.freeze(torch.jit.script(fused))
+        torch.jit.save(scripted, path)
+    return scripted
+
+
+def load_frozen(path, device='cpu'):
+    """
+    Lädt ein mit export_frozen geschriebenes Artefakt.
+
+    Auf der CPU wird es zusätzlich mit optimize_for_inference (oneDNN-Layout,
+    Conv+ReLU fusioniert) vorbereitet. Das Ergebnis lässt sich nicht
+    speichern, deshalb passiert es erst beim Laden (~10 ms).
+    """
+    device = torch.device(device)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)
+        module = torch.jit.load(path, map_location=device)
+        if device.type == 'cpu':
+            module = torch.jit.optimize_for_inference(module)
+    return module
+
+
+def is_current(model_path, artifact_path):
+    """True, wenn das Artefakt existiert und nicht älter als das state_dict ist."""
+    return (os.path.exists(artifact_path)
+            and (not os.path.exists(model_path) or os.path.getmtime(artifact_path) >= os.path.getmtime(model_path)))
+
+
+def compare(model, frozen, num_inputs=64, repeat=200):
+    """Maximale Abweichung der Ausgaben und Latenz bei Batchgröße 1 (eager vs. eingefroren)."""
+    model.eval()
+    x = torch.rand(num_inputs, 17, ROWS, COLS)
+    mask = torch.rand(num_inputs, model.policy_fc.out_features) < 0.05
+    with torch.no_grad():
+        p1, v1 = model(x, mask)
+        p2, v2 = frozen(x, mask)
+        latencies = []
+        for net in (model, frozen):
+            single = x[:1]
+            for _ in range(10):
+                net(single)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                net(single)
+            latencies.append((time.perf_counter() - start) / repeat * 1000.0)
+    return (p1 - p2).abs().max().item(), (v1 - v2).abs().max().item(), latencies
+
+
+def main():
+    model_path = sys.argv[1] if len(sys.argv) > 1 else "models/alphazero_model.pth"
+    if not os.path.exists(model_path):
+        print(f"❌ Modell nicht gefunden: {model_path}")
+        return
+    model = AlphaZeroNet()
+    model.load_state_dict(torch.load(model_path, map_location='cpu'))
+    model.eval()
+
+    path = frozen_path(model_path)
+    export_frozen(model, path)
+    frozen = load_frozen(path)
+    policy_error, value_error, (eager_ms, frozen_ms) = compare(model, frozen)
+    print(f"✅ Inferenz-Artefakt gespeichert: {path}")
+    print(f"   Abweichung Policy: {policy_error:.2e} | Value: {value_error:.2e}")
+    print(f"   Latenz (Batch 1): eager {eager_ms:.2f} ms | eingefroren {frozen_ms:.2f} ms "
+          f"(x{eager_ms / frozen_ms:.1f})")
+
+
+if __name__ == "__main__":
+    main()
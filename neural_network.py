@@ -4,6 +4,7 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 import numpy as np
+from collections import namedtuple
 from game_logic import GameState
 from config import ROWS, COLS
 
@@ -13,13 +14,10 @@ class AlphaZeroNet(nn.Module):
     def __init__(self, input_channels=17, num_actions=None):
         super(AlphaZeroNet, self).__init__()
         
-        # Berechne num_actions automatisch falls nicht angegeben
+        # Platzierungszüge (7*7*3*2) + Bewegungszüge (7*7*7*7-49) + Pfarrer (7*7)
+        # = 294 + 2352 + 49 = 2695
         if num_actions is None:
-            # Berechne: Platzierungszüge (7*7*3*2) + Bewegungszüge (7*7*7*7-49) + Pfarrer (7*7)
-            # = 294 + 2352 + 49 = 2695
-            move_map = create_move_index_map()
-            num_actions = len(move_map)
-            print(f"📊 Neural Network: num_actions automatisch auf {num_actions} gesetzt")
+            num_actions = NUM_ACTIONS
         
         # Convolutional Layers für Board-Verarbeitung
         self.conv1 = nn.Conv2d(input_channels, 64, kernel_size=3, padding=1)
@@ -45,7 +43,17 @@ class AlphaZeroNet(nn.Module):
         self.value_fc1 = nn.Linear(32 * ROWS * COLS, 256)
         self.value_fc2 = nn.Linear(256, 1)
         
-    def forward(self, x):
+    def forward(self, x, legal_mask=None):
+        """
+        Args:
+            x: Eingabe [batch, 17, 7, 7]
+            legal_mask: Optionale Bool-Maske [batch, num_actions] der gültigen
+                Aktionen; dann ist die Policy-Ausgabe die maskierte Log-Softmax
+                statt roher Logits
+        
+        Returns:
+            (policy, value)
+        """
         # Board hat Shape: [batch_size, channels, height, width]
         # Erwartet: [batch, 17, 7, 7]
         
@@ -79,6 +87,8 @@ class AlphaZeroNet(nn.Module):
         p = F.relu(self.policy_bn(self.policy_conv(x)))
         p = p.view(p.size(0), -1)
         policy = self.policy_fc(p)
+        if legal_mask is not None:
+            policy = masked_log_softmax(policy, legal_mask)
         
         # Value Head
         v = F.relu(self.value_bn(self.value_conv(x)))
@@ -88,10 +98,232 @@ class AlphaZeroNet(nn.Module):
         
         return policy, value.squeeze()
 
+# Kompakte Brettdarstellung: ein int8-Code pro Feld (0 = leer)
+STONE_TYPES = ('Haus', 'Turm', 'Schiff')
+STONE_CODES = {
+    (spieler, typ, ausrichtung): 1 + (spieler - 1) * 6 + t * 2 + o
+    for spieler in (1, 2)
+    for t, typ in enumerate(STONE_TYPES)
+    for o, ausrichtung in enumerate(('vertikal', 'horizontal'))
+}
+
+# Code -> Werte der Steinkanäle 0-9 (Typ und Ausrichtung je Spieler)
+_PIECE_PLANES = np.zeros((len(STONE_CODES) + 1, 10), dtype=np.float32)
+for (_spieler, _typ, _ausrichtung), _code in STONE_CODES.items():
+    _base = 0 if _spieler == 1 else 5
+    _PIECE_PLANES[_code, _base + STONE_TYPES.index(_typ)] = 1.0
+    _PIECE_PLANES[_code, _base + (3 if _ausrichtung == 'vertikal' else 4)] = 1.0
+
+
+def stone_code(stone):
+    """Code eines Spielsteins (0 für leeres Feld)."""
+    if stone is None:
+        return 0
+    ausrichtung = 'vertikal' if stone.ausrichtung == 'vertikal' else 'horizontal'
+    return STONE_CODES[(stone.spieler, stone.typ, ausrichtung)]
+
+
+def compact_board(game_state):
+    """Brett als int8-Array [ROWS, COLS] mit einem Steincode pro Feld."""
+    return np.array([[stone_code(stone) for stone in row] for row in game_state.board], dtype=np.int8)
+
+
+class CompactState(namedtuple('CompactState', 'codes pfarrer_pos unplaced_p1 unplaced_p2 turn')):
+    """Kompakte, netzwerkrelevante Sicht auf einen GameState (siehe compact_state)."""
+    __slots__ = ()
+
+
+def compact_state(game_state):
+    return CompactState(compact_board(game_state), game_state.pfarrer_pos,
+                        len(game_state.unplaced_pieces[1]), len(game_state.unplaced_pieces[2]),
+                        game_state.turn)
+
+
+def encode_compact(codes, pfarrer_pos, unplaced_p1, unplaced_p2, turn, current_player, out=None):
+    """
+    Kodiert eine kompakte Stellung in die 17 Eingabeebenen (NumPy, ohne Schleife über Felder).
+    
+    Args:
+        codes: Steincodes [ROWS, COLS] (siehe compact_board)
+        pfarrer_pos: Position des Pfarrers (1-basiert)
+        unplaced_p1, unplaced_p2: Anzahl ungelegter Steine
+        turn: Spieler am Zug laut Spielzustand
+        current_player: Perspektive der Kodierung
+        out: Optionales float32-Array [17, ROWS, COLS], das überschrieben wird
+    
+    Returns:
+        float32-Array [17, ROWS, COLS]
+    """
+    if out is None:
+        out = np.empty((17, ROWS, COLS), dtype=np.float32)
+    out[:10] = _PIECE_PLANES[codes].transpose(2, 0, 1)
+    out[10:] = 0.0
+    out[10, pfarrer_pos[0] - 1, pfarrer_pos[1] - 1] = 1.0
+    out[11 if current_player == 1 else 12] = 1.0
+    out[13] = unplaced_p1 / 9.0
+    out[14] = unplaced_p2 / 9.0
+    out[15] = 1.0 if unplaced_p1 > 0 or unplaced_p2 > 0 else 0.0
+    out[16] = turn / 2.0
+    return out
+
+
 def encode_board_state(game_state, current_player):
     """
     Kodiert den Spielzustand in einen Tensor.
     
+    Args:
+        game_state: GameState Objekt
+        current_player: Aktueller Spieler (1 oder 2)
+    
+    Returns:
+        Tensor der Form [channels, rows, cols]
+    """
+    planes = encode_compact(compact_board(game_state), game_state.pfarrer_pos,
+                            len(game_state.unplaced_pieces[1]), len(game_state.unplaced_pieces[2]),
+                            game_state.turn, current_player)
+    return torch.from_numpy(planes)
+
+
+class IncrementalEncoder:
+    """
+    Hält die Steincodes einer Stellung und aktualisiert nur die Felder, die
+    ein Zug verändert hat (für push()/pop()-Suchen).
+    
+    update(game_state, move) wird nach push(move) und ebenso nach pop()
+    mit demselben Zug aufgerufen; beide Male ändern sich dieselben Felder.
+    """
+    
+    def __init__(self, game_state=None):
+        self.codes = np.zeros((ROWS, COLS), dtype=np.int8)
+        self.game_state = None
+        if game_state is not None:
+            self.reset(game_state)
+    
+    def reset(self, game_state):
+        self.game_state = game_state
+        self.codes[:] = compact_board(game_state)
+    
+    def update(self, game_state, move):
+        """Liest die von move betroffenen Felder neu ein."""
+        self.game_state = game_state
+        board = game_state.board
+        if move['type'] == 'place':
+            squares = (move['pos'],)
+        else:
+            squares = (move['from'], move['to'])
+        for r, c in squares:
+            self.codes[r - 1, c - 1] = stone_code(board[r - 1][c - 1])
+    
+    def encode(self, current_player, out=None):
+        """Eingabetensor [17, ROWS, COLS] der aktuellen Stellung."""
+        state = self.game_state
+        planes = encode_compact(self.codes, state.pfarrer_pos,
+                                len(state.unplaced_pieces[1]), len(state.unplaced_pieces[2]),
+                                state.turn, current_player, out)
+        return torch.from_numpy(planes)
+
+
+class BatchEncoder:
+    """
+    Kodiert viele Stellungen in einen vorab allozierten Puffer [B, 17, ROWS, COLS].
+    
+    Der Puffer wird bei jedem Aufruf wiederverwendet: das Ergebnis von encode()
+    ist eine Sicht darauf und gilt nur bis zum nächsten Aufruf. Pro Stellung
+    werden nur die Steincodes geschrieben, alle Ebenen entstehen danach in
+    einem Schritt für den ganzen Batch.
+    
+    Args:
+        max_batch: Anfangsgröße des Puffers (wächst bei Bedarf)
+        pin_memory: Puffer im page-locked Speicher anlegen (nur mit CUDA)
+    """
+    
+    def __init__(self, max_batch=256, pin_memory=False):
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+        self._allocate(max_batch)
+    
+    def _allocate(self, max_batch):
+        self.max_batch = max_batch
+        self.buffer = torch.empty((max_batch, 17, ROWS, COLS), dtype=torch.float32, pin_memory=self.pin_memory)
+        self._planes = self.buffer.numpy()
+        self._codes = np.zeros((max_batch, ROWS, COLS), dtype=np.int8)
+        self._pfarrer = np.zeros((max_batch, 2), dtype=np.int64)
+        self._scalars = np.zeros((max_batch, 4), dtype=np.float64)  # ungelegt P1, P2, turn, Spieler
+    
+    def encode(self, states, players):
+        """
+        Kodiert states in den Puffer.
+        
+        Args:
+            states: Folge von GameStates oder CompactStates
+            players: Perspektive (1 oder 2) für alle oder eine Folge pro Stellung
+        
+        Returns:
+            Tensor [len(states), 17, ROWS, COLS] (Sicht auf den Puffer)
+        """
+        n = len(states)
+        if n > self.max_batch:
+            self._allocate(max(n, 2 * self.max_batch))
+        if isinstance(players, int):
+            players = [players] * n
+        
+        codes = self._codes[:n]
+        scalars = self._scalars[:n]
+        for i, (state, player) in enumerate(zip(states, players)):
+            if isinstance(state, CompactState):
+                codes[i] = state.codes
+                self._pfarrer[i] = state.pfarrer_pos
+                scalars[i] = (state.unplaced_p1, state.unplaced_p2, state.turn, player)
+            else:
+                codes[i] = [[stone_code(stone) for stone in row] for row in state.board]
+                self._pfarrer[i] = state.pfarrer_pos
+                scalars[i] = (len(state.unplaced_pieces[1]), len(state.unplaced_pieces[2]), state.turn, player)
+        return self._fill_planes(n)
+    
+    def encode_arrays(self, codes, pfarrer_pos, unplaced, turn, players):
+        """
+        Kodiert eine Stellungsmenge, die bereits als Arrays vorliegt (ohne Schleife).
+        
+        Args:
+            codes: Steincodes [B, ROWS, COLS]
+            pfarrer_pos: Pfarrer-Positionen [B, 2] (1-basiert)
+            unplaced: Ungelegte Steine [B, 2] (Spieler 1, Spieler 2)
+            turn: Spieler am Zug [B]
+            players: Perspektive [B]
+        
+        Returns:
+            Tensor [B, 17, ROWS, COLS] (Sicht auf den Puffer)
+        """
+        n = len(codes)
+        if n > self.max_batch:
+            self._allocate(max(n, 2 * self.max_batch))
+        self._codes[:n] = codes
+        self._pfarrer[:n] = pfarrer_pos
+        self._scalars[:n, :2] = unplaced
+        self._scalars[:n, 2] = turn
+        self._scalars[:n, 3] = players
+        return self._fill_planes(n)
+    
+    def _fill_planes(self, n):
+        """Erzeugt alle Ebenen der ersten n Einträge aus Codes, Pfarrer und Skalaren."""
+        codes = self._codes[:n]
+        scalars = self._scalars[:n]
+        out = self._planes[:n]
+        out[:, :10] = _PIECE_PLANES[codes].transpose(0, 3, 1, 2)
+        out[:, 10:] = 0.0
+        out[np.arange(n), 10, self._pfarrer[:n, 0] - 1, self._pfarrer[:n, 1] - 1] = 1.0
+        out[:, 11] = (scalars[:, 3] == 1)[:, None, None]
+        out[:, 12] = (scalars[:, 3] != 1)[:, None, None]
+        out[:, 13] = (scalars[:, 0] / 9.0)[:, None, None]
+        out[:, 14] = (scalars[:, 1] / 9.0)[:, None, None]
+        out[:, 15] = ((scalars[:, 0] > 0) | (scalars[:, 1] > 0))[:, None, None]
+        out[:, 16] = (scalars[:, 2] / 2.0)[:, None, None]
+        return self.buffer[:n]
+
+
+def _encode_board_state_reference(game_state, current_player):
+    """
+    Ursprüngliche, elementweise Kodierung (Referenz für encode_board_state).
+    
     Args:
         game_state: GameState Objekt
         current_player: Aktueller Spieler (1 oder 2)
@@ -168,99 +400,200 @@ def encode_board_state(game_state, current_player):
     
     return tensor
 
-def create_move_index_map():
-    """
-    Erstellt eine Mapping von Moves zu Indizes.
-    
-    Returns:
-        Dictionary mit Move-String -> Index Mapping
-    """
-    move_index_map = {}
-    index = 0
-    
+# --- Aktions-Codec: Zug <-> ganzzahlige Aktions-ID (einmal pro Prozess aufgebaut) ---
+ORIENTATIONS = ('vertikal', 'horizontal')
+NUM_SQUARES = ROWS * COLS
+NUM_PLACE_ACTIONS = NUM_SQUARES * len(STONE_TYPES) * len(ORIENTATIONS)
+NUM_MOVE_ACTIONS = NUM_SQUARES * (NUM_SQUARES - 1)
+NUM_ACTIONS = NUM_PLACE_ACTIONS + NUM_MOVE_ACTIONS + NUM_SQUARES
+_TYPE_INDEX = {typ: i for i, typ in enumerate(STONE_TYPES)}
+
+
+def _build_action_tables():
+    """ID -> Move-String und ID -> (Typ, Parameter...) in der Reihenfolge der Netzwerkausgabe."""
+    strings = []
+    actions = []
     # Platzierungszüge
     for r in range(1, ROWS + 1):
         for c in range(1, COLS + 1):
-            for stone_type in ['Haus', 'Turm', 'Schiff']:
-                for orientation in ['vertikal', 'horizontal']:
-                    move_str = f"place_{r}_{c}_{stone_type}_{orientation}"
-                    move_index_map[move_str] = index
-                    index += 1
-    
+            for stone_type in STONE_TYPES:
+                for orientation in ORIENTATIONS:
+                    strings.append(f"place_{r}_{c}_{stone_type}_{orientation}")
+                    actions.append(('place', (r, c), stone_type, orientation))
     # Bewegungszüge
     for r1 in range(1, ROWS + 1):
         for c1 in range(1, COLS + 1):
             for r2 in range(1, ROWS + 1):
                 for c2 in range(1, COLS + 1):
                     if (r1, c1) != (r2, c2):
-                        move_str = f"move_{r1}_{c1}_{r2}_{c2}"
-                        move_index_map[move_str] = index
-                        index += 1
-    
+                        strings.append(f"move_{r1}_{c1}_{r2}_{c2}")
+                        actions.append(('move', (r1, c1), (r2, c2)))
     # Pfarrer-Austauschzüge
     for r in range(1, ROWS + 1):
         for c in range(1, COLS + 1):
-            move_str = f"pfarrer_{r}_{c}"
-            move_index_map[move_str] = index
-            index += 1
+            strings.append(f"pfarrer_{r}_{c}")
+            actions.append(('pfarrer', (r, c)))
+    return strings, actions
+
+
+ACTION_STRINGS, _ACTIONS = _build_action_tables()
+MOVE_INDEX_MAP = {move_str: idx for idx, move_str in enumerate(ACTION_STRINGS)}
+
+
+def encode_action(move):
+    """Aktions-ID eines Zugs (Platzierung ohne Orientierung zählt als 'vertikal')."""
+    move_type = move['type']
+    if move_type == 'place':
+        r, c = move['pos']
+        orientation = 0 if move.get('orientation', 'vertikal') == 'vertikal' else 1
+        return ((r - 1) * COLS + c - 1) * 6 + _TYPE_INDEX[move['stone_type']] * 2 + orientation
+    src = (move['from'][0] - 1) * COLS + move['from'][1] - 1
+    if move_type == 'move':
+        dst = (move['to'][0] - 1) * COLS + move['to'][1] - 1
+        return NUM_PLACE_ACTIONS + src * (NUM_SQUARES - 1) + (dst if dst < src else dst - 1)
+    if move_type == 'pfarrer':
+        return NUM_PLACE_ACTIONS + NUM_MOVE_ACTIONS + src
+    raise ValueError(f"Unbekannter Zugtyp: {move_type}")
+
+
+def decode_action(action_id, pfarrer_pos=None):
+    """Zug-Dictionary zu einer Aktions-ID (Pfarrer-Züge brauchen die Pfarrer-Position)."""
+    action = _ACTIONS[action_id]
+    if action[0] == 'place':
+        return {'type': 'place', 'pos': action[1], 'stone_type': action[2], 'orientation': action[3]}
+    if action[0] == 'move':
+        return {'type': 'move', 'from': action[1], 'to': action[2]}
+    return {'type': 'pfarrer', 'from': action[1], 'to': pfarrer_pos}
+
+
+def legal_actions(valid_moves):
+    """
+    Konkrete Züge und ihre Aktions-IDs zu get_valid_moves().
+    
+    Platzierungen ohne Orientierung werden wie in der Suche in beide
+    Orientierungen aufgeteilt.
+    
+    Returns:
+        (Liste der Züge, int64-Array der Aktions-IDs)
+    """
+    moves = []
+    for move in valid_moves:
+        if move['type'] == 'place' and 'orientation' not in move:
+            for orientation in ORIENTATIONS:
+                with_orientation = move.copy()
+                with_orientation['orientation'] = orientation
+                moves.append(with_orientation)
+        else:
+            moves.append(move)
+    return moves, np.fromiter((encode_action(m) for m in moves), dtype=np.int64, count=len(moves))
+
+
+def action_priors(policy_logits, action_ids):
+    """
+    Priors der Aktionen action_ids: Softmax über alle Logits, ein Gather,
+    Renormalisierung auf die übergebenen Aktionen.
+    
+    Returns:
+        float32-Array, ausgerichtet an action_ids
+    """
+    if len(action_ids) == 0:
+        return np.zeros(0, dtype=np.float32)
+    probs = F.softmax(policy_logits.reshape(-1), dim=-1)
+    priors = probs[torch.from_numpy(np.asarray(action_ids, dtype=np.int64))].cpu().numpy()
+    total = priors.sum()
+    if total > 0:
+        return priors / total
+    return np.full(len(priors), 1.0 / len(priors), dtype=np.float32)
+
+
+def legal_action_mask(game_state, player, out=None):
+    """
+    Bool-Maske [NUM_ACTIONS] der gültigen Aktionen von player in game_state.
+    
+    Args:
+        out: Optionales Bool-Array, das überschrieben wird
+    """
+    if out is None:
+        out = np.zeros(NUM_ACTIONS, dtype=bool)
+    else:
+        out[:] = False
+    _, action_ids = legal_actions(game_state.get_valid_moves(player))
+    out[action_ids] = True
+    return out
+
+
+def legal_action_masks(states, players, out=None, action_ids=None):
+    """
+    Bool-Masken [B, NUM_ACTIONS] für viele Stellungen.
     
-    # Berechne und zeige Gesamtzahl
-    total_moves = len(move_index_map)
-    print(f"📊 Move-Index-Map: {total_moves} mögliche Züge erstellt")
+    Ohne action_ids erzeugt BatchEnv.legal_masks die Masken vektorisiert aus
+    den Regeln (ohne get_valid_moves und ohne Schleife über Züge). Mit
+    action_ids (die Suche kennt sie schon, weil sie für die Kinder ohnehin
+    die Zug-Dictionaries braucht) genügt ein einziger Scatter.
     
-    return move_index_map
+    Args:
+        states: Folge von GameStates
+        players: Spieler (1 oder 2) für alle oder eine Folge pro Stellung
+        out: Optionales Bool-Array [>= B, NUM_ACTIONS], das wiederverwendet wird
+        action_ids: Bereits bekannte Aktions-IDs pro Stellung
+    """
+    n = len(states)
+    if isinstance(players, int):
+        players = [players] * n
+    if out is None:
+        out = np.zeros((n, NUM_ACTIONS), dtype=bool)
+    else:
+        out = out[:n]
+    if action_ids is None:
+        from batch_env import BatchEnv  # batch_env importiert dieses Modul
+        if n:
+            BatchEnv.from_game_states(states).legal_masks(np.asarray(players, dtype=np.int64), out=out)
+        return out
+    out[:] = False
+    rows = np.repeat(np.arange(n), [len(a) for a in action_ids])
+    if len(rows):
+        out[rows, np.concatenate(action_ids)] = True
+    return out
+
+
+# Wert für ungültige Aktionen vor der Log-Softmax (endlich, damit kl_div keine NaNs liefert)
+MASK_FILL_VALUE = -1e9
+
 
-def get_move_probabilities(policy_logits, valid_moves, move_index_map):
+def masked_log_softmax(policy_logits, legal_mask):
+    """
+    Log-Softmax nur über die gültigen Aktionen.
+    
+    Ungültige Aktionen erhalten praktisch keine Wahrscheinlichkeit. Zeilen
+    ganz ohne gültige Aktion bleiben unmaskiert.
+    """
+    legal_mask = legal_mask.to(torch.bool).reshape(policy_logits.shape)
+    legal_mask = legal_mask | ~legal_mask.any(dim=-1, keepdim=True)
+    return F.log_softmax(policy_logits.masked_fill(~legal_mask, MASK_FILL_VALUE), dim=-1)
+
+
+def create_move_index_map():
+    """
+    Mapping von Move-Strings zu Aktions-IDs.
+    
+    Returns:
+        Dictionary mit Move-String -> Index Mapping (gemeinsame Tabelle, nicht verändern)
+    """
+    return MOVE_INDEX_MAP
+
+
+def get_move_probabilities(policy_logits, valid_moves, move_index_map=None):
     """
     Extrahiert Wahrscheinlichkeiten für gültige Züge.
     
     Args:
         policy_logits: Logits vom neuronalen Netzwerk [batch, num_actions]
         valid_moves: Liste gültiger Züge
-        move_index_map: Mapping von Moves zu Indizes
+        move_index_map: Nicht mehr benötigt (Aktions-Codec), nur aus Kompatibilität
     
     Returns:
         Dictionary mit Move-String -> Wahrscheinlichkeit
     """
-    # Softmax über alle Logits
-    policy_probs = F.softmax(policy_logits, dim=-1)
-    
-    # Extrahiere Wahrscheinlichkeiten für gültige Züge
-    move_probs = {}
-    
-    for move in valid_moves:
-        # Erstelle einen String-Key für den Move
-        if move['type'] == 'place':
-            orientation = move.get('orientation', 'vertikal')
-            move_str = f"place_{move['pos'][0]}_{move['pos'][1]}_{move['stone_type']}_{orientation}"
-        elif move['type'] == 'move':
-            move_str = f"move_{move['from'][0]}_{move['from'][1]}_{move['to'][0]}_{move['to'][1]}"
-        elif move['type'] == 'pfarrer':
-            move_str = f"pfarrer_{move['from'][0]}_{move['from'][1]}"
-        else:
-            continue
-        
-        if move_str in move_index_map:
-            idx = move_index_map[move_str]
-            # Prüfe ob Index im gültigen Bereich ist
-            if idx < policy_probs.size(1):
-                move_probs[move_str] = policy_probs[0, idx].item()
-            else:
-                # Index außerhalb des Bereichs - Fallback
-                print(f"⚠️  WARNUNG: Move-Index {idx} außerhalb des Netzwerk-Bereichs (max: {policy_probs.size(1)-1})")
-                move_probs[move_str] = 0.001
-        else:
-            # Fallback für unbekannte Züge
-            move_probs[move_str] = 0.001
-    
-    # Normalisiere, damit Summe = 1
-    total = sum(move_probs.values())
-    if total > 0:
-        for key in move_probs:
-            move_probs[key] /= total
-    else:
-        # Gleichverteilung falls alle 0
-        for key in move_probs:
-            move_probs[key] = 1.0 / len(move_probs)
-    
-    return move_probs
\ No newline at end of file
+    action_ids = np.fromiter((encode_action(m) for m in valid_moves), dtype=np.int64, count=len(valid_moves))
+    priors = action_priors(policy_logits, action_ids)
+    return {ACTION_STRINGS[idx]: float(p) for idx, p in zip(action_ids.tolist(), priors.tolist())}
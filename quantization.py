@@ -0,0 +1,227 @@
+# quantization.py
+# Int8-Inferenz für die CPU: statisch quantisierte Convolutions, dynamisch quantisierte Linear-Schichten
+#
+# Aufruf:  python quantization.py [models/alphazero_model.pth] [Anzahl Positionen]
+#          (kalibriert, prüft gegen das Float-Modell und schreibt models/..._int8.pt)
+import json
+import os
+import random
+import sys
+import time
+import warnings
+from typing import Optional
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.ao.quantization import (QuantStub, DeQuantStub, convert, fuse_modules, get_default_qconfig,
+                                   prepare, quantize_dynamic)
+from game_logic import GameState
+from neural_network import AlphaZeroNet, BatchEncoder, MASK_FILL_VALUE, legal_action_masks
+from model_export import InferenceNet, apply_legal_mask, cpu_copy, frozen_path, is_current, load_frozen
+
+# Inferenz-Modi der Engine
+INFERENCE_MODES = ('float', 'int8')
+
+
+def quantized_path(model_path):
+    """Pfad des Int8-Artefakts zu einem state_dict-Pfad (models/x.pth -> models/x_int8.pt)."""
+    return os.path.splitext(model_path)[0] + '_int8.pt'
+
+
+class QuantizableNet(nn.Module):
+    """
+    InferenceNet in quantisierbarer Form.
+
+    Der Faltungsteil (BatchNorm bereits gefaltet, fusionierte Köpfe) liegt als
+    Conv+ReLU-Folge zwischen QuantStub und DeQuantStub und wird statisch
+    quantisiert; die Linear-Schichten der Köpfe arbeiten auf Float-Eingaben
+    und werden dynamisch quantisiert.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        fused = InferenceNet(model)
+        self.quant = QuantStub()
+        self.trunk = nn.Sequential(fused.conv1, nn.ReLU(), fused.conv2, nn.ReLU(), fused.conv3, nn.ReLU(),
+                                   fused.conv4, nn.ReLU(), fused.head_conv, nn.ReLU())
+        self.dequant = DeQuantStub()
+        self.head_channels = fused.head_channels
+        self.policy_fc = fused.policy_fc
+        self.value_fc1 = fused.value_fc1
+        self.value_fc2 = fused.value_fc2
+        self.mask_fill_value = float(MASK_FILL_VALUE)
+
+    def forward(self, x, legal_mask: Optional[torch.Tensor] = None):
+        heads = self.dequant(self.trunk(self.quant(x)))
+        p = heads[:, :self.head_channels].flatten(1)
+        v = heads[:, self.head_channels:].flatten(1)
+
+        policy = self.policy_fc(p)
+        if legal_mask is not None:
+            policy = apply_legal_mask(policy, legal_mask, self.mask_fill_value)
+
+        value = torch.tanh(self.value_fc2(F.relu(self.value_fc1(v))))
+        return policy, value.squeeze()
+
+
+def quantize_model(model, calibration_states, batch_size=64):
+    """
+    Int8-Variante von model.
+
+    Args:
+        model: AlphaZeroNet (wird nicht verändert)
+        calibration_states: Eingabeebenen [N, 17, ROWS, COLS] zur Bestimmung
+            der Aktivierungsbereiche im Faltungsteil
+
+    Returns:
+        Quantisiertes QuantizableNet (eager, nur CPU)
+    """
+    net = QuantizableNet(cpu_copy(model)).eval()
+    fuse_modules(net.trunk, [[str(i), str(i + 1)] for i in range(0, len(net.trunk), 2)], inplace=True)
+    qconfig = get_default_qconfig(torch.backends.quantized.engine)
+    for module in (net.quant, net.trunk, net.dequant):
+        module.qconfig = qconfig
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)  # Hinweise zu reduce_range/Observer
+        warnings.simplefilter('ignore', DeprecationWarning)  # torch.ao.quantization (Nachfolger torchao)
+        prepare(net, inplace=True)
+        with torch.no_grad():
+            for start in range(0, len(calibration_states), batch_size):
+                net(calibration_states[start:start + batch_size])
+        convert(net, inplace=True)
+        return quantize_dynamic(net, {nn.Linear}, dtype=torch.qint8)
+
+
+def export_quantized(model, calibration_states, path):
+    """Kalibriert, quantisiert und speichert model als eingefrorenes TorchScript-Modul nach path."""
+    net = quantize_model(model, calibration_states)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)
+        scripted = torch.jit.freeze(torch.jit.script(net))
+        torch.jit.save(scripted, path)
+    return scripted
+
+
+def load_quantized(path):
+    """Lädt ein mit export_quantized geschriebenes Artefakt (nur CPU)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)
+        return torch.jit.load(path, map_location='cpu')
+
+
+def sample_positions(num_positions, buffer_path="models/replay_buffer", seed=0, max_plies=80):
+    """
+    Stellungen für Kalibrierung und Prüfung als (Eingabeebenen, Masken).
+
+    Bevorzugt gespeicherte Selbstspiel-Positionen aus dem Replay Buffer (nur
+    lesend geöffnet, er wird nie verändert); fehlt er oder passt sein Format
+    nicht, kommen die Stellungen aus zufälligen Partien.
+    """
+    from replay_buffer import ReplayBuffer
+    buffer = None
+    try:
+        with open(os.path.join(buffer_path, 'meta.json')) as f:
+            capacity = json.load(f)['capacity']
+        buffer = ReplayBuffer(capacity=capacity, path=buffer_path, read_only=True)
+    except FileNotFoundError:
+        pass
+    except (ValueError, KeyError, OSError) as e:
+        print(f"⚠️  Replay Buffer nicht verwendbar ({e}), verwende zufällige Partien.")
+    if buffer is not None and buffer.size() > 0:
+        buffer.rng = np.random.default_rng(seed)
+        states, _, _, masks = buffer.sample(num_positions)
+        return states, masks, f"Replay Buffer ({buffer_path})"
+
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        game = GameState()
+        for _ in range(rng.randint(0, max_plies)):
+            moves = game.get_valid_moves(game.turn)
+            if not moves or game.game_over:
+                break
+            move = dict(rng.choice(moves))
+            if move['type'] == 'place':
+                move['orientation'] = rng.choice(['vertikal', 'horizontal'])
+            game = game.apply_move(move)
+        positions.append(game)
+    players = [game.turn for game in positions]
+    states = BatchEncoder(num_positions).encode(positions, players).clone()
+    masks = torch.from_numpy(legal_action_masks(positions, players))
+    return states, masks, "zufällige Partien"
+
+
+def validate(reference, candidate, states, masks, batch_sizes=(1, 16, 64), repeat=50):
+    """
+    Vergleicht candidate mit dem Float-Modell reference auf denselben Stellungen.
+
+    Returns:
+        Dict mit Top-1-Übereinstimmung der Policy, mittlerer Total-Variation-
+        Distanz der Zugverteilungen, mittlerem/maximalem Value-Fehler und
+        Forward-Zeiten (ms) pro Batchgröße
+    """
+    with torch.no_grad():
+        ref_policy, ref_value = reference(states, masks)
+        policy, value = candidate(states, masks)
+        latencies = {}
+        for batch_size in batch_sizes:
+            x, mask = states[:batch_size], masks[:batch_size]
+            times = []
+            for net in (reference, candidate):
+                for _ in range(5):
+                    net(x, mask)
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    net(x, mask)
+                times.append((time.perf_counter() - start) / repeat * 1000.0)
+            latencies[batch_size] = tuple(times)
+    value_error = (ref_value.view(-1) - value.view(-1)).abs()
+    return {
+        'policy_agreement': (ref_policy.argmax(dim=1) == policy.argmax(dim=1)).float().mean().item(),
+        'policy_tv': 0.5 * (ref_policy.exp() - policy.exp()).abs().sum(dim=1).mean().item(),
+        'value_mae': value_error.mean().item(),
+        'value_max_error': value_error.max().item(),
+        'latency_ms': latencies,
+    }
+
+
+def print_report(result):
+    print(f"   Policy: Top-1-Übereinstimmung {result['policy_agreement']:.1%}, "
+          f"mittlere TV-Distanz {result['policy_tv']:.4f}")
+    print(f"   Value: mittlerer Fehler {result['value_mae']:.4f}, maximal {result['value_max_error']:.4f}")
+    for batch_size, (float_ms, int8_ms) in result['latency_ms'].items():
+        print(f"   B={batch_size:3d}: float {float_ms:6.2f} ms | int8 {int8_ms:6.2f} ms (x{float_ms / int8_ms:.1f})")
+
+
+def float_reference(model_path, model):
+    """Float-Referenz wie in der Engine: das eingefrorene Artefakt, falls aktuell, sonst das eager Modell."""
+    if is_current(model_path, frozen_path(model_path)):
+        return load_frozen(frozen_path(model_path))
+    return model
+
+
+def main():
+    model_path = sys.argv[1] if len(sys.argv) > 1 else "models/alphazero_model.pth"
+    num_positions = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    if not os.path.exists(model_path):
+        print(f"❌ Modell nicht gefunden: {model_path}")
+        return
+    model = AlphaZeroNet()
+    model.load_state_dict(torch.load(model_path, map_location='cpu'))
+    model.eval()
+
+    # Getrennte Stellungen für Kalibrierung und Prüfung
+    states, masks, source = sample_positions(2 * num_positions)
+    half = len(states) // 2
+    print(f"Kalibrierung/Prüfung: je {half} Stellungen aus {source}")
+
+    path = quantized_path(model_path)
+    export_quantized(model, states[:half], path)
+    result = validate(float_reference(model_path, model), load_quantized(path), states[half:], masks[half:])
+    print(f"✅ Int8-Artefakt gespeichert: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# replay_buffer.py
+# Ringpuffer für Selbstspiel-Daten in vorab allozierten Arrays (optional als np.memmap auf der Platte)
+import json
+import os
+from collections import namedtuple
+import numpy as np
+import torch
+from config import ROWS, COLS
+from neural_network import BatchEncoder, CompactState, NUM_ACTIONS, NUM_SQUARES
+from symmetry import augment_batch
+
+# Obergrenze gültiger Aktionen einer Stellung: Häuser in beide Orientierungen
+# (<= 2 * 49); in der Zugphase höchstens 9 Steine x 6 Ziele + Pfarrer-Züge
+MAX_SAMPLE_ACTIONS = 2 * NUM_SQUARES
+
+
+class TrainingSample(namedtuple('TrainingSample', 'state player action_ids probs value')):
+    """
+    Kompakter Trainingsdatensatz.
+
+    state ist ein CompactState (Steincodes + Skalare), player die Perspektive
+    der Kodierung, action_ids die gültigen Aktionen (int16) und probs die
+    MCTS-Wahrscheinlichkeiten dazu (float32). Dichte Tensoren entstehen
+    erst in expand_samples().
+    """
+    __slots__ = ()
+
+
+def expand_samples(samples, encoder=None):
+    """
+    Dichte Trainings-Tensoren zu einer Liste von TrainingSamples.
+
+    Args:
+        encoder: Optionaler BatchEncoder; die States sind dann eine Sicht auf
+            seinen Puffer und gelten bis zum nächsten Aufruf
+
+    Returns:
+        (states [B, 17, ROWS, COLS], policies [B, NUM_ACTIONS], values [B], legal_masks [B, NUM_ACTIONS])
+    """
+    if encoder is None:
+        encoder = BatchEncoder(len(samples))
+    states = encoder.encode([s.state for s in samples], [s.player for s in samples])
+    rows = torch.from_numpy(np.repeat(np.arange(len(samples)), [len(s.action_ids) for s in samples]))
+    ids = torch.from_numpy(np.concatenate([s.action_ids for s in samples]).astype(np.int64))
+    policies = torch.zeros((len(samples), NUM_ACTIONS))
+    policies[rows, ids] = torch.from_numpy(np.concatenate([s.probs for s in samples]).astype(np.float32))
+    legal_masks = torch.zeros((len(samples), NUM_ACTIONS), dtype=torch.bool)
+    legal_masks[rows, ids] = True
+    values = torch.tensor([s.value for s in samples], dtype=torch.float32)
+    return states, policies, values, legal_masks
+
+
+# Feld -> (Form pro Eintrag, dtype)
+FIELDS = {
+    'codes': ((ROWS, COLS), np.int8),
+    'pfarrer_pos': ((2,), np.int8),
+    'unplaced': ((2,), np.int8),
+    'turn': ((), np.int8),
+    'player': ((), np.int8),
+    'action_ids': ((MAX_SAMPLE_ACTIONS,), np.int16),  # -1 = frei
+    'probs': ((MAX_SAMPLE_ACTIONS,), np.float32),
+    'values': ((), np.float32),
+}
+
+
+class ReplayBuffer:
+    """
+    Ringpuffer über zusammenhängende Arrays (ein Array pro Feld).
+
+    Jeder Eintrag ist ein TrainingSample in gepackter Form: Steincodes und
+    Skalare statt 17 Eingabeebenen, (Aktions-ID, Wahrscheinlichkeit)-Paare
+    statt dichter Policy und Maske (zusammen ~650 statt ~17.000 Bytes).
+    add() schreibt in O(1) an die aktuelle Position und überschreibt bei
+    vollem Puffer den ältesten Eintrag. sample() zieht zufällige Indizes und
+    holt jedes Feld mit einem einzigen Fancy-Index. Mit path liegen die
+    Arrays als .npy-Memmaps in diesem Ordner; Füllstand und Schreibposition
+    stehen in meta.json, so dass der Puffer einen Neustart übersteht.
+
+    Args:
+        capacity: Maximale Anzahl Einträge
+        path: Ordner für die Memmap-Dateien (None = nur im Speicher)
+        read_only: Vorhandenen Puffer in path nur lesend öffnen (zum Sampeln,
+            z.B. für Kalibrierung); fehlt er oder passt er nicht, gibt es
+            einen ValueError statt eines neuen Puffers
+    """
+
+    def __init__(self, capacity=50000, path=None, read_only=False):
+        self.capacity = capacity
+        self.path = path
+        self.read_only = read_only
+        self.count = 0
+        self.position = 0
+        self.rng = np.random.default_rng()
+        self.encoder = BatchEncoder(64)
+        self.arrays = {}
+        if path is None:
+            for name, (shape, dtype) in FIELDS.items():
+                self.arrays[name] = np.zeros((capacity,) + shape, dtype=dtype)
+        else:
+            self._open(path)
+
+    def _meta_path(self):
+        return os.path.join(self.path, 'meta.json')
+
+    def _load_arrays(self):
+        """Lädt vorhandene Memmaps; None, wenn eine Datei fehlt oder nicht zum Format passt."""
+        arrays = {}
+        for name, (shape, dtype) in FIELDS.items():
+            file = os.path.join(self.path, f"{name}.npy")
+            if not os.path.exists(file):
+                return None
+            array = np.load(file, mmap_mode='r' if self.read_only else 'r+')
+            if array.shape != (self.capacity,) + shape or array.dtype != dtype:
+                return None
+            arrays[name] = array
+        return arrays
+
+    def _open(self, path):
+        """Öffnet vorhandene Memmaps (gleiche Kapazität und Format) oder legt neue an."""
+        if self.read_only:
+            self._open_read_only()
+            return
+        os.makedirs(path, exist_ok=True)
+        meta = None
+        arrays = None
+        if os.path.exists(self._meta_path()):
+            with open(self._meta_path()) as f:
+                meta = json.load(f)
+            arrays = self._load_arrays()
+            if arrays is None:
+                print(f"⚠️  Replay Buffer in {path} passt nicht zu Kapazität {self.capacity} "
+                      f"oder Format. Lege neuen Puffer an.")
+                meta = None
+        if meta is not None:
+            self.arrays = arrays
+            self.count = meta['count']
+            self.position = meta['position']
+            print(f"✅ Replay Buffer geladen: {self.count} Positionen aus {path}")
+            return
+        for name, (shape, dtype) in FIELDS.items():
+            file = os.path.join(path, f"{name}.npy")
+            self.arrays[name] = np.lib.format.open_memmap(file, mode='w+', dtype=dtype,
+                                                          shape=(self.capacity,) + shape)
+        self.flush()
+
+    def _open_read_only(self):
+        """Öffnet einen vorhandenen Puffer nur lesend; legt nie Dateien an."""
+        if not os.path.exists(self._meta_path()):
+            raise ValueError(f"Kein Replay Buffer in {self.path}")
+        with open(self._meta_path()) as f:
+            meta = json.load(f)
+        arrays = self._load_arrays()
+        if arrays is None:
+            raise ValueError(f"Replay Buffer in {self.path} passt nicht zu Kapazität {self.capacity} oder Format")
+        self.arrays = arrays
+        self.count = meta['count']
+        self.position = meta['position']
+
+    def add(self, sample):
+        """Fügt ein TrainingSample hinzu."""
+        k = len(sample.action_ids)
+        if k > MAX_SAMPLE_ACTIONS:
+            raise ValueError(f"Zu viele Aktionen für einen Eintrag: {k} > {MAX_SAMPLE_ACTIONS}")
+        i = self.position
+        arrays = self.arrays
+        state = sample.state
+        arrays['codes'][i] = state.codes
+        arrays['pfarrer_pos'][i] = state.pfarrer_pos
+        arrays['unplaced'][i] = (state.unplaced_p1, state.unplaced_p2)
+        arrays['turn'][i] = state.turn
+        arrays['player'][i] = sample.player
+        arrays['action_ids'][i, :k] = sample.action_ids
+        arrays['action_ids'][i, k:] = -1
+        arrays['probs'][i, :k] = sample.probs
+        arrays['probs'][i, k:] = 0.0
+        arrays['values'][i] = sample.value
+        self.position = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _indices(self, batch_size):
+        n = min(batch_size, self.count)
+        return np.sort(self.rng.choice(self.count, size=n, replace=False))
+
+    def sample(self, batch_size, expand=True, augment=False):
+        """
+        Sampelt einen Batch ohne Zurücklegen.
+
+        Args:
+            expand: True = dichte Tensoren (wie expand_samples, vektorisiert
+                aus den Arrays), False = Liste von TrainingSamples
+            augment: Dichte Samples mit je einer zufälligen Brett-Symmetrie
+
+        Returns:
+            (states [B, 17, ROWS, COLS], policies [B, NUM_ACTIONS], values [B], legal_masks [B, NUM_ACTIONS])
+            bzw. Liste von TrainingSamples
+        """
+        idx = self._indices(batch_size)
+        batch = {name: array[idx] for name, array in self.arrays.items()}
+        if not expand:
+            samples = []
+            for i in range(len(idx)):
+                k = int(np.count_nonzero(batch['action_ids'][i] >= 0))
+                state = CompactState(batch['codes'][i], tuple(int(v) for v in batch['pfarrer_pos'][i]),
+                                     int(batch['unplaced'][i, 0]), int(batch['unplaced'][i, 1]), int(batch['turn'][i]))
+                samples.append(TrainingSample(state, int(batch['player'][i]), batch['action_ids'][i, :k],
+                                              batch['probs'][i, :k], float(batch['values'][i])))
+            return samples
+
+        n = len(idx)
+        states = self.encoder.encode_arrays(batch['codes'], batch['pfarrer_pos'], batch['unplaced'],
+                                            batch['turn'], batch['player']).clone()
+        rows, cols = np.nonzero(batch['action_ids'] >= 0)
+        ids = torch.from_numpy(batch['action_ids'][rows, cols].astype(np.int64))
+        rows = torch.from_numpy(rows)
+        policies = torch.zeros((n, NUM_ACTIONS))
+        policies[rows, ids] = torch.from_numpy(batch['probs'][rows.numpy(), cols])
+        legal_masks = torch.zeros((n, NUM_ACTIONS), dtype=torch.bool)
+        legal_masks[rows, ids] = True
+        if augment:
+            states, policies, legal_masks = augment_batch(states, policies, legal_masks)
+        return states, policies, torch.from_numpy(batch['values']), legal_masks
+
+    def size(self):
+        return self.count
+
+    def flush(self):
+        """Schreibt Memmaps und Füllstand auf die Platte (ohne path oder nur lesend wirkungslos)."""
+        if self.path is None or self.read_only:
+            return
+        for array in self.arrays.values():
+            array.flush()
+        with open(self._meta_path(), 'w') as f:
+            json.dump({'capacity': self.capacity, 'count': self.count, 'position': self.position}, f)
+
+    def memory_bytes(self):
+        """Speicherbedarf der Arrays bei voller Kapazität."""
+        return sum(array.nbytes for array in self.arrays.values())
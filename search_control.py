@@ -0,0 +1,104 @@
+# search_control.py
+# Steuerung einer laufenden KI-Suche (Fortschritt, Abbruch, Zeitbudget) zwischen Such-Thread und GUI
+import threading
+import time
+
+
+class SearchControl:
+    """
+    Wird an get_move() übergeben und von der Suche fortlaufend aktualisiert.
+
+    Der Such-Thread schreibt Simulationen, Gesamtbudget und besten Zug; die
+    GUI liest diese Werte (z.B. per after()) und kann die Suche über stop()
+    vorzeitig mit dem besten bisherigen Zug beenden oder über cancel()
+    ganz verwerfen.
+
+    Args:
+        time_limit_ms: Optionales Zeitbudget; danach gilt die Suche als
+            gestoppt und liefert den besten bisherigen Zug
+    """
+
+    def __init__(self, time_limit_ms=None):
+        self.simulations = 0
+        self.total = 0
+        self.best_move = None
+        self.cancelled = False
+        self.start_time = time.perf_counter()
+        self.deadline = None
+        self._stop = threading.Event()
+        if time_limit_ms is not None:
+            self.set_time_limit(time_limit_ms)
+
+    def set_time_limit(self, time_limit_ms):
+        """Setzt das Zeitbudget, gemessen ab Erzeugung des SearchControl."""
+        self.deadline = self.start_time + time_limit_ms / 1000.0
+
+    def report(self, simulations, total=None, best_move=None):
+        """Wird von der Suche aufgerufen."""
+        self.simulations = simulations
+        if total is not None:
+            self.total = total
+        if best_move is not None:
+            self.best_move = best_move
+
+    def stop(self):
+        """Suche beenden und den besten bisherigen Zug spielen."""
+        self._stop.set()
+
+    def cancel(self):
+        """Suche beenden und das Ergebnis verwerfen."""
+        self.cancelled = True
+        self._stop.set()
+
+    @property
+    def stop_requested(self):
+        if self._stop.is_set():
+            return True
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start_time
+
+    @property
+    def simulations_per_second(self):
+        elapsed = self.elapsed
+        return self.simulations / elapsed if elapsed > 0 else 0.0
+
+
+class GameClock:
+    """
+    Gesamtbedenkzeit eines Spielers für eine Partie.
+
+    budget_ms() verteilt die Restzeit gleichmäßig auf moves_to_go weitere
+    Züge (plus Inkrement) und hält eine kleine Reserve zurück.
+
+    Args:
+        total_ms: Bedenkzeit zu Beginn der Partie
+        increment_ms: Zeitgutschrift nach jedem Zug
+        moves_to_go: Angenommene Anzahl noch zu spielender eigener Züge
+        reserve_ms: Reserve, die nie verplant wird
+    """
+
+    def __init__(self, total_ms, increment_ms=0, moves_to_go=20, reserve_ms=100):
+        self.remaining_ms = total_ms
+        self.increment_ms = increment_ms
+        self.moves_to_go = moves_to_go
+        self.reserve_ms = reserve_ms
+        self._move_start = None
+
+    def budget_ms(self):
+        """Zeitbudget für den nächsten Zug."""
+        usable = max(0.0, self.remaining_ms - self.reserve_ms)
+        return max(1.0, min(usable, usable / self.moves_to_go + self.increment_ms))
+
+    def start_move(self):
+        self._move_start = time.perf_counter()
+
+    def end_move(self):
+        """Zieht die verbrauchte Zeit ab und schreibt das Inkrement gut."""
+        if self._move_start is None:
+            return
+        used_ms = (time.perf_counter() - self._move_start) * 1000.0
+        self.remaining_ms = max(0.0, self.remaining_ms - used_ms) + self.increment_ms
+        self._move_start = None
@@ -0,0 +1,213 @@
+# symmetry.py
+# Die 8 Symmetrien des Bretts (Drehungen/Spiegelungen) für Stellungen, Eingabeebenen und Aktions-IDs
+import random
+import numpy as np
+import torch
+from config import ROWS, COLS
+from game_logic import GameState, Spielstein
+from neural_network import (STONE_CODES, ORIENTATIONS, NUM_SQUARES, NUM_ACTIONS, CompactState,
+                            _ACTIONS, encode_action, encode_board_state, legal_action_mask)
+
+# Symmetrie -> Transformation eines [ROWS, COLS]-Arrays und ob Zeilen/Spalten vertauscht werden.
+# Vertauschte Achsen machen aus 'vertikal' (Gleiten in der Spalte) 'horizontal' und umgekehrt.
+_TRANSFORMS = (
+    (lambda a: a, False),                                   # Identität
+    (lambda a: np.rot90(a, 1), True),                       # 90°
+    (lambda a: np.rot90(a, 2), False),                      # 180°
+    (lambda a: np.rot90(a, 3), True),                       # 270°
+    (lambda a: a[::-1, :], False),                          # Spiegelung an der Waagerechten
+    (lambda a: a[:, ::-1], False),                          # Spiegelung an der Senkrechten
+    (lambda a: a.T, True),                                  # Hauptdiagonale
+    (lambda a: np.rot90(a, 2).T, True),                     # Nebendiagonale
+)
+NUM_SYMMETRIES = len(_TRANSFORMS)
+SWAPS_AXES = np.array([swaps for _, swaps in _TRANSFORMS])
+
+# Eingabeebenen: 3/4 = vertikal/horizontal Spieler 1, 8/9 = dasselbe für Spieler 2
+_CHANNEL_PERM = np.tile(np.arange(17), (NUM_SYMMETRIES, 1))
+_CHANNEL_PERM[SWAPS_AXES] = np.array([0, 1, 2, 4, 3, 5, 6, 7, 9, 8] + list(range(10, 17)))
+
+
+def _build_tables():
+    grid = np.arange(NUM_SQUARES).reshape(ROWS, COLS)
+    # source[s][j]: altes Feld, das nach Symmetrie s auf Feld j liegt; dest ist die Umkehrung
+    source = np.stack([np.ascontiguousarray(transform(grid)).ravel() for transform, _ in _TRANSFORMS])
+    dest = np.argsort(source, axis=1)
+    # Steincode mit getauschter Ausrichtung
+    code_swap = np.arange(len(STONE_CODES) + 1, dtype=np.int8)
+    for (spieler, typ, ausrichtung), code in STONE_CODES.items():
+        code_swap[code] = STONE_CODES[(spieler, typ, ORIENTATIONS[1 - ORIENTATIONS.index(ausrichtung)])]
+    # action_perm[s][alte ID] = neue ID
+    action_perm = np.zeros((NUM_SYMMETRIES, NUM_ACTIONS), dtype=np.int64)
+    for s in range(NUM_SYMMETRIES):
+        def pos(p):
+            sq = dest[s][(p[0] - 1) * COLS + p[1] - 1]
+            return (sq // COLS + 1, sq % COLS + 1)
+        for action_id, action in enumerate(_ACTIONS):
+            if action[0] == 'place':
+                orientation = ORIENTATIONS[1 - ORIENTATIONS.index(action[3])] if SWAPS_AXES[s] else action[3]
+                move = {'type': 'place', 'pos': pos(action[1]), 'stone_type': action[2], 'orientation': orientation}
+            elif action[0] == 'move':
+                move = {'type': 'move', 'from': pos(action[1]), 'to': pos(action[2])}
+            else:
+                move = {'type': 'pfarrer', 'from': pos(action[1])}
+            action_perm[s, action_id] = encode_action(move)
+    return source, dest, code_swap, action_perm
+
+
+SQUARE_SOURCE, SQUARE_DEST, _CODE_SWAP, ACTION_PERM = _build_tables()
+ACTION_SOURCE = np.argsort(ACTION_PERM, axis=1)  # neue ID -> alte ID
+
+
+def _map_pos(pos, s):
+    sq = SQUARE_DEST[s][(pos[0] - 1) * COLS + pos[1] - 1]
+    return (int(sq) // COLS + 1, int(sq) % COLS + 1)
+
+
+def transform_codes(codes, s):
+    """Steincodes [ROWS, COLS] unter Symmetrie s (Ausrichtung getauscht, wenn nötig)."""
+    codes = np.asarray(codes).reshape(NUM_SQUARES)[SQUARE_SOURCE[s]].reshape(ROWS, COLS)
+    return _CODE_SWAP[codes] if SWAPS_AXES[s] else codes
+
+
+def transform_compact_state(state, s):
+    return CompactState(transform_codes(state.codes, s), _map_pos(state.pfarrer_pos, s),
+                        state.unplaced_p1, state.unplaced_p2, state.turn)
+
+
+def transform_sample(sample, s):
+    """TrainingSample unter Symmetrie s (Stellung und Aktions-IDs; Wahrscheinlichkeiten und Value bleiben)."""
+    return sample._replace(state=transform_compact_state(sample.state, s),
+                           action_ids=ACTION_PERM[s][np.asarray(sample.action_ids, dtype=np.int64)].astype(np.int16))
+
+
+def augment_samples(samples, symmetries=range(NUM_SYMMETRIES)):
+    """Alle Symmetrie-Varianten der Samples (für die Augmentierung beim Speichern)."""
+    return [transform_sample(sample, s) for sample in samples for s in symmetries]
+
+
+def transform_game_state(game_state, s):
+    """GameState unter Symmetrie s (für Prüfungen; ungelegte Steine und Zugrecht bleiben)."""
+    state = GameState()
+    for r in range(ROWS):
+        for c in range(COLS):
+            stone = game_state.board[r][c]
+            if stone is None:
+                continue
+            ausrichtung = stone.ausrichtung
+            if SWAPS_AXES[s]:
+                ausrichtung = ORIENTATIONS[1 - ORIENTATIONS.index(ausrichtung)]
+            nr, nc = _map_pos((r + 1, c + 1), s)
+            state.board[nr - 1][nc - 1] = Spielstein(stone.spieler, stone.typ, ausrichtung)
+    for pid in (1, 2):
+        pieces = state.unplaced_pieces[pid]
+        state.unplaced_pieces[pid] = pieces[len(pieces) - len(game_state.unplaced_pieces[pid]):]
+    state.pfarrer_pos = _map_pos(game_state.pfarrer_pos, s)
+    state.turn = game_state.turn
+    state.game_over = game_state.game_over
+    state.winner = game_state.winner
+    state.key = state.compute_key()
+    return state
+
+
+def augment_batch(states, policies, legal_masks, symmetries=None):
+    """
+    Wendet pro Sample eine (zufällige) Symmetrie auf einen dichten Batch an.
+
+    Eingabeebenen, Policy und Maske werden mit je einem Gather umgeordnet.
+
+    Args:
+        states: [B, 17, ROWS, COLS]
+        policies: [B, NUM_ACTIONS]
+        legal_masks: [B, NUM_ACTIONS]
+        symmetries: Symmetrie pro Sample (Standard: zufällig)
+
+    Returns:
+        (states, policies, legal_masks) transformiert
+    """
+    n = states.shape[0]
+    if symmetries is None:
+        symmetries = np.random.randint(NUM_SYMMETRIES, size=n)
+    symmetries = np.asarray(symmetries)
+    squares = torch.from_numpy(SQUARE_SOURCE[symmetries])                      # [B, 49]
+    channels = torch.from_numpy(_CHANNEL_PERM[symmetries])                     # [B, 17]
+    flat = states.reshape(n, 17, NUM_SQUARES)
+    flat = torch.gather(flat, 1, channels[:, :, None].expand(-1, -1, NUM_SQUARES))
+    flat = torch.gather(flat, 2, squares[:, None, :].expand(-1, 17, -1))
+    actions = torch.from_numpy(ACTION_SOURCE[symmetries])                      # [B, NUM_ACTIONS]
+    return (flat.reshape(states.shape),
+            torch.gather(policies, 1, actions),
+            torch.gather(legal_masks, 1, actions))
+
+
+def check_symmetries(num_positions=100, num_endgames=100, seed=0):
+    """
+    Prüft alle Symmetrien gegen GameState, auf zufälligen Stellungen und auf
+    num_endgames Stellungen rund um die Siegbedingung (batch_env.endgame_states).
+
+    Pro Stellung und Symmetrie muss gelten: die gültigen Aktionen der
+    transformierten Stellung sind genau die permutierten Aktionen der
+    Originalstellung (für beide Spieler), die Siegprüfung stimmt überein,
+    auch nach jedem gültigen Zug (permutierte Aktion in der transformierten
+    Stellung), und augment_batch/transform_compact_state liefern dieselben
+    Eingabeebenen wie das Kodieren der transformierten Stellung.
+
+    Returns:
+        Dict mit der Anzahl Abweichungen pro Prüfung (alle 0 = korrekt) und
+        der Anzahl geprüfter Siege
+
+    Raises:
+        AssertionError: bei einer Abweichung oder wenn kein Sieg geprüft wurde
+    """
+    from neural_network import compact_state, decode_action, BatchEncoder
+    from batch_env import endgame_states
+    rng = random.Random(seed)
+    encoder = BatchEncoder(1)
+    mismatches = {'legal_moves': 0, 'check_win': 0, 'planes': 0, 'compact': 0}
+    wins = 0
+    games = []
+    for _ in range(num_positions):
+        game = GameState()
+        for _ in range(rng.randint(0, 80)):
+            moves = game.get_valid_moves(game.turn)
+            if not moves or game.game_over:
+                break
+            move = dict(rng.choice(moves))
+            if move['type'] == 'place':
+                move['orientation'] = rng.choice(ORIENTATIONS)
+            game = game.apply_move(move)
+        games.append(game)
+    games += endgame_states(num_endgames, seed)
+
+    for game in games:
+        planes = encode_board_state(game, game.turn).unsqueeze(0)
+        actions = np.flatnonzero(legal_action_mask(game, game.turn))
+        wins += game.check_win(1) or game.check_win(2)
+        for s in range(NUM_SYMMETRIES):
+            mapped = transform_game_state(game, s)
+            for pid in (1, 2):
+                mask = legal_action_mask(game, pid)
+                expected = np.zeros(NUM_ACTIONS, dtype=bool)
+                expected[ACTION_PERM[s][mask]] = True
+                mismatches['legal_moves'] += not np.array_equal(legal_action_mask(mapped, pid), expected)
+                mismatches['check_win'] += mapped.check_win(pid) != game.check_win(pid)
+            # Siegprüfung nach jedem Zug: Originalzug hier, permutierter Zug in der transformierten Stellung
+            for action in actions:
+                game.push(decode_action(int(action), game.pfarrer_pos))
+                mapped.push(decode_action(int(ACTION_PERM[s][action]), mapped.pfarrer_pos))
+                wins += game.game_over
+                mismatches['check_win'] += (mapped.game_over, mapped.winner) != (game.game_over, game.winner)
+                game.pop()
+                mapped.pop()
+            mask = torch.from_numpy(legal_action_mask(game, game.turn)).unsqueeze(0)
+            augmented, _, augmented_mask = augment_batch(planes, mask.float(), mask, [s])
+            target = encode_board_state(mapped, game.turn)
+            mismatches['planes'] += not (torch.equal(augmented[0], target)
+                                         and torch.equal(augmented_mask[0], torch.from_numpy(legal_action_mask(mapped, game.turn))))
+            compact = transform_compact_state(compact_state(game), s)
+            mismatches['compact'] += not torch.equal(encoder.encode([compact], game.turn)[0], target)
+
+    if any(mismatches.values()) or wins == 0:
+        raise AssertionError(f"Symmetrien weichen von GameState ab: {mismatches}, {wins} Siege geprüft")
+    mismatches['wins'] = wins
+    return mismatches
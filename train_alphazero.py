@@ -7,36 +7,96 @@ import random
 import copy
 import os
 import shutil
-from collections import deque
+import time
+import multiprocessing as mp
+import numpy as np
 from game_logic import GameState
-from neural_network import AlphaZeroNet, encode_board_state, create_move_index_map
+from neural_network import AlphaZeroNet, BatchEncoder, compact_state, encode_action
 from alphazero_engine import AlphaZeroEngine, AlphaZeroMCTSNode
+from inference_server import InferenceServer
+from model_export import export_frozen, frozen_path
+from quantization import export_quantized, quantized_path
+from replay_buffer import ReplayBuffer, TrainingSample, expand_samples
+from symmetry import augment_batch, augment_samples
 
-class SelfPlayBuffer:
-    """Speichert Trainingsdaten aus Selbstspiel."""
-    
-    def __init__(self, max_size=10000):
-        self.buffer = deque(maxlen=max_size)
-    
-    def add(self, state, policy, value):
-        """Fügt einen Trainingsdatensatz hinzu."""
-        self.buffer.append((state, policy, value))
-    
-    def sample(self, batch_size):
-        """Sampelt einen Batch von Trainingsdaten."""
-        batch = random.sample(self.buffer, min(batch_size, len(self.buffer)))
-        states = torch.cat([s[0] for s in batch], dim=0)  # Concatenate along batch dimension
-        policies = torch.stack([s[1] for s in batch])
-        values = torch.stack([s[2] for s in batch])
-        return states, policies, values
-    
-    def size(self):
-        return len(self.buffer)
+
+def _choose_self_play_move(game, root, current_player, move_count, game_history):
+    """
+    Wählt den Selbstspiel-Zug aus den Besuchszahlen der Wurzel und speichert
+    (kompakte Stellung, Spieler, Aktions-IDs, Policy) in game_history.
+    """
+    # Erstelle Policy-Vektor aus Besuchszahlen
+    if root.children:
+        visit_counts = torch.zeros(len(root.children))
+        for i, child in enumerate(root.children):
+            visit_counts[i] = child.visit_count
+        
+        # Normalisiere zu Wahrscheinlichkeiten
+        if visit_counts.sum() > 0:
+            policy = visit_counts / visit_counts.sum()
+        else:
+            policy = torch.ones(len(root.children)) / len(root.children)
+        
+        # Speichere Trainingsdaten kompakt: Wurzelkinder = alle gültigen Aktionen
+        action_ids = np.array([encode_action(child.move) for child in root.children], dtype=np.int16)
+        game_history.append((compact_state(game), current_player, action_ids, policy.numpy()))
+        
+        # Temperatur-Abstufung: Zu Beginn hohe Temperatur (Exploration),
+        # gegen Ende niedrige Temperatur (Exploitation)
+        # AlphaZero Standard: Nach 30 Zügen deterministisch spielen
+        temperature = 1.0 if move_count <= 30 else 0.0
+        
+        # Wähle Zug basierend auf Policy und Temperatur
+        if temperature == 0.0:
+            # Deterministisch: Wähle meistbesuchten Zug
+            move_idx = torch.argmax(policy).item()
+        else:
+            # Stochastisch: Sample basierend auf Temperatur
+            # Erhöhe Temperatur für mehr Exploration
+            policy_temp = policy ** (1.0 / temperature)
+            policy_temp = policy_temp / policy_temp.sum()
+            move_idx = torch.multinomial(policy_temp, 1).item()
+        
+        move = root.children[move_idx].move
+    else:
+        move = random.choice(root.untried_moves)
+    return move
+
+
+def _history_to_training_data(game, game_history, move_count):
+    """Erstellt die Trainingsdaten einer beendeten Partie (Value aus Sicht des jeweiligen Spielers)."""
+    training_data = []
+    
+    # Bestimme Sieger
+    if game.game_over:
+        winner = game.winner
+    else:
+        # Unentschieden (Spiel zu lang)
+        winner = None
+    
+    # Debug: Zeige wie viele Positionen gesammelt wurden
+    if len(game_history) == 0:
+        print(f"⚠️  WARNUNG: Keine Positionen in game_history gesammelt! (move_count={move_count}, game_over={game.game_over})")
+    
+    # Erstelle Trainingsdaten mit korrekten Werten
+    for i, (state, player, action_ids, policy) in enumerate(game_history):
+        # Wert basierend auf Sieger
+        if winner is None:
+            value = 0.0
+        elif (i % 2 == 0 and winner == 1) or (i % 2 == 1 and winner == 2):
+            value = 1.0  # Gewinn
+        else:
+            value = -1.0  # Verlust
+        
+        # Sparse Policy: dichte Vektoren entstehen erst beim Training (expand_samples)
+        training_data.append(TrainingSample(state, player, action_ids, policy, value))
+    
+    return training_data
 
 
 # In train_alphazero.py, self_play_game Funktion:
 
-def self_play_game(engine, num_simulations = 100, c_puct=5.0, max_game_length=200):
+def self_play_game(engine, num_simulations = 100, c_puct=5.0, max_game_length=200, batch_size=8):
     """
     Führt ein Selbstspiel durch und sammelt Trainingsdaten.
     
@@ -45,13 +105,13 @@ def self_play_game(engine, num_simulations = 100, c_puct=5.0, max_game_length=20
         num_simulations: Anzahl MCTS-Simulationen pro Zug
         c_puct: Exploration-Konstante
         max_game_length: Maximale Spielzüge (verhindert endlose Spiele)
+        batch_size: Blätter pro Netzwerk-Auswertung (1 = ohne Batching)
     
     Returns:
-        training_data: Liste von (state, policy, value) Tupeln
+        training_data: Liste von TrainingSamples (kompakt, siehe replay_buffer)
     """
     game = GameState()
-    training_data = []
-    move_index_map = create_move_index_map()
+    engine.new_game()
     
     # Speichere alle besuchten Positionen während des Spiels
     game_history = []
@@ -62,11 +122,6 @@ def self_play_game(engine, num_simulations = 100, c_puct=5.0, max_game_length=20
         current_player = game.turn
         move_count += 1
         
-        # Erstelle MCTS-Baum für aktuellen Zustand
-        root = AlphaZeroMCTSNode(game)
-        # WICHTIG: Setze untried_moves NICHT hier, sonst ist is_expanded() = True!
-        # root.untried_moves wird in _expand_node gesetzt
-        
         valid_moves_before = game.get_valid_moves(current_player)
         if not valid_moves_before:
             # Debug: Keine gültigen Züge mehr
@@ -77,7 +132,8 @@ def self_play_game(engine, num_simulations = 100, c_puct=5.0, max_game_length=20
             # Debug: Zeige valid_moves vor Expansion
           #  print(f"🔍 DEBUG: {len(valid_moves_before)} valid_moves vor Expansion")
             
-            engine._expand_node(root, current_player)
+            # MCTS-Baum für aktuellen Zustand: Teilbaum des letzten Zugs weiterverwenden
+            root = engine.prepare_root(game, current_player)
             
             # Debug: Zeige was nach Expansion passiert ist
           #  print(f"🔍 DEBUG: root.children nach Expansion: {len(root.children)}")
@@ -96,49 +152,16 @@ def self_play_game(engine, num_simulations = 100, c_puct=5.0, max_game_length=20
         
         # Führe MCTS-Simulationen durch
         try:
-            for _ in range(num_simulations):
-                engine._simulate(root, current_player, c_puct)
+            # Bereits vorhandene Besuche der Wurzel zählen zum Budget
+            engine.run_simulations(root, current_player, max(0, num_simulations - root.visit_count),
+                                   c_puct, batch_size)
         except Exception as e:
             print(f"⚠️  Fehler bei Simulation: {e}")
             import traceback
             traceback.print_exc()
             break
         
-        # Erstelle Policy-Vektor aus Besuchszahlen
-        if root.children:
-            visit_counts = torch.zeros(len(root.children))
-            for i, child in enumerate(root.children):
-                visit_counts[i] = child.visit_count
-            
-            # Normalisiere zu Wahrscheinlichkeiten
-            if visit_counts.sum() > 0:
-                policy = visit_counts / visit_counts.sum()
-            else:
-                policy = torch.ones(len(root.children)) / len(root.children)
-            
-            # Speichere Trainingsdaten
-            state_tensor = encode_board_state(game, current_player)
-            game_history.append((state_tensor, policy, root.children))
-            
-            # Temperatur-Abstufung: Zu Beginn hohe Temperatur (Exploration),
-            # gegen Ende niedrige Temperatur (Exploitation)
-            # AlphaZero Standard: Nach 30 Zügen deterministisch spielen
-            temperature = 1.0 if move_count <= 30 else 0.0
-            
-            # Wähle Zug basierend auf Policy und Temperatur
-            if temperature == 0.0:
-                # Deterministisch: Wähle meistbesuchten Zug
-                move_idx = torch.argmax(policy).item()
-            else:
-                # Stochastisch: Sample basierend auf Temperatur
-                # Erhöhe Temperatur für mehr Exploration
-                policy_temp = policy ** (1.0 / temperature)
-                policy_temp = policy_temp / policy_temp.sum()
-                move_idx = torch.multinomial(policy_temp, 1).item()
-            
-            move = root.children[move_idx].move
-        else:
-            move = random.choice(root.untried_moves)
+        move = _choose_self_play_move(game, root, current_player, move_count, game_history)
         
         # Führe Zug aus
         game = game.apply_move(move)
@@ -151,66 +174,241 @@ def self_play_game(engine, num_simulations = 100, c_puct=5.0, max_game_length=20
             winner = 1 if current_player == 2 else 2
             break
     
-    # Bestimme Sieger
-    if game.game_over:
-        winner = game.winner
+    return _history_to_training_data(game, game_history, move_count)
+
+
+# --- Parallele Selbstspiele (ein Prozess pro Worker) ---
+_worker_engine = None
+
+
+def _init_self_play_worker(state_dict, num_threads, clients=None, slots=None):
+    """
+    Initialisiert einen Worker: feste Thread-Zahl und eigene Kopie der Gewichte.
+    
+    Mit clients (InferenceClient je Slot) nimmt sich der Worker einen freien
+    Slot aus slots und wertet über den InferenceServer aus; state_dict ist
+    dann None, der Worker hält kein eigenes Modell.
+    """
+    global _worker_engine
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Nur vor der ersten parallelen Operation erlaubt
+    if clients is not None:
+        _worker_engine = AlphaZeroEngine(device='cpu', inference_client=clients[slots.get()])
+        return
+    _worker_engine = AlphaZeroEngine(device='cpu')
+    _worker_engine.model.load_state_dict(state_dict)
+    _worker_engine.model.eval()
+
+
+def _self_play_worker(task):
+    """Spielt ein Selbstspiel im Worker-Prozess."""
+    seed, simulations, c_puct, max_game_length = task
+    random.seed(seed)
+    np.random.seed(seed % (2 ** 32))
+    torch.manual_seed(seed)
+    return self_play_game(_worker_engine, num_simulations=simulations, c_puct=c_puct,
+                          max_game_length=max_game_length)
+
+
+def parallel_self_play(model, games, workers, simulations=100, c_puct=5.0, max_game_length=200,
+                       threads_per_worker=None, seed=None, inference_server=False, max_batch_size=64,
+                       max_wait_ms=2.0):
+    """
+    Spielt games Selbstspiele in workers Prozessen.
+    
+    Jeder Worker erhält beim Start eine Kopie der aktuellen Gewichte (nur
+    lesend) und eine feste Anzahl Torch-Threads, damit sich die Prozesse
+    die Kerne nicht gegenseitig streitig machen. Die Ergebnisse werden
+    geliefert, sobald ein Spiel fertig ist (Generator).
+    
+    Args:
+        model: AlphaZeroNet mit den aktuellen Gewichten
+        games: Anzahl Spiele
+        workers: Anzahl Prozesse
+        simulations, c_puct, max_game_length: wie self_play_game
+        threads_per_worker: Torch-Threads pro Worker (Standard: Kerne / workers)
+        seed: Basis-Seed; Spiel i verwendet seed + i
+        inference_server: Alle Forward-Passes in einem zentralen
+            InferenceServer bündeln statt in jedem Worker
+        max_batch_size, max_wait_ms: Batch-Grenzen des InferenceServers
+    
+    Yields:
+        training_data eines Spiels (wie self_play_game)
+    """
+    if threads_per_worker is None:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    if seed is None:
+        seed = random.randrange(2 ** 31)
+    tasks = [(seed + i, simulations, c_puct, max_game_length) for i in range(games)]
+    
+    # 'spawn' statt 'fork': sicher mit Torch-Threadpools und auch unter Windows
+    ctx = mp.get_context('spawn')
+    server = None
+    if inference_server:
+        server = InferenceServer(model, workers, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                                 num_threads=threads_per_worker).start()
+        slots = ctx.Queue()
+        for slot in range(workers):
+            slots.put(slot)
+        # Die Gewichte gehen nur an den Server, nicht an die Worker
+        initargs = (None, threads_per_worker, [server.client(i) for i in range(workers)], slots)
     else:
-        # Unentschieden (Spiel zu lang)
-        winner = None
+        state_dict = {k: v.detach().cpu() for k, v in model.state_dict().items()}
+        initargs = (state_dict, threads_per_worker)
+    try:
+        with ctx.Pool(workers, initializer=_init_self_play_worker, initargs=initargs) as pool:
+            results = pool.imap_unordered(_self_play_worker, tasks)
+            for _ in tasks:
+                while True:
+                    try:
+                        training_data = results.next(timeout=1.0)
+                        break
+                    except mp.TimeoutError:
+                        # Stirbt der Server, laut abbrechen statt auf die Worker zu warten
+                        if server is not None:
+                            server.check_alive()
+                yield training_data
+    finally:
+        if server is not None:
+            server.stop()
+            stats = server.stats()
+            print(f"🧮 Inferenz-Server: {stats['batches']} Batches, Ø {stats['avg_batch']:.1f} Blätter "
+                  f"({stats['batch_fill']:.0%} gefüllt), {stats['leaves_per_sec']:.0f} Blätter/s, "
+                  f"ausgelastet {stats['busy']:.0%}")
+
+
+# --- Lock-Step-Selbstspiele (viele Partien in einem Prozess) ---
+class _LockstepGame:
+    """Zustand einer Partie in lockstep_self_play (eigener Suchbaum über eine eigene Engine)."""
     
-    # Debug: Zeige wie viele Positionen gesammelt wurden
-    if len(game_history) == 0:
-        print(f"⚠️  WARNUNG: Keine Positionen in game_history gesammelt! (move_count={move_count}, game_over={game.game_over})")
+    def __init__(self, engine, max_game_length):
+        self.engine = engine
+        self.max_game_length = max_game_length
+        self.game = GameState()
+        self.history = []
+        self.move_count = 0
+        self.root = None
+        self.player = None
+        self.simulations_left = 0
+        self.decided = False
+        # Nur den eigenen Baum zurücksetzen: der Auswertungs-Cache wird von allen Partien geteilt
+        engine._last_root = None
+        engine.new_search()
     
-    # Erstelle Trainingsdaten mit korrekten Werten
-    for i, (state, policy, children) in enumerate(game_history):
-        # Wert basierend auf Sieger
-        if winner is None:
-            value = 0.0
-        elif (i % 2 == 0 and winner == 1) or (i % 2 == 1 and winner == 2):
-            value = 1.0  # Gewinn
-        else:
-            value = -1.0  # Verlust
+    def start_move(self, num_simulations):
+        """Bereitet die Wurzel für den nächsten Zug vor; False, wenn die Partie vorbei ist."""
+        if self.decided or self.game.game_over or self.move_count >= self.max_game_length:
+            return False
+        self.player = self.game.turn
+        self.move_count += 1
+        if not self.game.get_valid_moves(self.player):
+            return False
+        self.root = self.engine.prepare_root(self.game, self.player)
+        if not self.root.children:
+            return False
+        # Bereits vorhandene Besuche der Wurzel zählen zum Budget (wie self_play_game)
+        self.simulations_left = max(0, num_simulations - self.root.visit_count)
+        return True
+    
+    def play_move(self):
+        """Spielt den Zug aus den Besuchszahlen der Wurzel."""
+        move = _choose_self_play_move(self.game, self.root, self.player, self.move_count, self.history)
+        self.game = self.game.apply_move(move)
+        self.root = None
+        opponent = 1 if self.player == 2 else 2
+        self.decided = self.game.check_win(self.player) or self.game.check_win(opponent)
+    
+    def training_data(self):
+        return _history_to_training_data(self.game, self.history, self.move_count)
+
+
+def lockstep_self_play(model, games, concurrent=16, simulations=100, c_puct=5.0, max_game_length=200,
+                       leaves_per_game=8, device='cpu'):
+    """
+    Spielt games Selbstspiele, davon concurrent gleichzeitig in diesem Prozess.
+    
+    Jede Partie hat ihren eigenen Suchbaum. Pro Runde wählt jede Partie bis
+    zu leaves_per_game Blätter (mit virtuellem Verlust), alle Blätter aller
+    Partien gehen in einem einzigen Forward-Pass durch das Netz, danach
+    propagiert jede Partie ihre Ergebnisse. So entstehen große Batches ohne
+    Prozesse und ohne IPC; Modell und Auswertungs-Cache existieren nur einmal.
+    
+    Args:
+        model: AlphaZeroNet (wird von allen Partien geteilt)
+        games: Anzahl Spiele insgesamt
+        concurrent: Gleichzeitig laufende Partien
+        simulations, c_puct, max_game_length: wie self_play_game
+        leaves_per_game: Blätter pro Partie und Runde
+        device: Gerät der Engines
+    
+    Yields:
+        training_data eines Spiels (wie self_play_game), sobald es fertig ist
+    """
+    model.eval()
+    active = []
+    for _ in range(min(concurrent, games)):
+        engine = AlphaZeroEngine(device=device, model=model)
+        if active:
+            # Netzwerk-Ausgaben hängen nur von der Stellung ab: ein Cache für alle
+            engine.eval_cache = active[0].engine.eval_cache
+        active.append(_LockstepGame(engine, max_game_length))
+    lead = active[0].engine if active else None
+    if lead is not None and lead.eval_cache is not None:
+        lead.eval_cache.clear()  # einmal zu Beginn (die Gewichte können sich seit dem letzten Aufruf geändert haben)
+    started = len(active)
+    
+    while active:
+        # 1. Wurzeln vorbereiten; beendete Partien abgeben und durch neue ersetzen
+        ready = []
+        for slot in active:
+            while slot is not None and slot.root is None and not slot.start_move(simulations):
+                yield slot.training_data()
+                engine, slot = slot.engine, None
+                if started < games:
+                    slot = _LockstepGame(engine, max_game_length)
+                    started += 1
+            if slot is not None:
+                ready.append(slot)
+        active = ready
         
-        # Konvertiere Policy zu vollständigem Vektor
-        # Verwende die tatsächliche Anzahl der möglichen Züge
-        max_moves = len(move_index_map)
-        full_policy = torch.zeros(max_moves)
+        # 2. Blätter aller Partien sammeln
+        pending = []
+        leaves = []
+        for slot in active:
+            count = min(leaves_per_game, slot.simulations_left)
+            slot_pending = slot.engine._collect_leaves(slot.root, slot.player, c_puct, count, offset=len(leaves))
+            leaves.extend((leaf, player) for leaf, player, idx in slot_pending if idx is not None)
+            pending.append(slot_pending)
+            slot.simulations_left -= count
         
-        if children:
-            for j, child in enumerate(children):
-                if child.move:
-                    move = child.move
-                    # Erstelle konsistenten Move-String
-                    if move['type'] == 'place':
-                        orientation = move.get('orientation', 'vertikal')
-                        move_str = f"place_{move['pos'][0]}_{move['pos'][1]}_{move['stone_type']}_{orientation}"
-                    elif move['type'] == 'move':
-                        move_str = f"move_{move['from'][0]}_{move['from'][1]}_{move['to'][0]}_{move['to'][1]}"
-                    elif move['type'] == 'pfarrer':
-                        move_str = f"pfarrer_{move['from'][0]}_{move['from'][1]}"
-                    else:
-                        continue
-                    
-                    move_idx = move_index_map.get(move_str, -1)
-                    if move_idx >= 0 and j < len(policy):
-                        full_policy[move_idx] = policy[j].item()
+        # 3. Ein Forward-Pass für alle Blätter, danach Backup je Partie
+        if leaves:
+            outputs = lead._evaluate_batch(leaves)
+            for slot, slot_pending in zip(active, pending):
+                if slot_pending:
+                    slot.engine._finish_leaves(slot_pending, *outputs)
         
-        training_data.append((state.unsqueeze(0), full_policy, torch.tensor(value)))
-    
-    return training_data
+        # 4. Partien mit ausgeschöpftem Budget ziehen
+        for slot in active:
+            if slot.simulations_left <= 0:
+                slot.play_move()
 
 
-def train_model(model, training_data, epochs=10, batch_size=32, lr=0.001):
+def train_model(model, training_data, epochs=10, batch_size=32, lr=0.001, augment=False):
     """
     Trainiert das neuronale Netzwerk.
     
     Args:
         model: AlphaZeroNet Modell
-        training_data: Liste von (state, policy, value) Tupeln
+        training_data: Liste von TrainingSamples
         epochs: Anzahl Epochen
         batch_size: Batch-Größe
         lr: Lernrate
+        augment: Jedes Sample im Batch mit einer zufälligen Brett-Symmetrie
+            drehen/spiegeln (siehe symmetry.augment_batch)
     """
     if not training_data:
         print("Keine Trainingsdaten vorhanden!")
@@ -219,10 +417,9 @@ def train_model(model, training_data, epochs=10, batch_size=32, lr=0.001):
     optimizer = optim.Adam(model.parameters(), lr=lr)
     model.train()
     
-    # Konvertiere zu Batches
-    states = torch.cat([d[0] for d in training_data])
-    policies = torch.stack([d[1] for d in training_data])
-    values = torch.stack([d[2] for d in training_data])
+    # Dichte Tensoren nur für den jeweils aktuellen Batch (die States sind eine
+    # Sicht auf den Puffer des Encoders und werden vor dem nächsten Batch verbraucht)
+    encoder = BatchEncoder(batch_size)
     
     for epoch in range(epochs):
         total_loss = 0.0
@@ -234,25 +431,17 @@ def train_model(model, training_data, epochs=10, batch_size=32, lr=0.001):
         indices = torch.randperm(len(training_data))
         
         for i in range(0, len(training_data), batch_size):
-            batch_indices = indices[i:i+batch_size]
-            batch_states = states[batch_indices]
-            batch_policies = policies[batch_indices]
-            batch_values = values[batch_indices]
+            batch = [training_data[j] for j in indices[i:i+batch_size].tolist()]
+            batch_states, batch_policies, batch_values, batch_masks = expand_samples(batch, encoder)
+            if augment:
+                batch_states, batch_policies, batch_masks = augment_batch(batch_states, batch_policies, batch_masks)
             
-            # Forward pass
-            policy_pred, value_pred = model(batch_states)
+            # Forward pass: Policy als maskierte Log-Softmax über die gültigen Aktionen
+            policy_pred_probs, value_pred = model(batch_states, batch_masks)
             
             # Policy-Loss (KL-Divergenz - AlphaZero Standard)
-            # Anpassen der Policy-Größe falls nötig
-            min_size = min(policy_pred.size(1), batch_policies.size(1))
-            policy_pred_cropped = policy_pred[:, :min_size]
-            batch_policies_cropped = batch_policies[:, :min_size]
-            
-            # Softmax über Policy-Logits für Wahrscheinlichkeitsverteilung
-            policy_pred_probs = F.log_softmax(policy_pred_cropped, dim=1)
-            
             # KL-Divergenz zwischen Target-Policy (MCTS) und Predicted-Policy
-            policy_loss = F.kl_div(policy_pred_probs, batch_policies_cropped, reduction='batchmean')
+            policy_loss = F.kl_div(policy_pred_probs, batch_policies, reduction='batchmean')
             
             # Value-Loss (MSE)
             value_loss = F.mse_loss(value_pred.squeeze(), batch_values)
@@ -289,13 +478,25 @@ def main():
     num_games = 20  # Anzahl Selbstspiele pro Iteration
     num_iterations = 2  # Anzahl Training-Iterationen
     num_simulations = 100  # MCTS-Simulationen pro Zug
+    num_workers = max(1, (os.cpu_count() or 1) - 1)  # Selbstspiel-Prozesse (1 = ohne Pool)
+    lockstep_games = 0  # Gleichzeitige Partien im Hauptprozess statt Pool (0 = aus)
+    inference_server = False  # Forward-Passes aller Worker gebündelt in einem Server-Prozess
+    # Brett-Symmetrien: 'batch' (zufällig pro Trainings-Batch), 'store' (alle 8 Varianten speichern), None
+    symmetry_augmentation = 'batch'
     model_path = "models/alphazero_model.pth"
+    replay_buffer_path = "models/replay_buffer"  # None = Puffer nur im Speicher
     
     # Zeige aktuelle Parameter an (WICHTIG: Zur Bestätigung)
     print(f"\n📊 Training-Parameter:")
     print(f"   - Spiele pro Iteration: {num_games}")
     print(f"   - Anzahl Iterationen: {num_iterations}")
     print(f"   - MCTS-Simulationen pro Zug: {num_simulations}")
+    print(f"   - Selbstspiel-Prozesse: {num_workers}")
+    if lockstep_games > 1:
+        print(f"   - Lock-Step-Partien: {lockstep_games}")
+    elif num_workers > 1:
+        print(f"   - Inferenz-Server: {'an' if inference_server else 'aus'}")
+    print(f"   - Symmetrie-Augmentierung: {symmetry_augmentation}")
     print(f"   - Training-Epochs pro Iteration: 10")
     print(f"   - Batch-Größe: 32")
     print(f"   - Lernrate: 0.001\n")
@@ -308,8 +509,8 @@ def main():
     model = engine.model
     model.train()
     
-    # Replay Buffer für Datenspeicherung über mehrere Iterationen
-    replay_buffer = SelfPlayBuffer(max_size=50000)
+    # Replay Buffer für Datenspeicherung über mehrere Iterationen (und Läufe: Memmaps in models/)
+    replay_buffer = ReplayBuffer(capacity=50000, path=replay_buffer_path)
     
     # Training-Loop mit Fehlerbehandlung
     try:
@@ -325,19 +526,33 @@ def main():
             all_training_data = []
             
             try:
-                for game_num in range(num_games):
-                    if (game_num + 1) % 1 == 0:  # Jedes Spiel ausgeben
-                        print(f"Spiele Spiel {game_num+1}/{num_games}...")
-                    
+                start = time.perf_counter()
+                if lockstep_games > 1:
+                    # Viele Partien in einem Prozess, ein Forward-Pass pro Runde
+                    games = lockstep_self_play(model, num_games, lockstep_games, simulations=num_simulations)
+                elif num_workers > 1:
+                    # Parallel: Ergebnisse kommen an, sobald ein Spiel fertig ist
+                    games = parallel_self_play(model, num_games, num_workers, simulations=num_simulations,
+                                               inference_server=inference_server)
+                else:
                     # Setze Modell auf eval() für MCTS-Simulationen
                     engine.model.eval()
-                    training_data = self_play_game(engine, num_simulations=num_simulations)
+                    games = (self_play_game(engine, num_simulations=num_simulations) for _ in range(num_games))
+                
+                for game_num, training_data in enumerate(games):
+                    print(f"Spiel {game_num+1}/{num_games} fertig ({len(training_data)} Positionen)")
+                    if symmetry_augmentation == 'store':
+                        training_data = augment_samples(training_data)
                     
                     # Füge Daten zum Replay Buffer hinzu
-                    for state, policy, value in training_data:
-                        replay_buffer.add(state, policy, value)
+                    for sample in training_data:
+                        replay_buffer.add(sample)
                     
                     all_training_data.extend(training_data)
+                replay_buffer.flush()
+                
+                elapsed = time.perf_counter() - start
+                print(f"⏱️  Selbstspiel: {num_games / elapsed * 60:.1f} Spiele/Minute")
             except Exception as e:
                 print(f"⚠️  Fehler beim Selbstspiel: {e}")
                 raise
@@ -364,14 +579,13 @@ def main():
                     # Sample alte Daten aus Replay Buffer (50% neue, 50% alte)
                     num_old_samples = min(len(all_training_data), replay_buffer.size())
                     if num_old_samples > 0:
-                        old_states, old_policies, old_values = replay_buffer.sample(num_old_samples)
-                        # Konvertiere zu Liste von Tupeln (wie all_training_data)
-                        for i in range(old_states.size(0)):
-                            combined_data.append((old_states[i:i+1], old_policies[i], old_values[i]))
+                        # Als TrainingSamples (wie all_training_data), dicht erst im Training
+                        combined_data.extend(replay_buffer.sample(num_old_samples, expand=False))
                 
                 # WICHTIG: Setze Modell auf Trainingsmodus für Backpropagation
                 model.train()
-                train_model(model, combined_data, epochs=10, batch_size=32, lr=0.001)
+                train_model(model, combined_data, epochs=10, batch_size=32, lr=0.001,
+                            augment=symmetry_augmentation == 'batch')
             except Exception as e:
                 print(f"⚠️  Fehler beim Training: {e}")
                 raise
@@ -387,6 +601,22 @@ def main():
         except Exception as e:
             print(f"\n❌ Fehler beim Speichern des finalen Modells: {e}")
             raise
+        
+        # Eingefrorenes Inferenz-Artefakt für AlphaZeroEngine/GUI (BatchNorm gefaltet, Köpfe fusioniert)
+        try:
+            export_frozen(model, frozen_path(model_path))
+            print(f"✅ Inferenz-Artefakt gespeichert: {frozen_path(model_path)}")
+        except Exception as e:
+            print(f"⚠️  Konnte Inferenz-Artefakt nicht exportieren: {e}")
+        
+        # Int8-Artefakt für CPU-Spieler, kalibriert auf Positionen aus dem Replay Buffer
+        # (Prüfung gegen das Float-Modell: python quantization.py)
+        try:
+            calibration_states = replay_buffer.sample(1000)[0]
+            export_quantized(model, calibration_states, quantized_path(model_path))
+            print(f"✅ Int8-Artefakt gespeichert: {quantized_path(model_path)}")
+        except Exception as e:
+            print(f"⚠️  Konnte Int8-Artefakt nicht exportieren: {e}")
     
     except KeyboardInterrupt:
         print("\n\n⚠️  Training durch Benutzer unterbrochen!")
@@ -0,0 +1,204 @@
+# transposition.py
+# Transpositionstabelle und Auswertungs-Cache für die AlphaZero-MCTS (Schlüssel: GameState.key)
+import sys
+from collections import OrderedDict
+
+
+class TTEntry:
+    """Gemeinsame Statistik einer Stellung, geteilt von allen Knoten mit demselben Schlüssel."""
+
+    __slots__ = ('key', 'visit_count', 'value_sum', 'move_priors', 'value', 'value_player')
+
+    def __init__(self, key=None):
+        self.key = key
+        self.visit_count = 0
+        self.value_sum = 0.0
+        self.move_priors = None   # Priors der gültigen Züge (Array, in Reihenfolge der Kinder)
+        self.value = None         # Value-Ausgabe des Netzwerks
+        self.value_player = None  # Perspektive, aus der value berechnet wurde
+
+    def memory_bytes(self):
+        """Grobe Schätzung des Speicherbedarfs in Bytes."""
+        size = 128
+        if self.move_priors is not None:
+            size += sys.getsizeof(self.move_priors)
+        return size
+
+
+class TranspositionTable:
+    """
+    Transpositionstabelle mit begrenztem Index.
+
+    Die Grenzen gelten für den Index (Schlüssel -> TTEntry), nicht für den
+    Speicher der Suche: Knoten im Baum halten ihre TTEntry-Objekte selbst,
+    ein verdrängter Eintrag lebt also weiter, solange ein Knoten ihn
+    referenziert. Wird dieselbe Stellung danach wieder erreicht, bekommt sie
+    einen neuen Eintrag, und ihre Statistik ist auf zwei Einträge aufgeteilt.
+    stats() zählt solche Fälle ('splits') und die Besuche, die mit
+    verdrängten Einträgen aus dem Index gefallen sind ('evicted_visits').
+    Der Speicher der Suche selbst wird über die Simulationszahl begrenzt.
+
+    Args:
+        max_index_entries: Maximale Anzahl Einträge im Index
+        max_index_mb: Optionales Limit (geschätzt, in MB) für die Einträge im Index
+        replacement: 'lru' (am längsten unbenutzt) oder 'visits' (wenigste
+            Besuche unter den ältesten Einträgen) als Ersetzungsstrategie
+        sample_size: Anzahl der ältesten Einträge, unter denen 'visits' wählt
+    """
+
+    def __init__(self, max_index_entries=200000, max_index_mb=None, replacement='lru', sample_size=16):
+        if replacement not in ('lru', 'visits'):
+            raise ValueError(f"Unbekannte Ersetzungsstrategie: {replacement}")
+        self.max_entries = max_index_entries
+        self.max_memory_bytes = int(max_index_mb * 1024 * 1024) if max_index_mb else None
+        self.replacement = replacement
+        self.sample_size = sample_size
+        self.entries = OrderedDict()
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_keys = set()  # Schlüssel verdrängter Einträge (nur für die splits-Zählung)
+        self.splits = 0
+        self.evicted_visits = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def lookup(self, key):
+        """Gibt den Eintrag zu key zurück (oder None) und zählt Treffer/Fehlschläge."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def get_or_create(self, key):
+        """Liefert den vorhandenen Eintrag oder legt einen neuen an."""
+        entry = self.lookup(key)
+        if entry is None:
+            if key in self.evicted_keys:
+                # Ein Knoten hält noch den alten Eintrag: die Statistik ist ab jetzt aufgeteilt
+                self.evicted_keys.discard(key)
+                self.splits += 1
+            entry = TTEntry(key)
+            self.entries[key] = entry
+            self.memory_bytes += entry.memory_bytes()
+            self._enforce_limits()
+        return entry
+
+    def account(self, entry, old_bytes):
+        """Aktualisiert die Speicherbilanz, nachdem ein Eintrag gewachsen ist (z.B. Priors gesetzt)."""
+        if entry.key in self.entries:
+            self.memory_bytes += entry.memory_bytes() - old_bytes
+            self._enforce_limits()
+
+    def _enforce_limits(self):
+        while self.entries and (len(self.entries) > self.max_entries or
+                                (self.max_memory_bytes is not None and self.memory_bytes > self.max_memory_bytes)):
+            self._evict_one()
+
+    def _evict_one(self):
+        if self.replacement == 'lru':
+            _, victim = self.entries.popitem(last=False)
+        else:
+            # Unter den ältesten Einträgen den mit den wenigsten Besuchen ersetzen
+            oldest = []
+            for key in self.entries:
+                oldest.append(key)
+                if len(oldest) >= self.sample_size:
+                    break
+            victim_key = min(oldest, key=lambda k: self.entries[k].visit_count)
+            victim = self.entries.pop(victim_key)
+        # Nur der Index verliert den Eintrag; Knoten, die ihn noch referenzieren, behalten ihn
+        self.memory_bytes -= victim.memory_bytes()
+        self.evictions += 1
+        self.evicted_keys.add(victim.key)
+        self.evicted_visits += victim.visit_count
+
+    def clear(self):
+        self.entries.clear()
+        self.evicted_keys.clear()
+        self.memory_bytes = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.splits = 0
+        self.evicted_visits = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def stats(self):
+        return {
+            'entries': len(self.entries),
+            'index_memory_mb': self.memory_bytes / (1024 * 1024),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'evictions': self.evictions,
+            'splits': self.splits,
+            'evicted_visits': self.evicted_visits,
+        }
+
+
+class EvaluationCache:
+    """
+    LRU-Cache für Netzwerk-Auswertungen (Policy-Priors und Value).
+
+    Schlüssel ist (GameState.key, Spieler am Zug). Der Cache bleibt über
+    mehrere Suchen einer Partie erhalten und muss geleert werden, sobald
+    sich die Gewichte des Netzwerks ändern.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def stats(self):
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+        }